@@ -0,0 +1,243 @@
+"""
+Answer cache for the AutoStream AI Agent RAG node.
+
+Caches generated answers keyed on the normalized user question, the
+messages before it and the knowledge base version, so repeated questions
+(pricing, refunds, platforms) skip the LLM. The earlier messages are part of
+the key because the answer prompt includes them: the same question after a
+different exchange is a different entry. Answers are only cached for shallow
+conversations, so the key covers the whole conversation.
+
+Two backends are provided: an in-process LRU and a SQLite file that several
+worker processes can share.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from langchain_core.messages import BaseMessage
+
+
+PUNCTUATION_PATTERN = re.compile(r"[^\w\s]")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_question(text: str) -> str:
+    """Fold case, punctuation and whitespace so trivially different questions match."""
+    text = PUNCTUATION_PATTERN.sub(" ", text.lower())
+    return WHITESPACE_PATTERN.sub(" ", text).strip()
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss/eviction counters for an answer cache."""
+    hits: int = 0
+    misses: int = 0
+    sets: int = 0
+    evictions: int = 0
+    skipped: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "sets": self.sets,
+            "evictions": self.evictions,
+            "skipped": self.skipped,
+            "hit_rate": round(self.hit_rate, 4),
+        }
+
+
+class MemoryBackend:
+    """
+    In-process LRU backend with a TTL.
+
+    Args:
+        max_entries: Maximum number of cached answers
+        ttl: Seconds an answer stays valid
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created_at, value = entry
+            if time.time() - created_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> int:
+        """Store a value and return the number of entries evicted."""
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """
+    SQLite backend shared by all processes pointing at the same file.
+
+    Args:
+        path: Database file path
+        max_entries: Maximum number of cached answers
+        ttl: Seconds an answer stays valid
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000, ttl: float = 3600.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS answers_accessed ON answers (accessed_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute("SELECT value, created_at FROM answers WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, created_at = row
+        with conn:
+            if now - created_at > self.ttl:
+                conn.execute("DELETE FROM answers WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE answers SET accessed_at = ? WHERE key = ?", (now, key))
+        return value
+
+    def set(self, key: str, value: str) -> int:
+        """Store a value and return the number of entries evicted."""
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO answers (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            count = conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+            excess = count - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM answers WHERE key IN "
+                    "(SELECT key FROM answers ORDER BY accessed_at LIMIT ?)",
+                    (excess,)
+                )
+                return excess
+        return 0
+
+    def clear(self) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM answers")
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+
+class AnswerCache:
+    """
+    Answer cache keyed on normalized question, preceding messages and
+    knowledge base version.
+
+    Args:
+        backend: MemoryBackend or SQLiteBackend
+        max_context_messages: Answers are only read or written when at most
+            this many messages precede the question
+    """
+
+    def __init__(self, backend=None, max_context_messages: int = 2):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.max_context_messages = max_context_messages
+        self.stats = CacheStats()
+
+    @staticmethod
+    def make_key(question: str, kb_version: str, context: Sequence[str] = ()) -> str:
+        """Key for a question asked after the context messages (oldest first)."""
+        parts = [kb_version, *(normalize_question(text) for text in context), normalize_question(question)]
+        return hashlib.sha1("\x00".join(parts).encode("utf-8")).hexdigest()
+
+    def is_cacheable(self, messages: List[BaseMessage]) -> bool:
+        """Whether the conversation is shallow enough to key on all of it."""
+        return 0 < len(messages) <= self.max_context_messages + 1
+
+    def _key(self, messages: List[BaseMessage], kb_version: str) -> str:
+        return self.make_key(messages[-1].content, kb_version, [message.content for message in messages[:-1]])
+
+    def get(self, messages: List[BaseMessage], kb_version: str) -> Optional[str]:
+        """Return a cached answer to the last message, if one can be reused."""
+        if not self.is_cacheable(messages):
+            self.stats.skipped += 1
+            return None
+        value = self.backend.get(self._key(messages, kb_version))
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value
+
+    def set(self, messages: List[BaseMessage], kb_version: str, answer: str) -> None:
+        """Cache the answer to the last message if the context is shallow."""
+        if not self.is_cacheable(messages):
+            return
+        self.stats.evictions += self.backend.set(self._key(messages, kb_version), answer)
+        self.stats.sets += 1
+
+
+def answer_cache_from_env() -> Optional[AnswerCache]:
+    """
+    Build the answer cache configured by AUTOSTREAM_ANSWER_CACHE:
+    "memory" (default), "sqlite:<path>" or "off".
+    """
+    setting = os.getenv("AUTOSTREAM_ANSWER_CACHE", "memory")
+    ttl = float(os.getenv("AUTOSTREAM_ANSWER_CACHE_TTL", "3600"))
+    if setting == "off":
+        return None
+    if setting.startswith("sqlite:"):
+        return AnswerCache(SQLiteBackend(setting.split(":", 1)[1], ttl=ttl))
+    return AnswerCache(MemoryBackend(ttl=ttl))
@@ -0,0 +1,165 @@
+"""
+Batch runner for the AutoStream AI Agent.
+
+Replays conversations from a JSONL file through the agent in parallel and
+writes one result line per conversation as soon as it finishes.
+
+Input lines look like:
+    {"id": "conv-1", "turns": ["hi", "how much is pro?", "sign me up"]}
+("id" defaults to the line number; turns may also be {"content": ...} objects.)
+
+Output lines look like:
+    {"id": "conv-1", "turns": [{"user": ..., "intent": ..., "lead_info": ...,
+                                "response": ..., "latency_ms": ...}, ...]}
+
+The output file doubles as the checkpoint: on restart, conversations that
+already have a successful result line are skipped.
+
+Usage:
+    python -m agent.batch in.jsonl out.jsonl [--concurrency 8] [--no-resume]
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Set, Tuple
+
+from dotenv import load_dotenv
+
+from agent.graph import create_agent, run_conversation
+from agent.state import new_conversation_state
+
+
+def read_conversations(path: str) -> Iterator[Tuple[str, list]]:
+    """Stream (id, turns) pairs from a JSONL file, one line at a time."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            turns = [t["content"] if isinstance(t, dict) else t for t in row.get("turns", [])]
+            yield str(row.get("id", line_number)), turns
+
+
+def load_checkpoint(path: str) -> Set[str]:
+    """
+    Return ids of conversations already completed in the output file.
+    A partially written last line (from a crash) is truncated away.
+    """
+    done: Set[str] = set()
+    if not os.path.exists(path):
+        return done
+
+    valid_end = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                break
+            valid_end += len(line)
+            if "error" not in row:
+                done.add(str(row["id"]))
+
+    if valid_end != os.path.getsize(path):
+        with open(path, "r+b") as f:
+            f.truncate(valid_end)
+    return done
+
+
+def run_turns(agent, conversation_id: str, turns: list) -> dict:
+    """Run one conversation turn by turn and collect per-turn results."""
+    state = new_conversation_state()
+    results = []
+    for user_message in turns:
+        start = time.perf_counter()
+        state, response = run_conversation(agent, state, user_message)
+        results.append({
+            "user": user_message,
+            "intent": state.get("intent", "unknown"),
+            "lead_info": dict(state.get("lead_info", {})),
+            "response": response,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 2)
+        })
+    return {"id": conversation_id, "turns": results}
+
+
+def run_batch(agent, input_path: str, output_path: str, concurrency: int = 8, resume: bool = True) -> dict:
+    """
+    Run every conversation in input_path through the agent.
+
+    At most 2 * concurrency conversations are read ahead of the workers, so
+    memory stays flat regardless of the input size.
+
+    Args:
+        agent: Compiled LangGraph agent
+        input_path: JSONL file of conversations
+        output_path: JSONL file results are appended to
+        concurrency: Number of worker threads
+        resume: Skip conversations already completed in output_path
+
+    Returns:
+        Counts of completed, skipped and failed conversations
+    """
+    done = load_checkpoint(output_path) if resume else set()
+    counts = {"completed": 0, "skipped": 0, "failed": 0}
+    write_lock = threading.Lock()
+    slots = threading.BoundedSemaphore(concurrency * 2)
+
+    with open(output_path, "a" if resume else "w", encoding="utf-8") as out:
+
+        def work(conversation_id: str, turns: list) -> None:
+            try:
+                try:
+                    record = run_turns(agent, conversation_id, turns)
+                    key = "completed"
+                except Exception as e:
+                    record = {"id": conversation_id, "error": str(e)}
+                    key = "failed"
+                line = json.dumps(record, ensure_ascii=False) + "\n"
+                with write_lock:
+                    out.write(line)
+                    out.flush()
+                    counts[key] += 1
+            finally:
+                slots.release()
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for conversation_id, turns in read_conversations(input_path):
+                if conversation_id in done:
+                    counts["skipped"] += 1
+                    continue
+                slots.acquire()
+                pool.submit(work, conversation_id, turns)
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay JSONL conversations through the AutoStream agent.")
+    parser.add_argument("input", help="Input JSONL file of conversations")
+    parser.add_argument("output", help="Output JSONL file of per-turn results")
+    parser.add_argument("--concurrency", type=int, default=8, help="Number of parallel workers")
+    parser.add_argument("--no-resume", action="store_true", help="Ignore and overwrite existing output")
+    args = parser.parse_args()
+
+    load_dotenv()
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        print("Error: GOOGLE_API_KEY not found in environment variables.")
+        return
+
+    agent = create_agent(api_key)
+    start = time.perf_counter()
+    counts = run_batch(agent, args.input, args.output, args.concurrency, resume=not args.no_resume)
+    elapsed = time.perf_counter() - start
+    print(f"Completed {counts['completed']}, skipped {counts['skipped']}, "
+          f"failed {counts['failed']} in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
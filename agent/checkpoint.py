@@ -0,0 +1,550 @@
+"""
+SQLite conversation checkpointer for the AutoStream AI Agent.
+
+A LangGraph checkpoint saver that several processes can share through one
+SQLite file in WAL mode (concurrent readers, one writer at a time).
+
+Run the graph with durability="exit" (see run_thread) so each turn writes
+one checkpoint row. Rows store only the messages added since their parent
+row; the other channels are small and stored whole. Loading a thread reads
+its latest message snapshot plus the tail of rows after it. Every
+compact_every rows the full history is written as a new snapshot and older
+rows are dropped.
+
+A delta is only written when the parent is the thread's latest row. A
+checkpoint whose parent is older (another writer saved the thread in the
+meantime, or a fork from an earlier checkpoint) is stored with a full
+snapshot of its history, so nothing it saved is lost; the rows it branched
+past are no longer loadable. Serialize turns per thread to keep every
+writer's turn in the history: athread_lock holds a per-thread lease row in
+the same file, so turns of one thread also run one at a time across
+processes. The holder renews its lease while the turn waits and runs; a
+lease left by a crashed process expires after lock_ttl seconds.
+
+The async methods run the blocking SQLite calls in a worker thread.
+"""
+import asyncio
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+
+MESSAGES_CHANNEL = "messages"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    seq INTEGER NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    parent_id TEXT,
+    checkpoint_type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    delta_type TEXT NOT NULL,
+    delta BLOB NOT NULL,
+    message_count INTEGER NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, seq)
+);
+CREATE UNIQUE INDEX IF NOT EXISTS checkpoints_id ON checkpoints (thread_id, checkpoint_ns, checkpoint_id);
+CREATE TABLE IF NOT EXISTS snapshots (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    seq INTEGER NOT NULL,
+    messages_type TEXT NOT NULL,
+    messages BLOB NOT NULL,
+    message_count INTEGER NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    value_type TEXT NOT NULL,
+    value BLOB NOT NULL,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS thread_locks (
+    thread_id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class SQLiteCheckpointer(BaseCheckpointSaver):
+    """
+    LangGraph checkpointer backed by a SQLite file in WAL mode.
+
+    Args:
+        path: Database file path
+        compact_every: Rows per thread between message snapshots
+        cache_size: Threads whose latest message list is kept in memory
+        lock_ttl: Seconds a thread lock outlives its holder before another
+            process may take it over; renewed while the holder runs
+    """
+
+    def __init__(self, path: str, compact_every: int = 20, cache_size: int = 1024, lock_ttl: float = 60.0):
+        super().__init__()
+        self.path = path
+        self.compact_every = compact_every
+        self.cache_size = cache_size
+        self.lock_ttl = lock_ttl
+        self._local = threading.local()
+        # (thread_id, ns) -> (checkpoint_id, message_count, messages)
+        self._cache: "OrderedDict[Tuple[str, str], Tuple[str, int, List[Any]]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # -- message cache -----------------------------------------------------
+
+    def _cache_get(self, key: Tuple[str, str], checkpoint_id: str) -> Optional[List[Any]]:
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is None or entry[0] != checkpoint_id:
+                return None
+            self._cache.move_to_end(key)
+            return entry[2]
+
+    def _cache_put(self, key: Tuple[str, str], checkpoint_id: str, messages: List[Any]) -> None:
+        with self._cache_lock:
+            # Store a shallow copy: the graph extends its list in place
+            self._cache[key] = (checkpoint_id, len(messages), list(messages))
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    # -- loading -----------------------------------------------------------
+
+    def _load_messages(self, conn: sqlite3.Connection, thread_id: str, ns: str, seq: int) -> Optional[List[Any]]:
+        """Rebuild the message history as of row seq: snapshot plus tail deltas."""
+        snapshot = conn.execute(
+            "SELECT seq, messages_type, messages FROM snapshots WHERE thread_id = ? AND checkpoint_ns = ?",
+            (thread_id, ns)
+        ).fetchone()
+        messages: List[Any] = []
+        start = -1
+        if snapshot is not None:
+            if snapshot[0] > seq:
+                return None  # Compacted away
+            messages = list(self.serde.loads_typed((snapshot[1], snapshot[2])))
+            start = snapshot[0]
+        for delta_type, delta in conn.execute(
+            "SELECT delta_type, delta FROM checkpoints "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND seq > ? AND seq <= ? ORDER BY seq",
+            (thread_id, ns, start, seq)
+        ):
+            messages.extend(self.serde.loads_typed((delta_type, delta)))
+        return messages
+
+    def _row_to_tuple(self, conn: sqlite3.Connection, row: tuple) -> Optional[CheckpointTuple]:
+        (thread_id, ns, seq, checkpoint_id, parent_id, c_type, c_blob, m_type, m_blob, has_messages) = row
+        key = (thread_id, ns)
+        messages = None
+        if has_messages:
+            cached = self._cache_get(key, checkpoint_id)
+            if cached is not None:
+                messages = list(cached)
+            else:
+                messages = self._load_messages(conn, thread_id, ns, seq)
+                if messages is None:
+                    return None
+                self._cache_put(key, checkpoint_id, messages)
+
+        checkpoint: Checkpoint = self.serde.loads_typed((c_type, c_blob))
+        if messages is not None:
+            checkpoint["channel_values"][MESSAGES_CHANNEL] = messages
+
+        writes = conn.execute(
+            "SELECT task_id, channel, value_type, value FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_path, task_id, idx",
+            (thread_id, ns, checkpoint_id)
+        ).fetchall()
+
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": checkpoint_id}},
+            checkpoint=checkpoint,
+            metadata=self.serde.loads_typed((m_type, m_blob)),
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": parent_id}}
+                if parent_id else None
+            ),
+            pending_writes=[(task_id, channel, self.serde.loads_typed((v_type, v))) for task_id, channel, v_type, v in writes],
+        )
+
+    _ROW_COLUMNS = (
+        "thread_id, checkpoint_ns, seq, checkpoint_id, parent_id, checkpoint_type, checkpoint, "
+        "metadata_type, metadata, message_count >= 0"
+    )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Load a checkpoint: the given checkpoint_id, or the thread's latest."""
+        conn = self._connect()
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        if checkpoint_id:
+            row = conn.execute(
+                f"SELECT {self._ROW_COLUMNS} FROM checkpoints "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, ns, checkpoint_id)
+            ).fetchone()
+        else:
+            row = conn.execute(
+                f"SELECT {self._ROW_COLUMNS} FROM checkpoints "
+                "WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY seq DESC LIMIT 1",
+                (thread_id, ns)
+            ).fetchone()
+        if row is None:
+            return None
+        return self._row_to_tuple(conn, row)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """List stored checkpoints, newest first."""
+        conn = self._connect()
+        query = f"SELECT {self._ROW_COLUMNS} FROM checkpoints"
+        clauses: List[str] = []
+        params: List[Any] = []
+        if config is not None:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if "checkpoint_ns" in config["configurable"]:
+                clauses.append("checkpoint_ns = ?")
+                params.append(config["configurable"]["checkpoint_ns"])
+        if before is not None and get_checkpoint_id(before):
+            clauses.append("checkpoint_id < ?")
+            params.append(get_checkpoint_id(before))
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY thread_id, seq DESC"
+
+        returned = 0
+        for row in conn.execute(query, params).fetchall():
+            if limit is not None and returned >= limit:
+                break
+            item = self._row_to_tuple(conn, row)
+            if item is None:
+                continue
+            if filter and any(item.metadata.get(k) != v for k, v in filter.items()):
+                continue
+            returned += 1
+            yield item
+
+    # -- saving ------------------------------------------------------------
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Store a checkpoint, writing only the messages added since its parent row."""
+        conn = self._connect()
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        parent_id = config["configurable"].get("checkpoint_id")
+
+        values = dict(checkpoint["channel_values"])
+        messages = values.pop(MESSAGES_CHANNEL, None)
+        stored = {**checkpoint, "channel_values": values}
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            last = conn.execute(
+                "SELECT seq, checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                "ORDER BY seq DESC LIMIT 1",
+                (thread_id, ns)
+            ).fetchone()
+            seq = last[0] + 1 if last else 0
+            snapshot_seq = conn.execute(
+                "SELECT seq FROM snapshots WHERE thread_id = ? AND checkpoint_ns = ?", (thread_id, ns)
+            ).fetchone()
+            # A delta is relative to the parent, so it only extends the thread if the parent is the latest row
+            branched = (last[1] if last else None) != parent_id
+            previous_count = self._message_count(conn, thread_id, ns, last[0]) if last and not branched else 0
+
+            if messages is None:
+                delta: List[Any] = []
+                count = -1
+            elif branched or len(messages) < previous_count:
+                # Not appended to the latest row's history: snapshot it whole
+                delta, count = [], len(messages)
+                self._write_snapshot(conn, thread_id, ns, seq, messages)
+                snapshot_seq = (seq,)
+            else:
+                delta, count = list(messages[previous_count:]), len(messages)
+
+            c_type, c_blob = self.serde.dumps_typed(stored)
+            m_type, m_blob = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+            d_type, d_blob = self.serde.dumps_typed(delta)
+            conn.execute(
+                "INSERT INTO checkpoints (thread_id, checkpoint_ns, seq, checkpoint_id, parent_id, "
+                "checkpoint_type, checkpoint, metadata_type, metadata, delta_type, delta, message_count) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, ns, seq, checkpoint["id"], parent_id, c_type, c_blob, m_type, m_blob, d_type, d_blob, count)
+            )
+
+            tail = seq - (snapshot_seq[0] if snapshot_seq else -1)
+            if messages is not None and tail >= self.compact_every:
+                self._compact_thread(conn, thread_id, ns, seq, messages)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        if messages is not None:
+            self._cache_put((thread_id, ns), checkpoint["id"], messages)
+
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": checkpoint["id"]}}
+
+    def _message_count(self, conn: sqlite3.Connection, thread_id: str, ns: str, seq: int) -> int:
+        """Length of the message history as of row seq (rows without messages carry none)."""
+        row = conn.execute(
+            "SELECT message_count FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "AND seq <= ? AND message_count >= 0 ORDER BY seq DESC LIMIT 1",
+            (thread_id, ns, seq)
+        ).fetchone()
+        if row is not None:
+            return row[0]
+        snapshot = conn.execute(
+            "SELECT message_count FROM snapshots WHERE thread_id = ? AND checkpoint_ns = ? AND seq <= ?",
+            (thread_id, ns, seq)
+        ).fetchone()
+        return snapshot[0] if snapshot else 0
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Store intermediate writes linked to a checkpoint."""
+        conn = self._connect()
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            v_type, v_blob = self.serde.dumps_typed(value)
+            rows.append((thread_id, ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx), channel, v_type, v_blob, task_path))
+        # Special (negative idx) writes overwrite; regular writes are kept once
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [row for row in rows if row[4] < 0]
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [row for row in rows if row[4] >= 0]
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete all checkpoints, snapshots and writes of a thread."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for table in ("checkpoints", "snapshots", "writes"):
+                conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        with self._cache_lock:
+            for key in [k for k in self._cache if k[0] == thread_id]:
+                del self._cache[key]
+
+    # -- thread locks ------------------------------------------------------
+
+    def try_lock_thread(self, thread_id: str, owner: str) -> bool:
+        """Take the thread's lease for owner unless another owner holds an unexpired one."""
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT owner, expires_at FROM thread_locks WHERE thread_id = ?", (thread_id,)).fetchone()
+            if row is not None and row[0] != owner and row[1] > now:
+                conn.execute("ROLLBACK")
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO thread_locks (thread_id, owner, expires_at) VALUES (?, ?, ?)",
+                (thread_id, owner, now + self.lock_ttl)
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return True
+
+    def renew_thread_lock(self, thread_id: str, owner: str) -> bool:
+        """Extend owner's lease; False if owner no longer holds it."""
+        conn = self._connect()
+        cursor = conn.execute(
+            "UPDATE thread_locks SET expires_at = ? WHERE thread_id = ? AND owner = ?",
+            (time.time() + self.lock_ttl, thread_id, owner)
+        )
+        return cursor.rowcount > 0
+
+    def unlock_thread(self, thread_id: str, owner: str) -> None:
+        conn = self._connect()
+        conn.execute("DELETE FROM thread_locks WHERE thread_id = ? AND owner = ?", (thread_id, owner))
+
+    @asynccontextmanager
+    async def athread_lock(self, thread_id: str, poll: float = 0.02, max_poll: float = 0.5):
+        """Hold the thread's lease for the duration of a turn, polling while another process has it."""
+        owner = uuid.uuid4().hex
+        while not await asyncio.to_thread(self.try_lock_thread, thread_id, owner):
+            await asyncio.sleep(poll)
+            poll = min(poll * 2, max_poll)
+        heartbeat = asyncio.create_task(self._lease_heartbeat(thread_id, owner))
+        try:
+            yield
+        finally:
+            heartbeat.cancel()
+            await asyncio.to_thread(self.unlock_thread, thread_id, owner)
+
+    async def _lease_heartbeat(self, thread_id: str, owner: str) -> None:
+        """Extend the lease every third of lock_ttl so it never expires while held."""
+        while True:
+            await asyncio.sleep(self.lock_ttl / 3)
+            # An update, not try_lock_thread: a renewal that finishes after
+            # unlock_thread must not recreate the lease
+            await asyncio.to_thread(self.renew_thread_lock, thread_id, owner)
+
+    # -- compaction --------------------------------------------------------
+
+    def _write_snapshot(self, conn: sqlite3.Connection, thread_id: str, ns: str, seq: int, messages: List[Any]) -> None:
+        s_type, s_blob = self.serde.dumps_typed(list(messages))
+        conn.execute(
+            "INSERT OR REPLACE INTO snapshots (thread_id, checkpoint_ns, seq, messages_type, messages, message_count) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (thread_id, ns, seq, s_type, s_blob, len(messages))
+        )
+
+    def _compact_thread(self, conn: sqlite3.Connection, thread_id: str, ns: str, seq: int, messages: List[Any]) -> None:
+        """Snapshot the history as of row seq and drop the rows before it."""
+        self._write_snapshot(conn, thread_id, ns, seq, messages)
+        conn.execute(
+            "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id IN "
+            "(SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND seq < ?)",
+            (thread_id, ns, thread_id, ns, seq)
+        )
+        conn.execute(
+            "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND seq < ?",
+            (thread_id, ns, seq)
+        )
+
+    def compact(self, min_tail: int = 1) -> int:
+        """
+        Compact every thread with at least min_tail rows after its snapshot.
+        Meant to run periodically (e.g. from a maintenance job).
+
+        Returns:
+            Number of threads compacted
+        """
+        conn = self._connect()
+        candidates = conn.execute(
+            "SELECT c.thread_id, c.checkpoint_ns, MAX(c.seq) FROM checkpoints c "
+            "LEFT JOIN snapshots s ON s.thread_id = c.thread_id AND s.checkpoint_ns = c.checkpoint_ns "
+            "WHERE c.seq > COALESCE(s.seq, -1) AND c.message_count >= 0 "
+            "GROUP BY c.thread_id, c.checkpoint_ns HAVING COUNT(*) >= ?",
+            (min_tail,)
+        ).fetchall()
+        compacted = 0
+        for thread_id, ns, seq in candidates:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                messages = self._load_messages(conn, thread_id, ns, seq)
+                if messages is not None:
+                    self._compact_thread(conn, thread_id, ns, seq, messages)
+                    compacted += 1
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return compacted
+
+    # -- async -------------------------------------------------------------
+    # BEGIN IMMEDIATE can wait up to the 10 s busy timeout on a locked file,
+    # so the async API runs the SQLite calls in a worker thread.
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
@@ -0,0 +1,278 @@
+"""
+Local intent classifier for the AutoStream AI Agent.
+
+Runs before the LLM classifier in classify_intent. It combines compiled
+keyword/regex lexicons with a small logistic regression over hashed character
+n-grams and returns an intent together with a confidence score. Messages
+above the confidence threshold are classified without an LLM call.
+Messages that negate a purchase ("I don't want to subscribe", "not ready to
+buy yet") are never confident and always go to the LLM.
+
+Thresholds can be tuned offline against labelled examples:
+    python -m agent.classifier tune labelled.jsonl
+where each line is {"text": "...", "intent": "greeting|inquiry|high_intent"}.
+"""
+import argparse
+import json
+import re
+import threading
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+INTENTS = ("greeting", "inquiry", "high_intent")
+
+DEFAULT_THRESHOLD = 0.85
+
+# (intent, compiled pattern, weight). A match pulls the prediction towards
+# that intent with the given weight.
+LEXICON: List[Tuple[str, "re.Pattern[str]", float]] = [
+    ("greeting", re.compile(
+        r"^\s*(hi+|hello+|hey+|hiya|yo|howdy|greetings|sup|what'?s up|good (morning|afternoon|evening))"
+        r"[\s,!.]*(there|team|all|everyone|autostream)?[\s!.]*$", re.I), 0.97),
+    ("greeting", re.compile(r"^\s*(hi|hello|hey)\b", re.I), 0.3),
+    ("high_intent", re.compile(
+        r"\b(sign (me )?up|signup|subscribe|purchase|buy|get started|upgrade|"
+        r"start (a |my )?(free )?trial|try (it|autostream|the (basic|pro)( plan)?)|"
+        r"i('d| would) like to (try|buy|get|start|sign|subscribe)|i want (to (try|buy|get|start|sign|subscribe)|the (basic|pro))|"
+        r"ready to (buy|subscribe|sign up|start|get started|upgrade|purchase)|let'?s do (it|this)|count me in)\b", re.I), 0.9),
+    ("high_intent", re.compile(r"\bmy (youtube|instagram|tiktok|twitch|facebook) (channel|account|page)\b", re.I), 0.6),
+    ("inquiry", re.compile(
+        r"\b(price|pricing|cost|how much|plans?|refunds?|support|features?|4k|captions?|"
+        r"resolution|difference|platforms?|policy|cancel|videos? per month|what is|what's)\b", re.I), 0.8),
+    ("inquiry", re.compile(r"\?\s*$"), 0.3),
+]
+
+# A negation up to three words before a purchase verb. Such messages skip the
+# high_intent lexicon and are left to the LLM.
+NEGATION = re.compile(
+    r"\b(not|never|don['’]?t|doesn['’]?t|won['’]?t|wouldn['’]?t|can['’]?t|cannot|isn['’]?t|aren['’]?t)"
+    r"(\s+\S+){0,3}?\s+(sign(ing)?|signup|subscrib(e|ing)|purchas(e|ing)|buy(ing)?|get(ting)?|"
+    r"start(ing)?|try(ing)?|upgrad(e|ing)|ready|interested|want|need|pay(ing)?)\b"
+    r"|\bno thanks\b|\bnot (yet|now|right now|today)\b",
+    re.I
+)
+
+# Share of the model's probabilities kept for a negated message; the rest is
+# spread evenly, so its confidence stays below 0.5 (the lowest tuned threshold)
+NEGATION_SHRINK = 0.2
+
+# Seed training data for the n-gram model. Extend it with fit().
+SEED_EXAMPLES: List[Tuple[str, str]] = [
+    ("hi", "greeting"), ("hello", "greeting"), ("hey there", "greeting"),
+    ("hi!", "greeting"), ("good morning", "greeting"), ("what's up", "greeting"),
+    ("hello team", "greeting"), ("hey autostream", "greeting"), ("yo", "greeting"),
+    ("hiya", "greeting"), ("good evening everyone", "greeting"), ("howdy", "greeting"),
+    ("how much is the pro plan", "inquiry"), ("what does the basic plan include", "inquiry"),
+    ("can i get a refund", "inquiry"), ("what is your refund policy", "inquiry"),
+    ("do you support 4k", "inquiry"), ("what platforms do you support", "inquiry"),
+    ("what's the difference between basic and pro", "inquiry"), ("tell me about pricing", "inquiry"),
+    ("is support available 24/7", "inquiry"), ("how many videos per month", "inquiry"),
+    ("do you have ai captions", "inquiry"), ("what is autostream", "inquiry"),
+    ("what features do you offer", "inquiry"), ("how do i cancel", "inquiry"),
+    ("i want to sign up", "high_intent"), ("sign me up for pro", "high_intent"),
+    ("i'd like to try the pro plan", "high_intent"), ("let's do it", "high_intent"),
+    ("i want to buy the pro plan", "high_intent"), ("how do i get started", "high_intent"),
+    ("i'm ready to subscribe", "high_intent"), ("i want to try it for my youtube channel", "high_intent"),
+    ("count me in", "high_intent"), ("i want the pro plan", "high_intent"),
+    ("upgrade me to pro", "high_intent"), ("start my free trial", "high_intent"),
+    # Negated purchase intent reads like high_intent n-grams but is not
+    ("i don't want to subscribe", "inquiry"), ("i'm not ready to buy yet", "inquiry"),
+    ("not interested in upgrading", "inquiry"), ("i won't sign up today", "inquiry"),
+    ("i never buy subscriptions", "inquiry"), ("no thanks, just looking", "inquiry"),
+    # "ready to" without a purchase verb asks for information
+    ("i'm ready to learn more", "inquiry"), ("ready to see a demo", "inquiry"),
+    ("i'm ready to hear about the plans", "inquiry"), ("ready to know more about the features", "inquiry"),
+]
+
+
+@dataclass
+class ClassifierStats:
+    """Counters for the local classification fast path."""
+    total: int = 0
+    bypassed: int = 0
+    by_intent: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def llm_calls(self) -> int:
+        return self.total - self.bypassed
+
+    @property
+    def bypass_rate(self) -> float:
+        return self.bypassed / self.total if self.total else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "total": self.total,
+            "bypassed": self.bypassed,
+            "llm_calls": self.llm_calls,
+            "bypass_rate": round(self.bypass_rate, 4),
+            "by_intent": dict(self.by_intent),
+        }
+
+
+def _ngram_features(text: str, dim: int, n_range: Tuple[int, int] = (2, 4)) -> np.ndarray:
+    """Hash the character n-grams of a text into an L2-normalized vector."""
+    vec = np.zeros(dim, dtype=np.float32)
+    padded = f" {' '.join(text.lower().split())} "
+    for n in range(n_range[0], n_range[1] + 1):
+        for i in range(len(padded) - n + 1):
+            vec[zlib.crc32(padded[i:i + n].encode("utf-8")) % dim] += 1.0
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+class FastIntentClassifier:
+    """
+    Deterministic lexicon + character n-gram intent classifier.
+
+    Args:
+        threshold: Minimum confidence to accept a prediction without the LLM
+        dim: Size of the hashed n-gram feature space
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, dim: int = 4096):
+        self.threshold = threshold
+        self.dim = dim
+        self.stats = ClassifierStats()
+        self._weights: Optional[np.ndarray] = None
+        self._bias: Optional[np.ndarray] = None
+        self._examples: List[Tuple[str, str]] = list(SEED_EXAMPLES)
+        self._lock = threading.Lock()
+
+    def fit(self, examples: Iterable[Tuple[str, str]] = (), epochs: int = 300, lr: float = 2.0) -> "FastIntentClassifier":
+        """
+        Train the n-gram model on the seed examples plus any extra examples.
+
+        Args:
+            examples: Additional (text, intent) pairs
+            epochs: Full-batch gradient descent iterations
+            lr: Learning rate
+        """
+        self._examples = list(SEED_EXAMPLES) + [(t, i) for t, i in examples if i in INTENTS]
+        X = np.stack([_ngram_features(text, self.dim) for text, _ in self._examples])
+        y = np.array([INTENTS.index(intent) for _, intent in self._examples])
+        Y = np.eye(len(INTENTS), dtype=np.float32)[y]
+
+        W = np.zeros((self.dim, len(INTENTS)), dtype=np.float32)
+        b = np.zeros(len(INTENTS), dtype=np.float32)
+        for _ in range(epochs):
+            P = self._softmax(X @ W + b)
+            grad = (P - Y) / len(X)
+            W -= lr * (X.T @ grad + 1e-4 * W)
+            b -= lr * grad.sum(axis=0)
+
+        self._weights, self._bias = W, b
+        return self
+
+    def predict_proba(self, text: str) -> np.ndarray:
+        """Return class probabilities in INTENTS order (flattened for negated purchases)."""
+        if self._weights is None:
+            with self._lock:
+                if self._weights is None:
+                    self.fit(self._examples[len(SEED_EXAMPLES):])
+
+        probs = self._softmax(_ngram_features(text, self.dim) @ self._weights + self._bias)
+        if NEGATION.search(text):
+            return NEGATION_SHRINK * probs + (1 - NEGATION_SHRINK) / len(INTENTS)
+
+        # Lexicon hits override the model in proportion to their weight
+        hits = np.zeros(len(INTENTS), dtype=np.float32)
+        for intent, pattern, weight in LEXICON:
+            if pattern.search(text):
+                idx = INTENTS.index(intent)
+                hits[idx] = max(hits[idx], weight)
+        if hits.any():
+            top = int(hits.argmax())
+            strength = hits[top] - np.sort(hits)[-2]
+            probs = (1 - strength) * probs
+            probs[top] += strength
+        return probs
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """Return (intent, confidence) for a message."""
+        probs = self.predict_proba(text)
+        idx = int(probs.argmax())
+        return INTENTS[idx], float(probs[idx])
+
+    def classify(self, text: str) -> Optional[str]:
+        """
+        Return the intent if confidence clears the threshold, else None.
+        Updates the bypass counters.
+        """
+        intent, confidence = self.predict(text)
+        self.stats.total += 1
+        if confidence < self.threshold:
+            return None
+        self.stats.bypassed += 1
+        self.stats.by_intent[intent] = self.stats.by_intent.get(intent, 0) + 1
+        return intent
+
+    @staticmethod
+    def _softmax(z: np.ndarray) -> np.ndarray:
+        z = z - z.max(axis=-1, keepdims=True)
+        e = np.exp(z)
+        return e / e.sum(axis=-1, keepdims=True)
+
+
+def evaluate(classifier: FastIntentClassifier, examples: List[Tuple[str, str]], thresholds: Iterable[float]) -> List[dict]:
+    """
+    Measure coverage (share of messages bypassing the LLM) and accuracy on
+    the bypassed messages for each candidate threshold.
+    """
+    predictions = [(classifier.predict(text), label) for text, label in examples]
+    results = []
+    for threshold in thresholds:
+        accepted = [(intent, label) for (intent, conf), label in predictions if conf >= threshold]
+        correct = sum(1 for intent, label in accepted if intent == label)
+        results.append({
+            "threshold": round(threshold, 3),
+            "coverage": round(len(accepted) / len(examples), 4) if examples else 0.0,
+            "accuracy": round(correct / len(accepted), 4) if accepted else 1.0,
+        })
+    return results
+
+
+def tune_threshold(classifier: FastIntentClassifier, examples: List[Tuple[str, str]], min_accuracy: float = 0.98) -> float:
+    """Return the lowest threshold whose bypassed accuracy meets min_accuracy."""
+    grid = [round(0.5 + 0.01 * i, 2) for i in range(50)]
+    for result in evaluate(classifier, examples, grid):
+        if result["accuracy"] >= min_accuracy:
+            return result["threshold"]
+    return 1.0
+
+
+def load_examples(path: str) -> List[Tuple[str, str]]:
+    """Load labelled examples from a JSONL file of {"text", "intent"} objects."""
+    examples = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                examples.append((row["text"], row["intent"]))
+    return examples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune the local intent classifier offline.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    tune = sub.add_parser("tune", help="Pick a confidence threshold from labelled examples")
+    tune.add_argument("examples", help="JSONL file with text/intent pairs")
+    tune.add_argument("--train", help="Optional JSONL file of extra training examples")
+    tune.add_argument("--min-accuracy", type=float, default=0.98)
+    args = parser.parse_args()
+
+    classifier = FastIntentClassifier()
+    classifier.fit(load_examples(args.train) if args.train else ())
+    examples = load_examples(args.examples)
+
+    for result in evaluate(classifier, examples, [0.6, 0.7, 0.8, 0.85, 0.9, 0.95]):
+        print(f"threshold={result['threshold']:.2f} coverage={result['coverage']:.2%} accuracy={result['accuracy']:.2%}")
+    print(f"\nRecommended threshold: {tune_threshold(classifier, examples, args.min_accuracy)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Conversation context management for the AutoStream AI Agent.
+
+Keeps the most recent messages verbatim and folds older ones into a rolling
+summary stored in ConversationState. The summary is only refreshed when the
+verbatim window overflows by a whole fold step, so most turns cost no extra
+LLM call. The history sent to each node is then trimmed to a token budget,
+using the per-message counts cached by agent.tokens.
+"""
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langgraph.constants import TAG_NOSTREAM
+
+from agent.metrics import SUMMARY_TAG, metrics
+from agent.resilience import LLMUnavailableError
+from agent.state import ConversationState
+from agent.tokens import count_tokens, message_tokens
+
+
+SUMMARY_PROMPT = """You maintain a running summary of a sales conversation between a user and the AutoStream assistant.
+Update the summary with the new messages. Keep facts the assistant may need later: what the user asked about, plans or
+features discussed, objections, and any name, email or platform they shared. Respond with the updated summary only,
+in at most 5 short sentences."""
+
+# History token budgets per node (prompt text outside the history is not counted)
+DEFAULT_BUDGETS = {
+    "greeting": 600,
+    "rag": 1500,
+}
+
+
+@dataclass
+class ContextStats:
+    """Counters for history tokens kept out of prompts."""
+    full_tokens: int = 0
+    sent_tokens: int = 0
+    summaries: int = 0
+    by_node: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.full_tokens - self.sent_tokens
+
+    def as_dict(self) -> dict:
+        return {
+            "full_tokens": self.full_tokens,
+            "sent_tokens": self.sent_tokens,
+            "tokens_saved": self.tokens_saved,
+            "summaries": self.summaries,
+            "tokens_saved_by_node": dict(self.by_node),
+        }
+
+
+class ContextManager:
+    """
+    Windows the conversation history and maintains the rolling summary.
+
+    Args:
+        window: Number of most recent messages always kept verbatim
+        fold_every: Summarize once this many messages have left the window
+        budgets: History token budget per node name
+    """
+
+    def __init__(self, window: int = 8, fold_every: int = 4, budgets: Optional[Dict[str, int]] = None):
+        self.window = window
+        self.fold_every = fold_every
+        self.budgets = {**DEFAULT_BUDGETS, **(budgets or {})}
+        self.stats = ContextStats()
+
+    def summary_request(self, state: ConversationState) -> Optional[tuple[list, int]]:
+        """
+        Return (prompt_messages, new_cursor) if the window overflowed and the
+        summary needs refreshing, otherwise None.
+        """
+        messages = state.get("messages", [])
+        cursor = state.get("summary_cursor", 0)
+        new_cursor = len(messages) - self.window
+        if new_cursor - cursor < self.fold_every:
+            return None
+
+        transcript = "\n".join(
+            f"{'User' if isinstance(msg, HumanMessage) else 'Assistant'}: {msg.content}"
+            for msg in messages[cursor:new_cursor]
+        )
+        prompt = [
+            SystemMessage(content=SUMMARY_PROMPT),
+            HumanMessage(content=f"Current summary:\n{state.get('summary') or '(none)'}\n\nNew messages:\n{transcript}")
+        ]
+        return prompt, new_cursor
+
+    def record_summary(self, state: ConversationState, summary: str, cursor: int) -> dict:
+        """Return the state update for a freshly generated summary."""
+        self.stats.summaries += 1
+        messages = state.get("messages", [])
+        folded = sum(message_tokens(msg) for msg in messages[state.get("summary_cursor", 0):cursor])
+        return {
+            "summary": summary.strip(),
+            "summary_cursor": cursor,
+            "summarized_tokens": state.get("summarized_tokens", 0) + folded
+        }
+
+    def history(self, state: ConversationState, node: str) -> tuple[str, List[BaseMessage]]:
+        """
+        Return (summary, messages) to send for a node: the messages not yet
+        folded into the summary, trimmed from the oldest end to the node's
+        budget. The latest message is always kept.
+        """
+        messages = state.get("messages", [])
+        summary = state.get("summary", "")
+        recent = messages[state.get("summary_cursor", 0):]
+
+        summary_tokens = count_tokens(summary) if summary else 0
+        budget = self.budgets.get(node, DEFAULT_BUDGETS["rag"]) - summary_tokens
+        kept: List[BaseMessage] = []
+        used = 0
+        for msg in reversed(recent):
+            tokens = message_tokens(msg)
+            if kept and used + tokens > budget:
+                break
+            kept.append(msg)
+            used += tokens
+        kept.reverse()
+
+        # Folded messages are counted once at fold time and the others once
+        # per message (cached on it), keeping this O(window) additions
+        full = state.get("summarized_tokens", 0) + sum(message_tokens(msg) for msg in recent)
+        sent = used + summary_tokens
+        self.stats.full_tokens += full
+        self.stats.sent_tokens += sent
+        self.stats.by_node[node] = self.stats.by_node.get(node, 0) + full - sent
+        return summary, kept
+
+
+def summary_note(summary: str) -> str:
+    """Format the rolling summary for inclusion in a system prompt."""
+    if not summary:
+        return ""
+    return f"\n\nSummary of the earlier conversation:\n{summary}"
+
+
+def refresh_summary(state: ConversationState, llm) -> dict:
+    """Fold overflowed messages into the summary if needed; return the state update."""
+    request = context_manager.summary_request(state)
+    if request is None:
+        return {}
+    prompt, cursor = request
+    try:
+        response = llm.invoke(prompt, config={"tags": [TAG_NOSTREAM, SUMMARY_TAG]})
+    except LLMUnavailableError:
+        return {}  # Keep the old summary; the next turn retries the fold
+    return context_manager.record_summary(state, response.content, cursor)
+
+
+async def arefresh_summary(state: ConversationState, llm) -> dict:
+    """Async variant of refresh_summary."""
+    request = context_manager.summary_request(state)
+    if request is None:
+        return {}
+    prompt, cursor = request
+    try:
+        response = await llm.ainvoke(prompt, config={"tags": [TAG_NOSTREAM, SUMMARY_TAG]})
+    except LLMUnavailableError:
+        return {}
+    return context_manager.record_summary(state, response.content, cursor)
+
+
+context_manager = ContextManager(
+    window=int(os.getenv("AUTOSTREAM_HISTORY_WINDOW", "8")),
+    fold_every=int(os.getenv("AUTOSTREAM_SUMMARY_EVERY", "4")),
+    budgets={
+        node: int(os.getenv(f"AUTOSTREAM_HISTORY_TOKENS_{node.upper()}", str(budget)))
+        for node, budget in DEFAULT_BUDGETS.items()
+    }
+)
+metrics.register_stats("context", lambda: context_manager.stats.as_dict())
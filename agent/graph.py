@@ -1,58 +1,140 @@
 """
 LangGraph workflow definition for the AutoStream AI Agent.
 """
-from typing import Literal
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Iterator, Literal, Optional
 from langgraph.graph import StateGraph, END
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import HumanMessage, AIMessage
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import HumanMessage, AIMessage, AIMessageChunk, SystemMessage
+from langchain_core.runnables import RunnableLambda
 
-from agent.state import ConversationState
-from agent.nodes.intent import intent_node
-from agent.nodes.rag import rag_node
-from agent.nodes.lead import lead_node
+from agent.metrics import metrics
+from agent.models import ModelConfig, ModelRouter
+from agent.resilience import LLMUnavailableError, ResilientLLM, resilient_llm_from_env, turn_scope
+from agent.speculation import Speculator, speculation_enabled
+from agent.state import ConversationState, SharedHistory
+from agent.tokens import token_accountant_from_env, usage_scope, wrap_node as count_node_tokens
+from agent.context import context_manager, summary_note, refresh_summary, arefresh_summary
+from agent.nodes.intent import intent_node, aintent_node, fallback_intent, predict_intent
+from agent.nodes.rag import rag_node, arag_node, fallback_response
+from agent.nodes.lead import lead_node, alead_node, fallback_lead_node
 
 
-def create_agent(api_key: str):
+GREETING_PROMPT = "You are a friendly sales assistant for AutoStream, a video editing SaaS for content creators. Respond warmly to greetings and offer to help with any questions about our product or pricing."
+
+EXTRACTION_MODES = ("combined", "two_call")
+
+DEFAULT_RESPONSE = "I'm here to help! What would you like to know about AutoStream?"
+
+# Used when the LLM is unavailable
+DEGRADED_GREETING = "Hi there, welcome to AutoStream! I can answer questions about our video editing plans and pricing, or help you get started. What would you like to know?"
+
+# Nodes whose LLM output is the user-facing response
+RESPONSE_NODES = frozenset({"greeting_response", "rag_response", "lead_qualification"})
+
+# Response node for each route of route_by_intent
+ROUTE_NODES = {
+    "greeting": "greeting_response",
+    "inquiry": "rag_response",
+    "high_intent": "lead_qualification",
+}
+
+
+def build_greeting_messages(state: ConversationState) -> list:
+    """Build the greeting prompt from the rolling summary and recent history."""
+    summary, messages = context_manager.history(state, "greeting")
+    # History messages are sent as-is so their cached token counts are reused
+    return [SystemMessage(content=GREETING_PROMPT + summary_note(summary))] + [
+        msg for msg in messages if isinstance(msg, (HumanMessage, AIMessage))
+    ]
+
+
+def create_agent(
+    api_key: str,
+    llm: Optional[BaseChatModel] = None,
+    extraction_mode: str = "combined",
+    checkpointer: Optional[BaseCheckpointSaver] = None,
+    resilient: Optional[bool] = None,
+    models: Optional[Dict[str, ModelConfig]] = None,
+    speculative: Optional[bool] = None
+):
     """
     Create and return the AutoStream agent graph.
     
     Args:
         api_key: Google API key for Gemini
+        llm: Optional chat model to use for every task instead of Gemini
+            (e.g. a fake for benchmarks)
+        extraction_mode: "combined" classifies intent and extracts lead fields in
+            one LLM call; "two_call" uses separate classification and extraction calls
+        checkpointer: Optional checkpoint saver (e.g. SQLiteCheckpointer) that
+            persists conversations by thread id; use run_thread with it
+        resilient: Wrap LLM calls in ResilientLLM (budget, retries, hedging,
+            circuit breaker) and answer with degraded local responses when the
+            LLM is unavailable; None follows AUTOSTREAM_LLM_RESILIENCE
+        models: Per-task Gemini model configs (see agent.models); defaults
+            to models_from_env(). Ignored when llm is given
+        speculative: Start the predicted response node in parallel with
+            LLM intent classification (see agent.speculation); None follows
+            AUTOSTREAM_SPECULATIVE
     
     Returns:
         Compiled LangGraph workflow
     """
-    # Initialize the LLM
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        google_api_key=api_key,
-        temperature=0.7
-    )
+    if extraction_mode not in EXTRACTION_MODES:
+        raise ValueError(f"extraction_mode must be one of {EXTRACTION_MODES}, got {extraction_mode!r}")
+    combined = extraction_mode == "combined"
+    
+    # Initialize the LLM: pooled per-task Gemini clients behind one router
+    if llm is None:
+        llm = ModelRouter.for_key(api_key, models)
+    # Inside the resilience layer, so retries and hedges are counted too
+    llm = token_accountant_from_env(llm)
+    if resilient is not False:
+        wrapped = resilient_llm_from_env(llm) if resilient is None else ResilientLLM(llm)
+        if wrapped is not None:
+            llm = wrapped
+            metrics.register_stats("llm_resilience", lambda: {
+                **wrapped.stats.as_dict(),
+                "circuit_open": int(wrapped.breaker.state != "closed"),
+            })
     
-    # Create node functions with LLM binding
+    # Create node functions with LLM binding. Each node has a sync and an
+    # async implementation so the graph serves both invoke() and ainvoke().
     def intent_classifier(state: ConversationState) -> dict:
-        return intent_node(state, llm)
+        return intent_node(state, llm, combined)
     
+    async def aintent_classifier(state: ConversationState) -> dict:
+        return await aintent_node(state, llm, combined)
+    
+    # Response nodes also emit their reply to the message channel.
     def rag_retriever(state: ConversationState) -> dict:
-        return rag_node(state, llm)
+        return with_reply(rag_node(state, llm))
+    
+    async def arag_retriever(state: ConversationState) -> dict:
+        return with_reply(await arag_node(state, llm))
     
     def lead_qualifier(state: ConversationState) -> dict:
-        return lead_node(state, llm)
+        return with_reply(lead_node(state, llm))
+    
+    async def alead_qualifier(state: ConversationState) -> dict:
+        return with_reply(await alead_node(state, llm))
     
     def greeting_responder(state: ConversationState) -> dict:
         """Generate a friendly greeting response."""
-        messages = state.get("messages", [])
-        context_messages = [
-            {"role": "system", "content": "You are a friendly sales assistant for AutoStream, a video editing SaaS for content creators. Respond warmly to greetings and offer to help with any questions about our product or pricing."},
-        ]
-        for msg in messages:
-            if isinstance(msg, HumanMessage):
-                context_messages.append({"role": "user", "content": msg.content})
-            elif isinstance(msg, AIMessage):
-                context_messages.append({"role": "assistant", "content": msg.content})
-        
-        response = llm.invoke(context_messages)
-        return {"response": response.content}
+        updates = refresh_summary(state, llm)
+        response = llm.invoke(build_greeting_messages({**state, **updates}))
+        return with_reply({"response": response.content, **updates})
+    
+    async def agreeting_responder(state: ConversationState) -> dict:
+        updates = await arefresh_summary(state, llm)
+        response = await llm.ainvoke(build_greeting_messages({**state, **updates}))
+        return with_reply({"response": response.content, **updates})
     
     # Define the routing function
     def route_by_intent(state: ConversationState) -> Literal["greeting", "inquiry", "high_intent"]:
@@ -75,10 +157,47 @@ def create_agent(api_key: str):
     workflow = StateGraph(ConversationState)
     
     # Add nodes
-    workflow.add_node("classify_intent", intent_classifier)
-    workflow.add_node("greeting_response", greeting_responder)
-    workflow.add_node("rag_response", rag_retriever)
-    workflow.add_node("lead_qualification", lead_qualifier)
+    # Degraded local responses for when the LLM is unavailable
+    fallbacks = {
+        "classify_intent": fallback_intent,
+        "greeting_response": lambda state: with_reply({"response": DEGRADED_GREETING}),
+        "rag_response": lambda state: with_reply({"response": fallback_response(state)}),
+        "lead_qualification": lambda state: with_reply(fallback_lead_node(state)),
+    }
+    nodes = {
+        "classify_intent": (intent_classifier, aintent_classifier),
+        "greeting_response": (greeting_responder, agreeting_responder),
+        "rag_response": (rag_retriever, arag_retriever),
+        "lead_qualification": (lead_qualifier, alead_qualifier),
+    }
+    nodes = {name: with_fallback(func, afunc, fallbacks[name], llm) for name, (func, afunc) in nodes.items()}
+    
+    speculator = None
+    if speculative is None:
+        speculative = speculation_enabled()
+    if speculative:
+        def predict_node(state: ConversationState) -> Optional[str]:
+            intent = predict_intent(state)
+            return None if intent is None else ROUTE_NODES[route_by_intent({**state, "intent": intent})]
+        
+        speculator = Speculator(
+            nodes["classify_intent"],
+            nodes,
+            predict_node,
+            lambda state: ROUTE_NODES[route_by_intent(state)]
+        )
+        nodes["classify_intent"] = (speculator.run, speculator.arun)
+        metrics.register_stats("speculation", lambda: speculator.stats.as_dict())
+    
+    for name, (func, afunc) in nodes.items():
+        func, afunc = metrics.wrap_node(name, *count_node_tokens(func, afunc))
+        workflow.add_node(name, RunnableLambda(func, afunc=afunc))
+    
+    def route_turn(state: ConversationState) -> str:
+        # A committed speculative reply already answered the turn
+        if speculator is not None and state.get("speculated"):
+            return "answered"
+        return route_by_intent(state)
     
     # Set entry point
     workflow.set_entry_point("classify_intent")
@@ -86,12 +205,8 @@ def create_agent(api_key: str):
     # Add conditional edges from intent classification
     workflow.add_conditional_edges(
         "classify_intent",
-        route_by_intent,
-        {
-            "greeting": "greeting_response",
-            "inquiry": "rag_response",
-            "high_intent": "lead_qualification"
-        }
+        route_turn,
+        {**ROUTE_NODES, "answered": END}
     )
     
     # All response nodes go to END
@@ -100,7 +215,128 @@ def create_agent(api_key: str):
     workflow.add_edge("lead_qualification", END)
     
     # Compile the graph
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
+
+
+_agents: Dict[tuple, object] = {}
+_agents_lock = threading.Lock()
+
+
+def _option_key(value):
+    try:
+        hash(value)
+    except TypeError:
+        # The cached agent references value, so its id is not reused
+        return ("id", id(value))
+    return value
+
+
+def get_agent(api_key: str, **options):
+    """
+    Return the compiled agent for api_key and create_agent options, building
+    it on first use. A compiled agent holds no conversation state, so one
+    instance serves every session in the process. Unhashable option values
+    (models dicts, chat models) are matched by identity.
+    """
+    key = (api_key, tuple(sorted((name, _option_key(value)) for name, value in options.items())))
+    with _agents_lock:
+        agent = _agents.get(key)
+        if agent is None:
+            agent = _agents[key] = create_agent(api_key, **options)
+        return agent
+
+
+class ConcurrencyLimiter:
+    """
+    Bounds the number of conversation turns in flight on one event loop.
+    
+    Args:
+        max_concurrent: Maximum turns running at once; others wait
+    """
+    
+    def __init__(self, max_concurrent: int = 100):
+        self.max_concurrent = max_concurrent
+        self.in_flight = 0
+        self.queued = 0
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+    
+    async def __aenter__(self):
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+        self.in_flight += 1
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+
+def _prepare_input(state: ConversationState, user_message: str) -> ConversationState:
+    """
+    Return the graph input for a turn: the state plus the new user message.
+    The caller's history is not modified, except for a SharedHistory, which
+    the new message is appended to in place (see append_messages).
+    """
+    messages = state.get("messages")
+    message = HumanMessage(content=user_message)
+    if isinstance(messages, SharedHistory):
+        messages.append(message)
+    else:
+        messages = [*(messages or ()), message]
+    return {
+        **state,
+        "messages": messages
+    }
+
+
+def _rollback_input(current_state: ConversationState) -> None:
+    """Undo _prepare_input's append to a SharedHistory when a turn fails."""
+    messages = current_state["messages"]
+    if isinstance(messages, SharedHistory) and messages and isinstance(messages[-1], HumanMessage):
+        messages.pop()
+
+
+def _finalize_turn(result: ConversationState) -> tuple[ConversationState, str]:
+    """Return the finished turn's state and response."""
+    response = result.get("response", DEFAULT_RESPONSE)
+    return result, response
+
+
+def with_fallback(func, afunc, fallback, llm) -> tuple:
+    """Return (func, afunc) that answer with fallback(state) when the LLM is unavailable."""
+    
+    def guarded(state: ConversationState) -> dict:
+        try:
+            return func(state)
+        except LLMUnavailableError:
+            if isinstance(llm, ResilientLLM):
+                llm.stats.degraded += 1
+            return fallback(state)
+    
+    async def aguarded(state: ConversationState) -> dict:
+        try:
+            return await afunc(state)
+        except LLMUnavailableError:
+            if isinstance(llm, ResilientLLM):
+                llm.stats.degraded += 1
+            return fallback(state)
+    
+    return guarded, aguarded
+
+
+@contextmanager
+def _turn(thread_id: Optional[str] = None):
+    """Scope one turn for metrics and the LLM latency and token budgets."""
+    with metrics.turn(thread_id), turn_scope(), usage_scope():
+        yield
+
+
+def with_reply(update: dict) -> dict:
+    """Add the response of a response node to the message channel as a delta."""
+    return {**update, "messages": [AIMessage(content=update.get("response") or DEFAULT_RESPONSE)]}
 
 
 def run_conversation(agent, state: ConversationState, user_message: str) -> tuple[ConversationState, str]:
@@ -115,22 +351,275 @@ def run_conversation(agent, state: ConversationState, user_message: str) -> tupl
     Returns:
         Tuple of (updated_state, agent_response)
     """
-    # Add user message to state
-    new_messages = state.get("messages", []).copy()
-    new_messages.append(HumanMessage(content=user_message))
+    current_state = _prepare_input(state, user_message)
+    try:
+        with _turn():
+            result = agent.invoke(current_state, _run_config())
+    except BaseException:
+        _rollback_input(current_state)
+        raise
+    return _finalize_turn(result)
+
+
+async def arun_conversation(
+    agent,
+    state: ConversationState,
+    user_message: str,
+    limiter: Optional[ConcurrencyLimiter] = None
+) -> tuple[ConversationState, str]:
+    """
+    Process a user message through the agent without blocking the event loop.
     
-    # Update state with new message
-    current_state = {
-        **state,
-        "messages": new_messages
-    }
+    Args:
+        agent: Compiled LangGraph agent
+        state: Current conversation state
+        user_message: User's input message
+        limiter: Optional limiter bounding concurrent turns
+    
+    Returns:
+        Tuple of (updated_state, agent_response)
+    """
+    current_state = _prepare_input(state, user_message)
+    try:
+        if limiter is None:
+            with _turn():
+                result = await agent.ainvoke(current_state, _run_config())
+        else:
+            async with limiter:
+                with _turn():
+                    result = await agent.ainvoke(current_state, _run_config())
+    except BaseException:
+        _rollback_input(current_state)
+        raise
+    return _finalize_turn(result)
+
+
+def _run_config(thread_id: Optional[str] = None) -> dict:
+    """
+    Config for one turn's graph run. The metrics callbacks are passed per run
+    (not bound to the model) so they join the handlers LangGraph adds, such
+    as the one producing stream_mode="messages" token chunks.
+    """
+    config = {"callbacks": metrics.callbacks()}
+    if thread_id is not None:
+        config["configurable"] = {"thread_id": thread_id}
+    return config
+
+
+def run_thread(agent, thread_id: str, user_message: str) -> tuple[ConversationState, str]:
+    """
+    Process a user message for a conversation persisted by the agent's
+    checkpointer. Only the new message is sent in; the history is loaded
+    from the checkpointer and one checkpoint is written when the turn ends.
     
-    # Run the agent
-    result = agent.invoke(current_state)
+    Args:
+        agent: Agent compiled with a checkpointer
+        thread_id: Conversation id
+        user_message: User's input message
+    
+    Returns:
+        Tuple of (updated_state, agent_response)
+    """
+    with _turn(thread_id):
+        result = agent.invoke(
+            {"messages": [HumanMessage(content=user_message)]},
+            _run_config(thread_id),
+            durability="exit"
+        )
+    return _finalize_turn(result)
+
+
+async def arun_thread(
+    agent,
+    thread_id: str,
+    user_message: str,
+    limiter: Optional[ConcurrencyLimiter] = None
+) -> tuple[ConversationState, str]:
+    """Async variant of run_thread."""
+    current_input = {"messages": [HumanMessage(content=user_message)]}
+    if limiter is None:
+        with _turn(thread_id):
+            result = await agent.ainvoke(current_input, _run_config(thread_id), durability="exit")
+    else:
+        async with limiter:
+            with _turn(thread_id):
+                result = await agent.ainvoke(current_input, _run_config(thread_id), durability="exit")
+    return _finalize_turn(result)
+
+
+@dataclass
+class StreamStats:
+    """Time-to-first-token statistics for streamed turns."""
+    turns: int = 0
+    total_ttft_ms: float = 0.0
+    max_ttft_ms: float = 0.0
+    last_ttft_ms: float = 0.0
     
-    # Get the response and add it to messages
-    response = result.get("response", "I'm here to help! What would you like to know about AutoStream?")
-    result["messages"] = result.get("messages", []).copy()
-    result["messages"].append(AIMessage(content=response))
+    @property
+    def mean_ttft_ms(self) -> float:
+        return self.total_ttft_ms / self.turns if self.turns else 0.0
     
-    return result, response
+    def record(self, ttft_ms: float) -> None:
+        self.turns += 1
+        self.total_ttft_ms += ttft_ms
+        self.max_ttft_ms = max(self.max_ttft_ms, ttft_ms)
+        self.last_ttft_ms = ttft_ms
+    
+    def as_dict(self) -> dict:
+        return {
+            "turns": self.turns,
+            "mean_ttft_ms": round(self.mean_ttft_ms, 2),
+            "max_ttft_ms": round(self.max_ttft_ms, 2),
+            "last_ttft_ms": round(self.last_ttft_ms, 2),
+        }
+
+
+stream_stats = StreamStats()
+metrics.register_stats("stream", lambda: stream_stats.as_dict())
+
+
+class _TurnStream:
+    """Shared bookkeeping for sync and async streamed turns."""
+    
+    def __init__(self, agent, state: Optional[ConversationState], user_message: str, thread_id: Optional[str] = None):
+        self.agent = agent
+        self.thread_id = thread_id
+        if thread_id is None:
+            self.input = _prepare_input(state, user_message)
+            self._options = {"config": _run_config()}
+        else:
+            # History comes from the agent's checkpointer (see run_thread)
+            self.input = {"messages": [HumanMessage(content=user_message)]}
+            self._options = {"config": _run_config(thread_id), "durability": "exit"}
+        self.state: Optional[ConversationState] = None
+        self.response: Optional[str] = None
+        self.ttft_ms: Optional[float] = None
+        self._start = 0.0
+        self._final: Optional[ConversationState] = None
+    
+    def _rollback(self) -> None:
+        if self.thread_id is None:
+            _rollback_input(self.input)
+    
+    def _token(self, mode: str, chunk) -> Optional[str]:
+        """Return the response token carried by a stream event, if any."""
+        if mode == "values":
+            self._final = chunk
+            return None
+        message, metadata = chunk
+        # Only LLM token chunks; the node's committed reply arrives as a full AIMessage
+        if not isinstance(message, AIMessageChunk) or metadata.get("langgraph_node") not in RESPONSE_NODES:
+            return None
+        text = message.text
+        if not text:
+            return None
+        if self.ttft_ms is None:
+            self.ttft_ms = (time.perf_counter() - self._start) * 1000
+        return text
+    
+    def _finish(self) -> Optional[str]:
+        """Commit the final state; return the whole response if nothing was streamed."""
+        self.state, self.response = _finalize_turn(self._final)
+        unstreamed = self.response if self.ttft_ms is None else None
+        if self.ttft_ms is None:
+            self.ttft_ms = (time.perf_counter() - self._start) * 1000
+        stream_stats.record(self.ttft_ms)
+        return unstreamed
+
+
+class ConversationStream(_TurnStream):
+    """
+    Iterates the response tokens of one turn. Once exhausted, .state holds
+    the updated conversation state and .response the full response.
+    """
+    
+    def __iter__(self) -> Iterator[str]:
+        self._start = time.perf_counter()
+        try:
+            with _turn(self.thread_id):
+                for mode, chunk in self.agent.stream(self.input, stream_mode=["messages", "values"], **self._options):
+                    token = self._token(mode, chunk)
+                    if token:
+                        yield token
+        except BaseException:
+            self._rollback()
+            raise
+        unstreamed = self._finish()
+        if unstreamed:
+            yield unstreamed
+
+
+class AsyncConversationStream(_TurnStream):
+    """Async variant of ConversationStream."""
+    
+    def __init__(
+        self,
+        agent,
+        state: Optional[ConversationState],
+        user_message: str,
+        limiter: Optional[ConcurrencyLimiter] = None,
+        thread_id: Optional[str] = None
+    ):
+        super().__init__(agent, state, user_message, thread_id)
+        self.limiter = limiter
+    
+    async def __aiter__(self) -> AsyncIterator[str]:
+        if self.limiter is not None:
+            await self.limiter.__aenter__()
+        try:
+            self._start = time.perf_counter()
+            with _turn(self.thread_id):
+                async for mode, chunk in self.agent.astream(self.input, stream_mode=["messages", "values"], **self._options):
+                    token = self._token(mode, chunk)
+                    if token:
+                        yield token
+        except BaseException:
+            self._rollback()
+            raise
+        finally:
+            if self.limiter is not None:
+                await self.limiter.__aexit__(None, None, None)
+        unstreamed = self._finish()
+        if unstreamed:
+            yield unstreamed
+
+
+def stream_conversation(agent, state: ConversationState, user_message: str) -> ConversationStream:
+    """
+    Process a user message through the agent, streaming the response.
+    
+    Args:
+        agent: Compiled LangGraph agent
+        state: Current conversation state
+        user_message: User's input message
+    
+    Returns:
+        ConversationStream yielding response tokens; read .state and
+        .response after iterating it
+    """
+    return ConversationStream(agent, state, user_message)
+
+
+def astream_conversation(
+    agent,
+    state: ConversationState,
+    user_message: str,
+    limiter: Optional[ConcurrencyLimiter] = None
+) -> AsyncConversationStream:
+    """Async variant of stream_conversation."""
+    return AsyncConversationStream(agent, state, user_message, limiter)
+
+
+def stream_thread(agent, thread_id: str, user_message: str) -> ConversationStream:
+    """Streaming variant of run_thread; read .state and .response after iterating."""
+    return ConversationStream(agent, None, user_message, thread_id=thread_id)
+
+
+def astream_thread(
+    agent,
+    thread_id: str,
+    user_message: str,
+    limiter: Optional[ConcurrencyLimiter] = None
+) -> AsyncConversationStream:
+    """Async variant of stream_thread."""
+    return AsyncConversationStream(agent, None, user_message, limiter, thread_id=thread_id)
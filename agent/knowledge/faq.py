@@ -0,0 +1,211 @@
+"""
+Direct FAQ answering for the AutoStream AI Agent.
+
+Questions that are (nearly) word for word one of the knowledge base FAQ
+entries are answered with the stored answer instead of an LLM call. Two
+lookups are tried in order:
+    exact   normalized question text (case, punctuation, apostrophes and
+            whitespace folded) in a hash map
+    fuzzy   Jaccard similarity of content-token sets (the retrieval
+            tokenizer: stopwords and plural 's' dropped) against the FAQ
+            questions, above a threshold; only for questions with at least
+            min_tokens content tokens, as one word ("autostream?") matches
+            any one-word FAQ question perfectly without asking it
+
+Fuzzy candidates come from a MinHash/LSH index: each question's token set
+gets a MinHash signature, split into bands that are hashed into buckets, so
+a lookup only scores the entries sharing a bucket with the query instead of
+every entry. Candidates are verified with the exact Jaccard similarity.
+"""
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional
+
+import numpy as np
+
+from agent.answer_cache import normalize_question
+from agent.knowledge.retrieval import tokenize
+
+
+_SHIFT = np.uint64(32)
+
+# Entries whose signatures are computed together while building
+BUILD_BATCH = 4096
+
+
+def faq_key(text: str) -> str:
+    """Exact-match key: normalize_question with apostrophes dropped (what's -> whats)."""
+    return normalize_question(text.replace("'", "").replace("’", ""))
+
+
+@dataclass(frozen=True)
+class FAQMatch:
+    """A matched FAQ entry."""
+    index: int
+    question: str
+    answer: str
+    score: float
+    kind: str  # "exact" or "fuzzy"
+
+
+@dataclass
+class FAQStats:
+    """Lookup counters and latency for an FAQ matcher."""
+    lookups: int = 0
+    exact: int = 0
+    fuzzy: int = 0
+    candidates: int = 0
+    total_us: float = 0.0
+
+    @property
+    def match_rate(self) -> float:
+        return (self.exact + self.fuzzy) / self.lookups if self.lookups else 0.0
+
+    @property
+    def mean_us(self) -> float:
+        return self.total_us / self.lookups if self.lookups else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "lookups": self.lookups,
+            "exact": self.exact,
+            "fuzzy": self.fuzzy,
+            "misses": self.lookups - self.exact - self.fuzzy,
+            "match_rate": round(self.match_rate, 4),
+            "mean_candidates": round(self.candidates / self.lookups, 2) if self.lookups else 0.0,
+            "mean_us": round(self.mean_us, 2),
+        }
+
+
+class FAQMatcher:
+    """
+    Exact and fuzzy matcher over FAQ entries ({"question", "answer"} dicts).
+
+    Args:
+        entries: FAQ entries
+        threshold: Minimum Jaccard similarity for a fuzzy match
+        min_tokens: Minimum content tokens in a question for a fuzzy match
+        num_perm: MinHash signature length
+        bands: LSH bands (num_perm must divide evenly); more bands find
+            lower-similarity candidates at the cost of more of them
+        stats: Counters to record into (shared across rebuilds)
+        seed: Seed for the MinHash permutations
+    """
+
+    def __init__(
+        self,
+        entries: List[dict],
+        threshold: float = 0.8,
+        min_tokens: int = 2,
+        num_perm: int = 64,
+        bands: int = 16,
+        stats: Optional[FAQStats] = None,
+        seed: int = 1
+    ):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.entries = entries
+        self.threshold = threshold
+        self.min_tokens = min_tokens
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.stats = stats if stats is not None else FAQStats()
+        self._lock = threading.Lock()
+
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hash functions ((a * x + b) mod 2^64) >> 32 stand in
+        # for random permutations of the 32-bit token hashes
+        self._a = rng.integers(1, 1 << 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+        # Odd multipliers folding a band's rows into one 64-bit bucket key,
+        # and a salt per band so equal rows in different bands differ
+        self._mix = rng.integers(1, 1 << 62, size=self.rows, dtype=np.uint64) | np.uint64(1)
+        self._salt = rng.integers(0, 1 << 62, size=bands, dtype=np.uint64)
+
+        self._exact: Dict[str, int] = {}
+        self._tokens: List[FrozenSet[str]] = []
+        for i, entry in enumerate(entries):
+            self._exact.setdefault(faq_key(entry["question"]), i)
+            self._tokens.append(frozenset(tokenize(entry["question"])))
+
+        # Buckets: all (band key, entry) pairs sorted by key; a bucket is the
+        # run of equal keys, found with searchsorted
+        keys, ids = [], []
+        for begin in range(0, len(entries), BUILD_BATCH):
+            batch = [i for i in range(begin, min(begin + BUILD_BATCH, len(entries))) if self._tokens[i]]
+            if batch:
+                keys.append(self._band_keys([self._tokens[i] for i in batch]).ravel())
+                ids.append(np.repeat(np.asarray(batch, dtype=np.int64), bands))
+        keys = np.concatenate(keys) if keys else np.zeros(0, dtype=np.uint64)
+        ids = np.concatenate(ids) if ids else np.zeros(0, dtype=np.int64)
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._ids = ids[order]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def signatures(self, token_sets: List[FrozenSet[str]]) -> np.ndarray:
+        """MinHash signatures, shape (len(token_sets), num_perm), of non-empty token sets."""
+        hashes = np.fromiter(
+            (zlib.crc32(t.encode("utf-8")) for tokens in token_sets for t in tokens),
+            dtype=np.uint64
+        )
+        offsets = np.cumsum([0] + [len(tokens) for tokens in token_sets[:-1]])
+        values = (self._a[:, None] * hashes[None, :] + self._b[:, None]) >> _SHIFT
+        return np.minimum.reduceat(values, offsets, axis=1).T
+
+    def _band_keys(self, token_sets: List[FrozenSet[str]]) -> np.ndarray:
+        """Bucket keys, shape (len(token_sets), bands)."""
+        signatures = self.signatures(token_sets).reshape(len(token_sets), self.bands, self.rows)
+        return (signatures * self._mix).sum(axis=2) ^ self._salt
+
+    def candidates(self, tokens: FrozenSet[str]) -> np.ndarray:
+        """Indexes of the entries sharing at least one LSH bucket with tokens."""
+        keys = self._band_keys([tokens])[0]
+        lo = np.searchsorted(self._keys, keys, side="left")
+        hi = np.searchsorted(self._keys, keys, side="right")
+        hits = [self._ids[l:h] for l, h in zip(lo, hi) if h > l]
+        if not hits:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate(hits))
+
+    def _lookup(self, text: str) -> tuple:
+        """Return (FAQMatch or None, number of fuzzy candidates scored)."""
+        index = self._exact.get(faq_key(text))
+        if index is not None:
+            entry = self.entries[index]
+            return FAQMatch(index, entry["question"], entry["answer"], 1.0, "exact"), 0
+
+        tokens = frozenset(tokenize(text))
+        if len(tokens) < max(self.min_tokens, 1):
+            return None, 0
+        candidates = self.candidates(tokens)
+        best, best_score = None, 0.0
+        for i in candidates.tolist():
+            other = self._tokens[i]
+            score = len(tokens & other) / len(tokens | other)
+            if score > best_score:
+                best, best_score = i, score
+        if best is None or best_score < self.threshold:
+            return None, len(candidates)
+        entry = self.entries[best]
+        return FAQMatch(best, entry["question"], entry["answer"], best_score, "fuzzy"), len(candidates)
+
+    def match(self, text: str) -> Optional[FAQMatch]:
+        """Return the FAQ entry the question matches, or None."""
+        start = time.perf_counter()
+        found, scored = self._lookup(text)
+        elapsed_us = (time.perf_counter() - start) * 1e6
+        with self._lock:
+            self.stats.lookups += 1
+            self.stats.candidates += scored
+            self.stats.total_us += elapsed_us
+            if found is not None:
+                if found.kind == "exact":
+                    self.stats.exact += 1
+                else:
+                    self.stats.fuzzy += 1
+        return found
@@ -0,0 +1,606 @@
+"""
+On-disk knowledge index for the AutoStream AI Agent.
+
+Ingests every knowledge file under a directory, one file at a time:
+    *.json       the AutoStream knowledge base schema (company, pricing,
+                 policies, faq; chunked like format_knowledge_base), or a
+                 list of articles / {"articles": [...]}
+    *.jsonl      one article per line
+    *.md, *.txt  split at headings, long sections split at paragraphs
+An article is a dict with a "title" (or "question") and a "body", "text",
+"content" or "answer".
+
+Chunks are embedded as feature-hashed term vectors (retrieval tokenizer,
+crc32 bucket, 1 + log tf, L2-normalized) and stored as an inverted index:
+for each hash bucket, the chunks containing it and their weights, highest
+weight first. A query sums idf-weighted query terms over the postings of
+its buckets, reading at most max_postings per term, so its cost is bounded
+by the query length rather than the corpus size.
+
+Layout of the index directory:
+    manifest.json   sidecar metadata: settings, current generation, and per
+                    file its content hash, mtime, size and chunk rows
+    <generation>/   offsets.npy, docs.npy, weights.npy, idf.npy (postings),
+                    records.bin + record_offsets.npy (chunk id, section and
+                    text as JSON, one record per chunk row)
+
+Every array is opened with mmap, so opening an index reads no index data
+and worker processes share its pages through the OS cache. Reindexing is
+incremental: a file whose mtime and size are unchanged is trusted, other
+files are re-hashed, and only files whose content hash is not in the
+current generation are parsed. Their rows are merged with the rows kept
+from the current generation into a new generation, and the manifest is
+swapped atomically; readers of the old generation keep their mappings. A
+lock file serializes rebuilds across processes.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from agent.knowledge.retrieval import Chunk, chunk_knowledge_base, tokenize
+
+try:
+    import fcntl
+except ImportError:  # Windows: rebuilds are not serialized across processes
+    fcntl = None
+
+
+FORMAT_VERSION = 1
+DEFAULT_DIM = 1 << 18
+MAX_CHUNK_CHARS = 800
+MAX_POSTINGS = 2048
+SOURCE_SUFFIXES = frozenset({".json", ".jsonl", ".md", ".markdown", ".txt"})
+
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*\S)\s*$")
+
+
+def file_hash(path: Path) -> str:
+    """Content hash of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:32]
+
+
+# -- ingestion ---------------------------------------------------------------
+
+def split_text(text: str, max_chars: int = MAX_CHUNK_CHARS) -> List[str]:
+    """Group paragraphs into pieces of at most max_chars (longer paragraphs are cut at spaces)."""
+    pieces, current = [], ""
+    for paragraph in (p.strip() for p in re.split(r"\n\s*\n", text)):
+        while len(paragraph) > max_chars:
+            cut = paragraph.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(paragraph[:cut])
+            paragraph = paragraph[cut:].strip()
+        if not paragraph:
+            continue
+        if current and len(current) + len(paragraph) + 2 > max_chars:
+            pieces.append(current)
+            current = ""
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def markdown_chunks(text: str, source: str, title: str, max_chars: int = MAX_CHUNK_CHARS) -> Iterator[Chunk]:
+    """Chunk a Markdown document by heading; the first level-1 heading is its title."""
+    sections: List[Tuple[str, List[str]]] = [("", [])]
+    titled = False
+    for line in text.splitlines():
+        heading = HEADING_PATTERN.match(line)
+        if heading:
+            if len(heading.group(1)) == 1 and not titled:
+                title, titled = heading.group(2), True
+                continue
+            sections.append((heading.group(2), []))
+        else:
+            sections[-1][1].append(line)
+    n = 0
+    for heading, lines in sections:
+        for piece in split_text("\n".join(lines), max_chars):
+            yield Chunk(id=f"{source}#{n}", section=title, text=f"{heading}\n{piece}" if heading else piece)
+            n += 1
+
+
+def article_chunks(article: dict, source: str, start: int, max_chars: int = MAX_CHUNK_CHARS) -> List[Chunk]:
+    """Chunk one article dict; chunk ids continue from start."""
+    title = article.get("title") or article.get("question") or Path(source).stem
+    body = article.get("body") or article.get("text") or article.get("content") or article.get("answer") or ""
+    section = article.get("section") or title
+    return [
+        Chunk(id=f"{source}#{start + n}", section=section, text=f"{title}\n{piece}")
+        for n, piece in enumerate(split_text(str(body), max_chars))
+    ]
+
+
+def iter_file_chunks(path: Path, source: str, max_chars: int = MAX_CHUNK_CHARS) -> Iterator[Chunk]:
+    """Yield the chunks of one knowledge file."""
+    suffix = path.suffix.lower()
+    if suffix in (".md", ".markdown", ".txt"):
+        yield from markdown_chunks(path.read_text(encoding="utf-8"), source, path.stem, max_chars)
+    elif suffix == ".jsonl":
+        n = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    chunks = article_chunks(json.loads(line), source, n, max_chars)
+                    n += len(chunks)
+                    yield from chunks
+    elif suffix == ".json":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict) and ("faq" in data or "pricing" in data):
+            yield from chunk_knowledge_base(data)
+            return
+        articles = data.get("articles", []) if isinstance(data, dict) else data
+        n = 0
+        for article in articles:
+            if isinstance(article, dict):
+                chunks = article_chunks(article, source, n, max_chars)
+                n += len(chunks)
+                yield from chunks
+
+
+class ParsedFile(NamedTuple):
+    """Chunk vectors of one file: postings (chunk row, bucket, weight) and JSON records."""
+    docs: np.ndarray
+    buckets: np.ndarray
+    weights: np.ndarray
+    records: List[bytes]
+
+
+def vectorize_chunks(chunks: List[Chunk], dim: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Hashed, sublinear-tf, L2-normalized term vectors of chunks as (chunk rows, buckets, weights)."""
+    hashes, rows = [], []
+    for row, chunk in enumerate(chunks):
+        tokens = tokenize(chunk.text)
+        hashes.extend(zlib.crc32(t.encode("utf-8")) for t in tokens)
+        rows.extend([row] * len(tokens))
+    keys = np.asarray(rows, dtype=np.int64) * dim + np.asarray(hashes, dtype=np.int64) % dim
+    keys, counts = np.unique(keys, return_counts=True)
+    docs = keys // dim
+    weights = 1.0 + np.log(counts)
+    norms = np.sqrt(np.bincount(docs, weights=weights * weights, minlength=len(chunks)))
+    weights = weights / norms[docs]
+    return docs.astype(np.int32), (keys % dim).astype(np.int32), weights.astype(np.float32)
+
+
+def posting_keys(buckets: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Sort keys ordering postings by bucket, then weight descending."""
+    keys = buckets.astype(np.int64)
+    keys <<= 32
+    # Positive float32 bit patterns sort like their values
+    keys |= np.uint32(0xFFFFFFFF) - np.asarray(weights, dtype=np.float32).view(np.uint32)
+    return keys
+
+
+# -- reading -----------------------------------------------------------------
+
+@dataclass
+class IndexStats:
+    """Build and search counters for a knowledge index."""
+    files: int = 0
+    chunks: int = 0
+    builds: int = 0
+    files_parsed: int = 0
+    files_reused: int = 0
+    last_build_ms: float = 0.0
+    searches: int = 0
+    total_search_us: float = 0.0
+
+    @property
+    def mean_search_us(self) -> float:
+        return self.total_search_us / self.searches if self.searches else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "files": self.files,
+            "chunks": self.chunks,
+            "builds": self.builds,
+            "files_parsed": self.files_parsed,
+            "files_reused": self.files_reused,
+            "last_build_ms": round(self.last_build_ms, 2),
+            "searches": self.searches,
+            "mean_search_us": round(self.mean_search_us, 2),
+        }
+
+
+class KnowledgeIndex:
+    """
+    Read-only view of one index generation, backed by memory-mapped arrays.
+
+    Args:
+        directory: The generation directory
+        manifest: The manifest naming that generation
+        max_postings: Postings read per query term (the highest weighted)
+        stats: Counters to record searches into
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        manifest: dict,
+        max_postings: int = MAX_POSTINGS,
+        stats: Optional[IndexStats] = None
+    ):
+        self.directory = Path(directory)
+        self.generation = manifest["generation"]
+        self.version = manifest["version"]
+        self.dim = manifest["dim"]
+        self.max_postings = max_postings
+        self.stats = stats if stats is not None else IndexStats()
+        self.offsets = np.load(self.directory / "offsets.npy", mmap_mode="r")
+        self.docs = np.load(self.directory / "docs.npy", mmap_mode="r")
+        self.weights = np.load(self.directory / "weights.npy", mmap_mode="r")
+        self.idf = np.load(self.directory / "idf.npy", mmap_mode="r")
+        self.record_offsets = np.load(self.directory / "record_offsets.npy", mmap_mode="r")
+        records = self.directory / "records.bin"
+        self.records = (
+            np.memmap(records, dtype=np.uint8, mode="r") if records.stat().st_size else np.zeros(0, dtype=np.uint8)
+        )
+
+    def __len__(self) -> int:
+        return len(self.record_offsets) - 1
+
+    def record(self, row: int) -> bytes:
+        return self.records[self.record_offsets[row]:self.record_offsets[row + 1]].tobytes()
+
+    def chunk(self, row: int) -> Chunk:
+        record = json.loads(self.record(row))
+        return Chunk(id=record["id"], section=record["section"], text=record["text"])
+
+    def scores(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(chunk rows, scores) of the chunks sharing a term with the query."""
+        tokens = tokenize(query)
+        if not tokens or not len(self):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+        buckets, counts = np.unique(
+            np.fromiter((zlib.crc32(t.encode("utf-8")) for t in tokens), dtype=np.int64, count=len(tokens)) % self.dim,
+            return_counts=True
+        )
+        query_weights = (1.0 + np.log(counts)) * self.idf[buckets]
+        spans = [
+            (int(lo), min(int(hi), int(lo) + self.max_postings))
+            for lo, hi in zip(self.offsets[buckets], self.offsets[buckets + 1])
+        ]
+        lengths = [hi - lo for lo, hi in spans]
+        if not sum(lengths):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+        docs = np.concatenate([self.docs[lo:hi] for lo, hi in spans])
+        weights = np.concatenate([self.weights[lo:hi] for lo, hi in spans]) * np.repeat(query_weights, lengths)
+        # Sum per chunk over the postings read only
+        rows, inverse = np.unique(docs, return_inverse=True)
+        return rows, np.bincount(inverse, weights=weights)
+
+    def search(self, query: str, k: int = 4) -> List[Tuple[Chunk, float]]:
+        """Return up to k (chunk, score) pairs with a positive score, best first."""
+        start = time.perf_counter()
+        rows, scores = self.scores(query)
+        k = min(k, len(rows))
+        results = []
+        if k > 0:
+            top = np.argpartition(-scores, k - 1)[:k]
+            # Ties go to the earlier chunk, as in BM25Index.search
+            top = top[np.lexsort((rows[top], -scores[top]))]
+            results = [(self.chunk(int(rows[i])), float(scores[i])) for i in top if scores[i] > 0]
+        self.stats.searches += 1
+        self.stats.total_search_us += (time.perf_counter() - start) * 1e6
+        return results
+
+
+# -- building ----------------------------------------------------------------
+
+class KnowledgeIndexer:
+    """
+    Keeps an on-disk KnowledgeIndex of a knowledge directory up to date.
+
+    Args:
+        sources: Directory of knowledge files (searched recursively; hidden
+            files and directories are skipped)
+        index_dir: Directory holding the index
+        dim: Number of feature hash buckets
+        max_chunk_chars: Maximum characters per document chunk
+        max_postings: Postings read per query term
+        check_interval: Minimum seconds between scans for changed files
+    """
+
+    def __init__(
+        self,
+        sources: Path,
+        index_dir: Path,
+        dim: int = DEFAULT_DIM,
+        max_chunk_chars: int = MAX_CHUNK_CHARS,
+        max_postings: int = MAX_POSTINGS,
+        check_interval: float = 30.0
+    ):
+        self.sources = Path(sources)
+        self.index_dir = Path(index_dir)
+        self.dim = dim
+        self.max_chunk_chars = max_chunk_chars
+        self.max_postings = max_postings
+        self.check_interval = check_interval
+        self.stats = IndexStats()
+        self._index: Optional[KnowledgeIndex] = None
+        self._manifest_cache: tuple = (None, None)
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    # -- public ------------------------------------------------------------
+
+    def get(self) -> KnowledgeIndex:
+        """Return the current index, rescanning the sources at most every check_interval seconds."""
+        index = self._index
+        if index is not None and time.monotonic() - self._last_check < self.check_interval:
+            return index
+        with self._lock:
+            if self._index is None or time.monotonic() - self._last_check >= self.check_interval:
+                self._index = self.update()
+                self._last_check = time.monotonic()
+            return self._index
+
+    def update(self) -> KnowledgeIndex:
+        """Bring the index up to date with the source files and return it."""
+        files = self._scan()
+        manifest = self._read_manifest()
+        if manifest is None or not self._unchanged(manifest, files):
+            with self._file_lock():
+                # Another process may have rebuilt while we waited
+                manifest = self._read_manifest()
+                if manifest is None or not self._unchanged(manifest, files):
+                    manifest = self._rebuild(manifest, files)
+        self.stats.files = len(manifest["files"])
+        self.stats.chunks = manifest["chunks"]
+        return self._open(manifest)
+
+    # -- internals ---------------------------------------------------------
+
+    def _settings(self) -> dict:
+        return {"format": FORMAT_VERSION, "dim": self.dim, "max_chunk_chars": self.max_chunk_chars}
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        """Relative path -> (mtime_ns, size) of every source file."""
+        files = {}
+        prefix = len(str(self.sources)) + 1
+        index_dir = self.index_dir.resolve()
+        stack = [str(self.sources)]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.name.startswith("."):
+                        continue
+                    if entry.is_dir():
+                        if Path(entry.path).resolve() != index_dir:
+                            stack.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in SOURCE_SUFFIXES:
+                        st = entry.stat()
+                        files[entry.path[prefix:].replace(os.sep, "/")] = (st.st_mtime_ns, st.st_size)
+        return dict(sorted(files.items()))
+
+    def _read_manifest(self) -> Optional[dict]:
+        path = self.index_dir / "manifest.json"
+        try:
+            st = path.stat()
+            stamp, manifest = self._manifest_cache
+            if stamp != (st.st_mtime_ns, st.st_size):
+                with open(path, "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+                self._manifest_cache = ((st.st_mtime_ns, st.st_size), manifest)
+        except (OSError, ValueError):
+            return None
+        if any(manifest.get(key) != value for key, value in self._settings().items()):
+            return None  # Built with other settings: rebuild from scratch
+        return manifest
+
+    @staticmethod
+    def _unchanged(manifest: dict, files: Dict[str, Tuple[int, int]]) -> bool:
+        known = manifest["files"]
+        return known.keys() == files.keys() and all(
+            known[name]["mtime_ns"] == mtime_ns and known[name]["size"] == size
+            for name, (mtime_ns, size) in files.items()
+        )
+
+    def _file_lock(self):
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        return _FileLock(self.index_dir / ".lock")
+
+    def _open(self, manifest: dict) -> KnowledgeIndex:
+        current = self._index
+        if current is not None and current.generation == manifest["generation"]:
+            return current
+        return KnowledgeIndex(self.index_dir / manifest["generation"], manifest, self.max_postings, self.stats)
+
+    def _parse(self, name: str) -> ParsedFile:
+        chunks = list(iter_file_chunks(self.sources / name, name, self.max_chunk_chars))
+        docs, buckets, weights = vectorize_chunks(chunks, self.dim)
+        records = [
+            json.dumps({"id": c.id, "section": c.section, "text": c.text}, ensure_ascii=False).encode("utf-8")
+            for c in chunks
+        ]
+        return ParsedFile(docs, buckets, weights, records)
+
+    def _rebuild(self, manifest: Optional[dict], files: Dict[str, Tuple[int, int]]) -> dict:
+        start = time.perf_counter()
+        known = manifest["files"] if manifest is not None else {}
+        previous = None
+        if manifest is not None:
+            try:
+                previous = self._open(manifest)
+            except OSError:
+                known = {}  # Generation missing or damaged: parse everything
+        rows_by_hash = {entry["hash"]: entry for entry in known.values()}
+
+        entries, segments = {}, []
+        for name, (mtime_ns, size) in files.items():
+            old = known.get(name)
+            if old is not None and old["mtime_ns"] == mtime_ns and old["size"] == size:
+                content_hash = old["hash"]
+            else:
+                content_hash = file_hash(self.sources / name)
+            # Rows of the current generation can be moved to one place only
+            reused = rows_by_hash.pop(content_hash, None)
+            if reused is not None:
+                segments.append(reused)
+                self.stats.files_reused += 1
+            else:
+                segments.append(self._parse(name))
+                self.stats.files_parsed += 1
+            entries[name] = {"hash": content_hash, "mtime_ns": mtime_ns, "size": size}
+
+        version = hashlib.sha256(
+            json.dumps([(name, entry["hash"]) for name, entry in entries.items()]).encode("utf-8")
+        ).hexdigest()[:16]
+        if manifest is not None and previous is not None and manifest["version"] == version:
+            # Same contents at the same paths (only timestamps moved): keep the rows
+            for name, entry in entries.items():
+                entry.update(start=known[name]["start"], chunks=known[name]["chunks"])
+            manifest = {**manifest, "files": entries}
+        else:
+            generation = f"g{time.time_ns():x}"
+            self._merge(previous, entries, segments, self.index_dir / generation)
+            manifest = {**self._settings(), "generation": generation, "version": version, "files": entries}
+        manifest["chunks"] = sum(entry["chunks"] for entry in entries.values())
+        self._write_manifest(manifest)
+        self._collect_garbage(manifest["generation"])
+        self.stats.builds += 1
+        self.stats.last_build_ms = (time.perf_counter() - start) * 1000
+        return manifest
+
+    def _merge(
+        self,
+        previous: Optional[KnowledgeIndex],
+        entries: Dict[str, dict],
+        segments: list,
+        directory: Path
+    ) -> None:
+        """Write a generation from rows kept from previous and newly parsed files."""
+        tmp = directory.with_name(directory.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        # Previous generation row -> new row (-1: dropped)
+        remap = np.full(len(previous) if previous is not None else 0, -1, dtype=np.int64)
+        docs, buckets, weights = [], [], []
+        record_offsets = [np.zeros(1, dtype=np.int64)]
+        run = None  # (first previous row, first new row, count) of consecutive kept rows
+        n = 0
+        with open(tmp / "records.bin", "wb") as out:
+
+            def copy_run():
+                first, start, count = run
+                remap[first:first + count] = np.arange(start, start + count)
+                bounds = previous.record_offsets[first:first + count + 1]
+                record_offsets.append(record_offsets[-1][-1] + (bounds[1:] - bounds[0]))
+                out.write(previous.records[bounds[0]:bounds[-1]].tobytes())
+
+            for entry, segment in zip(entries.values(), segments):
+                entry["start"] = n
+                if isinstance(segment, ParsedFile):
+                    if run is not None:
+                        copy_run()
+                        run = None
+                    count = len(segment.records)
+                    docs.append(segment.docs + n)
+                    buckets.append(segment.buckets)
+                    weights.append(segment.weights)
+                    sizes = np.fromiter((len(r) for r in segment.records), dtype=np.int64, count=count)
+                    record_offsets.append(record_offsets[-1][-1] + np.cumsum(sizes))
+                    out.write(b"".join(segment.records))
+                else:
+                    count, first = segment["chunks"], segment["start"]
+                    if run is not None and run[0] + run[2] == first:
+                        run = (run[0], run[1], run[2] + count)
+                    else:
+                        if run is not None:
+                            copy_run()
+                        run = (first, n, count)
+                entry["chunks"] = count
+                n += count
+            if run is not None:
+                copy_run()
+
+        docs = np.concatenate(docs) if docs else np.zeros(0, dtype=np.int32)
+        buckets = np.concatenate(buckets) if buckets else np.zeros(0, dtype=np.int32)
+        weights = np.concatenate(weights) if weights else np.zeros(0, dtype=np.float32)
+        keys = posting_keys(buckets, weights)
+        order = np.argsort(keys, kind="stable")
+        docs, buckets, weights, keys = docs[order], buckets[order], weights[order], keys[order]
+        if previous is not None and (remap >= 0).any():
+            # Kept postings are already in order: insert the new ones among them
+            kept = remap[previous.docs]
+            keep = kept >= 0
+            kept_buckets = np.repeat(np.arange(previous.dim, dtype=np.int32), np.diff(previous.offsets))[keep]
+            kept_weights = np.asarray(previous.weights)[keep]
+            at = np.searchsorted(posting_keys(kept_buckets, kept_weights), keys, side="right")
+            docs = np.insert(kept[keep].astype(np.int32), at, docs)
+            buckets = np.insert(kept_buckets, at, buckets)
+            weights = np.insert(kept_weights, at, weights)
+        df = np.bincount(buckets, minlength=self.dim)
+        np.save(tmp / "offsets.npy", np.concatenate(([0], np.cumsum(df))).astype(np.int64))
+        np.save(tmp / "docs.npy", docs.astype(np.int32))
+        np.save(tmp / "weights.npy", weights.astype(np.float32))
+        np.save(tmp / "idf.npy", np.log1p((n - df + 0.5) / (df + 0.5)).astype(np.float32))
+        np.save(tmp / "record_offsets.npy", np.concatenate(record_offsets))
+        os.replace(tmp, directory)
+
+    def _write_manifest(self, manifest: dict) -> None:
+        tmp = self.index_dir / "manifest.json.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, self.index_dir / "manifest.json")
+
+    def _collect_garbage(self, generation: str) -> None:
+        """Remove generations other than the current one (open mappings stay valid)."""
+        for path in self.index_dir.iterdir():
+            if path.is_dir() and path.name.startswith("g") and path.name != generation:
+                shutil.rmtree(path, ignore_errors=True)
+
+
+class _FileLock:
+    """Exclusive lock on a file, held across processes while rebuilding."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, "a+")
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+
+
+def knowledge_indexer_from_env(default_sources: Path) -> Optional[KnowledgeIndexer]:
+    """
+    Build the indexer configured by AUTOSTREAM_KNOWLEDGE_DIR (default
+    default_sources) and AUTOSTREAM_KNOWLEDGE_INDEX (default <dir>/.index;
+    "off" returns None).
+    """
+    index_dir = os.getenv("AUTOSTREAM_KNOWLEDGE_INDEX", "")
+    if index_dir == "off":
+        return None
+    sources = Path(os.getenv("AUTOSTREAM_KNOWLEDGE_DIR", str(default_sources)))
+    return KnowledgeIndexer(
+        sources,
+        Path(index_dir) if index_dir else sources / ".index",
+        check_interval=float(os.getenv("AUTOSTREAM_KNOWLEDGE_CHECK_SECONDS", "30"))
+    )
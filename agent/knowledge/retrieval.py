@@ -0,0 +1,188 @@
+"""
+Lexical top-k retrieval over the AutoStream knowledge base.
+
+The knowledge base is split into small self-contained chunks (company info,
+one per pricing plan, one per policy, one per FAQ entry) and indexed with
+BM25. Postings are stored as flat NumPy arrays so a query is scored with a
+single bincount instead of a Python loop over documents.
+"""
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+SECTION_ORDER = ("COMPANY", "PRICING", "POLICIES", "FAQ")
+
+STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for",
+    "from", "how", "i", "if", "in", "is", "it", "me", "my", "of", "on", "or",
+    "the", "to", "what", "whats", "with", "you", "your", "we", "our", "there",
+    "this", "that", "about", "tell", "please",
+})
+
+
+@dataclass(frozen=True)
+class Chunk:
+    """A retrievable piece of the knowledge base."""
+    id: str
+    section: str
+    text: str
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, split on non-alphanumerics, drop stopwords and plural 's'."""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def chunk_knowledge_base(kb: dict) -> List[Chunk]:
+    """
+    Split the knowledge base into chunks formatted like format_knowledge_base.
+
+    The overview and pricing chunks come first; they double as the fallback
+    context when a query matches nothing.
+    """
+    chunks = [
+        Chunk(
+            id="company",
+            section="COMPANY",
+            text=f"Company: {kb['company']}\nDescription: {kb['tagline']}"
+        )
+    ]
+
+    for plan_key, plan in kb.get("pricing", {}).items():
+        lines = [f"{plan['name']}: {plan['price']}"]
+        lines.extend(f"  - {feature}" for feature in plan["features"])
+        chunks.append(Chunk(id=f"pricing:{plan_key}", section="PRICING", text="\n".join(lines)))
+
+    policies = kb.get("policies", {})
+    if "refund" in policies:
+        chunks.append(Chunk(id="policy:refund", section="POLICIES", text=f"Refund Policy: {policies['refund']}"))
+    for plan_key, support in policies.get("support", {}).items():
+        chunks.append(Chunk(
+            id=f"policy:support:{plan_key}",
+            section="POLICIES",
+            text=f"{plan_key.title()} Plan Support: {support}"
+        ))
+
+    for i, faq in enumerate(kb.get("faq", [])):
+        chunks.append(Chunk(id=f"faq:{i}", section="FAQ", text=f"Q: {faq['question']}\nA: {faq['answer']}"))
+
+    return chunks
+
+
+class BM25Index:
+    """
+    BM25 index over a list of chunks.
+
+    Args:
+        chunks: Chunks to index
+        k1: Term frequency saturation
+        b: Document length normalization
+    """
+
+    def __init__(self, chunks: List[Chunk], k1: float = 1.5, b: float = 0.75):
+        self.chunks = chunks
+        self.vocab: Dict[str, int] = {}
+
+        term_ids: List[int] = []
+        doc_ids: List[int] = []
+        tfs: List[int] = []
+        doc_lengths = np.zeros(len(chunks), dtype=np.float32)
+
+        for doc_id, chunk in enumerate(chunks):
+            tokens = tokenize(chunk.text)
+            doc_lengths[doc_id] = len(tokens)
+            counts: Dict[int, int] = {}
+            for token in tokens:
+                term_id = self.vocab.setdefault(token, len(self.vocab))
+                counts[term_id] = counts.get(term_id, 0) + 1
+            for term_id, tf in counts.items():
+                term_ids.append(term_id)
+                doc_ids.append(doc_id)
+                tfs.append(tf)
+
+        n_docs = max(len(chunks), 1)
+        avg_length = float(doc_lengths.mean()) if len(chunks) else 1.0
+
+        # Sort postings by term so each term's postings are a contiguous slice
+        term_arr = np.asarray(term_ids, dtype=np.int64)
+        order = np.argsort(term_arr, kind="stable")
+        term_arr = term_arr[order]
+        self._doc_ids = np.asarray(doc_ids, dtype=np.int64)[order]
+        tf_arr = np.asarray(tfs, dtype=np.float32)[order]
+
+        df = np.bincount(term_arr, minlength=len(self.vocab)).astype(np.float32)
+        self._offsets = np.concatenate(([0], np.cumsum(df))).astype(np.int64)
+        self._idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+        # Precompute the length-normalized tf part of BM25 per posting
+        norm = k1 * (1 - b + b * doc_lengths[self._doc_ids] / max(avg_length, 1e-9))
+        self._weights = tf_arr * (k1 + 1) / (tf_arr + norm)
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def scores(self, query: str) -> np.ndarray:
+        """Return the BM25 score of every chunk for the query."""
+        term_ids = [self.vocab[t] for t in set(tokenize(query)) if t in self.vocab]
+        if not term_ids:
+            return np.zeros(len(self.chunks), dtype=np.float32)
+
+        slices = [np.arange(self._offsets[t], self._offsets[t + 1]) for t in term_ids]
+        postings = np.concatenate(slices)
+        idf = np.repeat(self._idf[term_ids], [len(s) for s in slices])
+        return np.bincount(
+            self._doc_ids[postings],
+            weights=self._weights[postings] * idf,
+            minlength=len(self.chunks)
+        ).astype(np.float32)
+
+    def search(self, query: str, k: int = 4) -> List[Tuple[Chunk, float]]:
+        """Return up to k (chunk, score) pairs with a positive score, best first."""
+        scores = self.scores(query)
+        k = min(k, len(self.chunks))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.chunks[i], float(scores[i])) for i in top if scores[i] > 0]
+
+
+def select_within_budget(chunks: List[Chunk], char_budget: int) -> List[Chunk]:
+    """Keep chunks in order until the character budget is spent."""
+    selected = []
+    used = 0
+    for chunk in chunks:
+        if used + len(chunk.text) > char_budget and selected:
+            break
+        selected.append(chunk)
+        used += len(chunk.text) + 1
+    return selected
+
+
+def format_chunks(chunks: List[Chunk]) -> str:
+    """Format retrieved chunks grouped under their section headers."""
+    rank = {section: i for i, section in enumerate(SECTION_ORDER)}
+    ordered = sorted(chunks, key=lambda c: rank.get(c.section, len(rank)))
+
+    lines = []
+    current_section = None
+    for chunk in ordered:
+        if chunk.section != current_section:
+            if current_section is not None:
+                lines.append("")
+            lines.append(f"{chunk.section}:")
+            current_section = chunk.section
+        lines.extend(f"  {line}" for line in chunk.text.split("\n"))
+    return "\n".join(lines)
@@ -0,0 +1,104 @@
+"""
+Knowledge base snapshot cache for the AutoStream AI Agent.
+
+Parses the knowledge base once and keeps the parsed data together with its
+formatted prompt text. The file is only re-read when its mtime/size changes,
+and only re-parsed when its content hash changes.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+
+@dataclass(frozen=True)
+class KnowledgeSnapshot:
+    """An immutable, consistent view of the knowledge base."""
+    data: dict
+    text: str
+    version: str
+    mtime_ns: int
+    size: int
+
+
+class KnowledgeBaseCache:
+    """
+    Caches a knowledge base file as a KnowledgeSnapshot.
+
+    Readers always get a whole snapshot: a reload builds a new snapshot and
+    swaps the reference in one assignment, so concurrent sessions never see
+    data from one version and text from another.
+
+    Args:
+        path: Path to the knowledge base JSON file
+        formatter: Callable turning the parsed dict into prompt text
+        check_interval: Minimum seconds between stat() calls on the file
+    """
+
+    def __init__(self, path: Path, formatter: Callable[[dict], str], check_interval: float = 1.0):
+        self.path = Path(path)
+        self.formatter = formatter
+        self.check_interval = check_interval
+        self._snapshot: Optional[KnowledgeSnapshot] = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> KnowledgeSnapshot:
+        """Return the current snapshot, reloading it if the file changed."""
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is not None and now - self._last_check < self.check_interval:
+            return snapshot
+
+        stat = os.stat(self.path)
+        if snapshot is not None and stat.st_mtime_ns == snapshot.mtime_ns and stat.st_size == snapshot.size:
+            self._last_check = now
+            return snapshot
+
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock
+            snapshot = self._snapshot
+            if snapshot is not None and stat.st_mtime_ns == snapshot.mtime_ns and stat.st_size == snapshot.size:
+                self._last_check = now
+                return snapshot
+            self._snapshot = self._load(snapshot)
+            self._last_check = now
+            return self._snapshot
+
+    @property
+    def version(self) -> str:
+        """Version id of the current snapshot (a content hash prefix)."""
+        return self.get().version
+
+    def invalidate(self) -> None:
+        """Force the next get() to stat the file again."""
+        self._last_check = 0.0
+
+    def _load(self, previous: Optional[KnowledgeSnapshot]) -> KnowledgeSnapshot:
+        stat = os.stat(self.path)
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        version = hashlib.sha256(raw).hexdigest()[:16]
+
+        # Touched but unchanged: keep the parsed data and formatted text
+        if previous is not None and previous.version == version:
+            return KnowledgeSnapshot(
+                data=previous.data,
+                text=previous.text,
+                version=version,
+                mtime_ns=stat.st_mtime_ns,
+                size=stat.st_size
+            )
+
+        data = json.loads(raw.decode("utf-8"))
+        return KnowledgeSnapshot(
+            data=data,
+            text=self.formatter(data),
+            version=version,
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size
+        )
@@ -1,10 +1,22 @@
 """
 CLI entry point for the AutoStream AI Agent.
+
+The agent (LangGraph, LangChain and the Gemini client library) is loaded in
+a background thread while the welcome banner waits for the first message,
+so the prompt appears without paying the import time.
 """
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from agent.graph import create_agent, run_conversation
-from agent.state import ConversationState
+
+
+def load_agent(api_key: str):
+    """Import and build the agent and the client library its first call needs."""
+    from agent.graph import get_agent
+    from agent.models import chat_model_class
+    agent = get_agent(api_key)
+    chat_model_class()
+    return agent
 
 
 def main():
@@ -19,18 +31,11 @@ def main():
         print("  GOOGLE_API_KEY=your_key_here")
         return
     
-    # Create the agent
-    print("Initializing AutoStream AI Agent...")
-    agent = create_agent(api_key)
-    
-    # Initialize state
-    state: ConversationState = {
-        "messages": [],
-        "intent": "unknown",
-        "lead_info": {},
-        "lead_captured": False,
-        "response": ""
-    }
+    # Load the agent while the user types
+    loader = ThreadPoolExecutor(max_workers=1)
+    pending = loader.submit(load_agent, api_key)
+    loader.shutdown(wait=False)
+    agent = state = None
     
     print("\n" + "="*50)
     print("Welcome to AutoStream!")
@@ -50,9 +55,20 @@ def main():
                 print("\nThanks for chatting with AutoStream! Goodbye!")
                 break
             
-            # Run the conversation
-            state, response = run_conversation(agent, state, user_input)
-            print(f"\nAutoStream: {response}\n")
+            if agent is None:
+                # Waits only if the first message came before loading finished
+                agent = pending.result()
+                from agent.graph import stream_conversation
+                from agent.state import new_conversation_state
+                state = new_conversation_state()
+            
+            # Run the conversation, printing the response as it streams
+            print("\nAutoStream: ", end="", flush=True)
+            stream = stream_conversation(agent, state, user_input)
+            for token in stream:
+                print(token, end="", flush=True)
+            print("\n")
+            state = stream.state
             
         except KeyboardInterrupt:
             print("\n\nGoodbye!")
@@ -0,0 +1,366 @@
+"""
+Instrumentation for the AutoStream AI Agent.
+
+Records per-node and per-task LLM call latency histograms (with the model
+that served each task), LLM call and token counters (from the model's
+usage metadata) and LLM bypasses: node runs that
+finished without calling the LLM thanks to a fast path or cache. Component
+counters (answer cache, intent fast path, context, streaming, lead sink)
+are registered with register_stats and exported alongside.
+
+Export formats:
+    metrics.prometheus()   Prometheus text exposition format
+    metrics.as_dict()      JSON-serializable snapshot
+    per turn               one JSON record per turn (plus fields added with
+                           annotate_turn), kept as metrics.last_turn and
+                           appended to AUTOSTREAM_METRICS_LOG if set
+
+AUTOSTREAM_METRICS=off disables recording: nodes are not wrapped, no
+callback is passed to graph runs and turn() is a shared no-op context.
+"""
+import bisect
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+# Histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# LLM calls made with this tag are counted under the "summary" task
+SUMMARY_TAG = "summary"
+
+# The task each graph node's LLM calls serve (see agent.models)
+NODE_TASKS = {
+    "classify_intent": "intent",
+    "lead_qualification": "extraction",
+    "greeting_response": "greeting",
+    "rag_response": "rag",
+}
+
+
+def llm_task(tags: Optional[list], metadata: Optional[dict]) -> str:
+    """Name of the task an LLM call serves, from its graph node or the summary tag."""
+    if tags and SUMMARY_TAG in tags:
+        return SUMMARY_TAG
+    node = (metadata or {}).get("langgraph_node", "none")
+    return NODE_TASKS.get(node, node)
+
+
+def llm_model(metadata: Optional[dict]) -> str:
+    """Name of the model serving an LLM call, from the model's tracing metadata."""
+    metadata = metadata or {}
+    return metadata.get("ls_model_name") or metadata.get("ls_provider", "unknown")
+
+
+_current_turn: contextvars.ContextVar[Optional["TurnRecord"]] = contextvars.ContextVar("autostream_turn", default=None)
+_NO_TURN = nullcontext()
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram (not locked; callers hold the registry lock)."""
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation (seconds)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.sum * 1000 / self.count, 3) if self.count else 0.0,
+            "p50_ms_le": self.quantile(0.5) * 1000,
+            "p95_ms_le": self.quantile(0.95) * 1000,
+            "p99_ms_le": self.quantile(0.99) * 1000,
+        }
+
+
+class TurnRecord:
+    """What happened during one conversation turn."""
+
+    __slots__ = ("thread_id", "start", "nodes", "llm_calls", "extra")
+
+    def __init__(self, thread_id: Optional[str] = None):
+        self.thread_id = thread_id
+        self.start = time.perf_counter()
+        self.nodes: List[tuple] = []  # (node, seconds)
+        self.llm_calls: List[dict] = []
+        self.extra: Dict[str, object] = {}  # Fields added by annotate_turn
+
+    def as_dict(self, turn_seconds: float) -> dict:
+        called = {call["node"] for call in self.llm_calls}
+        return {
+            "thread_id": self.thread_id,
+            "turn_ms": round(turn_seconds * 1000, 3),
+            "nodes": [{"node": node, "ms": round(seconds * 1000, 3)} for node, seconds in self.nodes],
+            "llm_calls": self.llm_calls,
+            "llm_bypassed": [node for node, _ in self.nodes if node not in called],
+            "prompt_tokens": sum(call["prompt_tokens"] for call in self.llm_calls),
+            "completion_tokens": sum(call["completion_tokens"] for call in self.llm_calls),
+            **self.extra,
+        }
+
+
+class MetricsCallback(BaseCallbackHandler):
+    """Times chat model calls and reads their token usage."""
+
+    run_inline = True  # Record in the calling thread, not an executor
+
+    def __init__(self, registry: "Metrics"):
+        self.registry = registry
+        self._starts: Dict[UUID, tuple] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, tags=None, metadata=None, **kwargs) -> None:
+        node = (metadata or {}).get("langgraph_node", "none")
+        task = llm_task(tags, metadata)
+        self._starts[run_id] = (time.perf_counter(), node, task, llm_model(metadata))
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs) -> None:
+        started = self._starts.pop(run_id, None)
+        if started is None:
+            return
+        start, node, task, model = started
+        prompt_tokens = completion_tokens = 0
+        try:
+            usage = response.generations[0][0].message.usage_metadata or {}
+            prompt_tokens = usage.get("input_tokens", 0)
+            completion_tokens = usage.get("output_tokens", 0)
+        except (AttributeError, IndexError):
+            pass
+        self.registry.record_llm(node, task, model, time.perf_counter() - start, prompt_tokens, completion_tokens)
+
+    def on_llm_error(self, error, *, run_id: UUID, **kwargs) -> None:
+        started = self._starts.pop(run_id, None)
+        if started is not None:
+            self.registry.record_llm_error(started[2])
+
+
+class Metrics:
+    """
+    Process-wide metrics registry.
+
+    Args:
+        enabled: Record metrics; when False every hook is a no-op
+        log_path: Optional JSONL file each turn record is appended to
+    """
+
+    def __init__(self, enabled: bool = True, log_path: Optional[str] = None):
+        self.enabled = enabled
+        self.log_path = log_path
+        self.last_turn: Optional[dict] = None
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Callable[[], Optional[dict]]] = {}
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.turns = Histogram()
+            self.nodes: Dict[str, Histogram] = {}
+            self.llm: Dict[str, Histogram] = {}
+            self.llm_errors: Dict[str, int] = {}
+            self.llm_models: Dict[str, str] = {}  # task -> model that served its last call
+            self.tokens: Dict[tuple, int] = {}  # (task, "prompt" | "completion") -> count
+            self.bypassed: Dict[str, int] = {}
+
+    # -- recording ---------------------------------------------------------
+
+    def register_stats(self, name: str, provider: Callable[[], Optional[dict]]) -> None:
+        """Export a component's as_dict() counters under name."""
+        self._stats[name] = provider
+
+    def callbacks(self) -> list:
+        """Callbacks to pass in the config of a graph run (none when disabled)."""
+        return [MetricsCallback(self)] if self.enabled else []
+
+    def wrap_node(self, name: str, func: Callable, afunc: Callable) -> tuple:
+        """Return (func, afunc) timed under the node name; unchanged when disabled."""
+        if not self.enabled:
+            return func, afunc
+
+        def timed(state):
+            start = time.perf_counter()
+            try:
+                return func(state)
+            finally:
+                self.record_node(name, time.perf_counter() - start)
+
+        async def atimed(state):
+            start = time.perf_counter()
+            try:
+                return await afunc(state)
+            finally:
+                self.record_node(name, time.perf_counter() - start)
+
+        return timed, atimed
+
+    def record_node(self, node: str, seconds: float) -> None:
+        with self._lock:
+            self.nodes.setdefault(node, Histogram()).observe(seconds)
+        record = _current_turn.get()
+        if record is not None:
+            record.nodes.append((node, seconds))
+
+    def record_llm(self, node: str, task: str, model: str, seconds: float,
+                   prompt_tokens: int, completion_tokens: int) -> None:
+        with self._lock:
+            self.llm.setdefault(task, Histogram()).observe(seconds)
+            self.llm_models[task] = model
+            self.tokens[(task, "prompt")] = self.tokens.get((task, "prompt"), 0) + prompt_tokens
+            self.tokens[(task, "completion")] = self.tokens.get((task, "completion"), 0) + completion_tokens
+        record = _current_turn.get()
+        if record is not None:
+            record.llm_calls.append({
+                "node": node,
+                "task": task,
+                "model": model,
+                "ms": round(seconds * 1000, 3),
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+            })
+
+    def record_llm_error(self, task: str) -> None:
+        with self._lock:
+            self.llm_errors[task] = self.llm_errors.get(task, 0) + 1
+
+    def annotate_turn(self, **fields) -> None:
+        """Add fields to the current turn's record."""
+        record = _current_turn.get()
+        if record is not None:
+            record.extra.update(fields)
+
+    def turn(self, thread_id: Optional[str] = None):
+        """Context manager scoping one conversation turn."""
+        if not self.enabled:
+            return _NO_TURN
+        return self._turn(thread_id)
+
+    @contextmanager
+    def _turn(self, thread_id: Optional[str]):
+        record = TurnRecord(thread_id)
+        token = _current_turn.set(record)
+        try:
+            yield record
+        finally:
+            _current_turn.reset(token)
+            self._finish_turn(record)
+
+    def _finish_turn(self, record: TurnRecord) -> None:
+        seconds = time.perf_counter() - record.start
+        summary = record.as_dict(seconds)
+        with self._lock:
+            self.turns.observe(seconds)
+            for node in summary["llm_bypassed"]:
+                self.bypassed[node] = self.bypassed.get(node, 0) + 1
+        self.last_turn = summary
+        if self.log_path:
+            line = json.dumps(summary, ensure_ascii=False) + "\n"
+            with self._lock, open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+    # -- export ------------------------------------------------------------
+
+    def component_stats(self) -> Dict[str, Optional[dict]]:
+        return {name: provider() for name, provider in self._stats.items()}
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "turns": self.turns.as_dict(),
+                "nodes": {node: h.as_dict() for node, h in self.nodes.items()},
+                "llm": {
+                    task: {
+                        "model": self.llm_models.get(task),
+                        **h.as_dict(),
+                        "errors": self.llm_errors.get(task, 0),
+                        "prompt_tokens": self.tokens.get((task, "prompt"), 0),
+                        "completion_tokens": self.tokens.get((task, "completion"), 0),
+                    }
+                    for task, h in self.llm.items()
+                },
+                "llm_bypassed": dict(self.bypassed),
+                "components": self.component_stats(),
+            }
+
+    def prometheus(self, extra: Optional[Dict[str, Optional[dict]]] = None) -> str:
+        """Render all metrics in the Prometheus text format."""
+        lines: List[str] = []
+        with self._lock:
+            _histogram_lines(lines, "autostream_turn_seconds", "Conversation turn latency", {"": self.turns})
+            _histogram_lines(lines, "autostream_node_seconds", "Graph node latency", self.nodes, "node")
+            _histogram_lines(lines, "autostream_llm_seconds", "LLM call latency", self.llm, "task")
+            _counter_lines(lines, "autostream_llm_model_info", "Model serving each LLM task",
+                           {(("task", t), ("model", m)): 1 for t, m in self.llm_models.items()}, "gauge")
+            _counter_lines(lines, "autostream_llm_errors_total", "Failed LLM calls",
+                           {(("task", t),): n for t, n in self.llm_errors.items()})
+            _counter_lines(lines, "autostream_llm_tokens_total", "LLM tokens from usage metadata",
+                           {(("task", t), ("kind", k)): n for (t, k), n in self.tokens.items()})
+            _counter_lines(lines, "autostream_llm_bypassed_total", "Node runs that made no LLM call",
+                           {(("node", node),): n for node, n in self.bypassed.items()})
+        for group, values in {**self.component_stats(), **(extra or {})}.items():
+            for key, value in (values or {}).items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"autostream_{group}_{key}"
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(pairs: tuple) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+def _histogram_lines(lines: List[str], name: str, help_text: str, histograms: Dict[str, Histogram], label: str = "") -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for key, h in histograms.items():
+        base = ((label, key),) if label else ()
+        cumulative = 0
+        for bound, count in zip(h.buckets, h.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(base + (('le', repr(bound)),))} {cumulative}")
+        lines.append(f"{name}_bucket{_labels(base + (('le', '+Inf'),))} {h.count}")
+        lines.append(f"{name}_sum{_labels(base)} {h.sum}")
+        lines.append(f"{name}_count{_labels(base)} {h.count}")
+
+
+def _counter_lines(lines: List[str], name: str, help_text: str, values: Dict[tuple, int],
+                   metric_type: str = "counter") -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {metric_type}")
+    for pairs, value in values.items():
+        lines.append(f"{name}{_labels(pairs)} {value}")
+
+
+metrics = Metrics(
+    enabled=os.getenv("AUTOSTREAM_METRICS", "on") != "off",
+    log_path=os.getenv("AUTOSTREAM_METRICS_LOG") or None
+)
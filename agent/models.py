@@ -0,0 +1,194 @@
+"""
+Per-task model routing for the AutoStream AI Agent.
+
+Each LLM task gets its own client configuration:
+    intent      intent classification (and the combined intent+extraction call)
+    extraction  lead field extraction
+    greeting    greeting replies
+    rag         knowledge-base answers
+    summary     rolling conversation summaries
+
+Classification, extraction and summaries are deterministic and short, so
+they default to a small model at temperature 0 with a tight output cap;
+replies use the richer model. A task's config can be overridden with
+AUTOSTREAM_MODEL_<TASK>="model[:temperature[:max_output_tokens]]", e.g.
+AUTOSTREAM_MODEL_RAG=gemini-2.5-pro:0.5:2048.
+
+Clients are pooled by (api key, config), so agents built with the same key
+share their HTTP clients. A router's clients (and the Gemini client library,
+which is slow to import) are only created when their task is first called. ModelRouter exposes the chat model interface and
+dispatches every call to the client of the task it serves, read from the
+call's graph node (see agent.metrics.llm_task); node code is unchanged.
+"""
+import os
+import threading
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Tuple
+
+from langchain_core.runnables.config import ensure_config
+
+from agent.metrics import llm_task
+
+if TYPE_CHECKING:
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+
+@dataclass(frozen=True)
+class ModelConfig:
+    """
+    Client configuration for one task.
+
+    Args:
+        model: Gemini model name
+        temperature: Sampling temperature
+        max_output_tokens: Cap on generated tokens (None for the model default)
+        thinking_budget: Thinking tokens (0 disables thinking, None for the default)
+    """
+    model: str
+    temperature: float = 0.7
+    max_output_tokens: Optional[int] = None
+    thinking_budget: Optional[int] = None
+
+
+DEFAULT_MODELS: Dict[str, ModelConfig] = {
+    "intent": ModelConfig("gemini-2.5-flash-lite", temperature=0.0, max_output_tokens=48),
+    "extraction": ModelConfig("gemini-2.5-flash-lite", temperature=0.0, max_output_tokens=48),
+    "summary": ModelConfig("gemini-2.5-flash-lite", temperature=0.0, max_output_tokens=256),
+    "greeting": ModelConfig("gemini-2.5-flash", temperature=0.7, max_output_tokens=256, thinking_budget=0),
+    "rag": ModelConfig("gemini-2.5-flash", temperature=0.7, max_output_tokens=1024, thinking_budget=0),
+}
+
+# Task used for calls made outside any known node
+DEFAULT_TASK = "rag"
+
+
+def parse_model_spec(spec: str, base: ModelConfig) -> ModelConfig:
+    """Parse "model[:temperature[:max_output_tokens]]", keeping base for omitted fields."""
+    parts = spec.split(":")
+    config = base
+    model = parts[0].strip()
+    if model and model != base.model:
+        # Thinking settings are model-specific; use the new model's default
+        config = replace(base, model=model, thinking_budget=None)
+    if len(parts) > 1 and parts[1].strip():
+        config = replace(config, temperature=float(parts[1]))
+    if len(parts) > 2 and parts[2].strip():
+        config = replace(config, max_output_tokens=int(parts[2]))
+    return config
+
+
+def models_from_env() -> Dict[str, ModelConfig]:
+    """Task configs from DEFAULT_MODELS with AUTOSTREAM_MODEL_<TASK> overrides applied."""
+    models = dict(DEFAULT_MODELS)
+    for task, config in DEFAULT_MODELS.items():
+        spec = os.getenv(f"AUTOSTREAM_MODEL_{task.upper()}")
+        if spec:
+            models[task] = parse_model_spec(spec, config)
+    return models
+
+
+def chat_model_class() -> type:
+    """Import and return ChatGoogleGenerativeAI (deferred: the import takes ~0.3 s)."""
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI
+
+
+_pool: Dict[Tuple[str, ModelConfig], "ChatGoogleGenerativeAI"] = {}
+_pool_lock = threading.Lock()
+
+
+def get_client(api_key: str, config: ModelConfig) -> "ChatGoogleGenerativeAI":
+    """Return the pooled client for (api_key, config), creating it on first use."""
+    key = (api_key, config)
+    with _pool_lock:
+        client = _pool.get(key)
+        if client is None:
+            ChatGoogleGenerativeAI = chat_model_class()
+            kwargs = {}
+            if config.max_output_tokens is not None:
+                kwargs["max_output_tokens"] = config.max_output_tokens
+            if config.thinking_budget is not None:
+                kwargs["thinking_budget"] = config.thinking_budget
+            client = ChatGoogleGenerativeAI(
+                model=config.model,
+                google_api_key=api_key,
+                temperature=config.temperature,
+                **kwargs
+            )
+            _pool[key] = client
+        return client
+
+
+class DeferredClient:
+    """
+    Chat model created by factory on first use; exposes the model's
+    interface by delegation.
+    """
+
+    def __init__(self, factory: Callable[[], object]):
+        self.factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Return the client, creating it if needed."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self.factory()
+        return self._client
+
+    def with_config(self, **kwargs) -> "DeferredClient":
+        return DeferredClient(lambda: self.get().with_config(**kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+
+class ModelRouter:
+    """
+    Chat-model facade that sends each call to its task's client.
+
+    Args:
+        clients: Task name -> chat model (or runnable)
+        default: Task whose client serves calls from unknown tasks
+    """
+
+    def __init__(self, clients: Dict[str, object], default: str = DEFAULT_TASK):
+        if default not in clients:
+            raise ValueError(f"no client for the default task {default!r}")
+        self.clients = clients
+        self.default = default
+
+    @classmethod
+    def for_key(cls, api_key: str, models: Optional[Dict[str, ModelConfig]] = None) -> "ModelRouter":
+        """Router over pooled Gemini clients for api_key, created on first use."""
+        models = models or models_from_env()
+        return cls({
+            task: DeferredClient(lambda config=config: get_client(api_key, config))
+            for task, config in models.items()
+        })
+
+    def with_config(self, **kwargs) -> "ModelRouter":
+        """Bind config (e.g. callbacks) to every task's client."""
+        return ModelRouter(
+            {task: client.with_config(**kwargs) for task, client in self.clients.items()},
+            self.default
+        )
+
+    def client_for(self, config: Optional[dict]):
+        merged = ensure_config(config)
+        task = llm_task(merged.get("tags"), merged.get("metadata"))
+        return self.clients.get(task) or self.clients[self.default]
+
+    def invoke(self, input, config: Optional[dict] = None, **kwargs):
+        return self.client_for(config).invoke(input, config, **kwargs)
+
+    async def ainvoke(self, input, config: Optional[dict] = None, **kwargs):
+        return await self.client_for(config).ainvoke(input, config, **kwargs)
+
+    def stream(self, input, config: Optional[dict] = None, **kwargs):
+        return self.client_for(config).stream(input, config, **kwargs)
+
+    def astream(self, input, config: Optional[dict] = None, **kwargs):
+        return self.client_for(config).astream(input, config, **kwargs)
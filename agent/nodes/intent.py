@@ -1,20 +1,56 @@
 """
 Intent classification node for the AutoStream AI Agent.
 """
-from langchain_google_genai import ChatGoogleGenerativeAI
+import os
+from typing import TYPE_CHECKING, Optional
 from langchain_core.messages import HumanMessage, SystemMessage
 from agent.state import ConversationState
+from agent.metrics import metrics
+from agent.classifier import FastIntentClassifier, DEFAULT_THRESHOLD, INTENTS
+from agent.nodes.lead import parse_extraction, missing_llm_fields
 
+if TYPE_CHECKING:
+    from langchain_google_genai import ChatGoogleGenerativeAI
 
-def classify_intent(state: ConversationState, llm: ChatGoogleGenerativeAI) -> str:
+
+# Local classifier tried before the LLM; confident predictions skip llm.invoke
+fast_classifier = FastIntentClassifier(
+    threshold=float(os.getenv("AUTOSTREAM_INTENT_THRESHOLD", DEFAULT_THRESHOLD))
+)
+metrics.register_stats("intent_fast_path", lambda: fast_classifier.stats.as_dict())
+
+
+SYSTEM_PROMPT = """You are an intent classifier for AutoStream, a video editing SaaS.
+Classify the user's message into exactly one of these categories:
+- greeting: Casual greetings like hi, hello, hey, what's up
+- inquiry: Questions about pricing, features, plans, refunds, support, or the product
+- high_intent: User shows interest in signing up, trying, buying, subscribing, or mentions their platform (YouTube, Instagram, etc.)
+
+Respond with ONLY the category name, nothing else."""
+
+COMBINED_PROMPT = """You are an intent classifier and lead extractor for AutoStream, a video editing SaaS.
+Classify the user's LATEST message into exactly one of these categories:
+- greeting: Casual greetings like hi, hello, hey, what's up
+- inquiry: Questions about pricing, features, plans, refunds, support, or the product
+- high_intent: User shows interest in signing up, trying, buying, subscribing, or mentions their platform (YouTube, Instagram, etc.)
+
+Also extract the following from any of the user's messages if mentioned:
+- name: The person's name
+- platform: Their content platform (YouTube, Instagram, TikTok, etc.)
+
+Respond in this exact format (use null if not found):
+intent: [category name]
+name: [extracted name or null]
+platform: [extracted platform or null]
+
+Only extract information that is clearly stated. Do not guess."""
+
+
+def local_intent(state: ConversationState) -> Optional[str]:
     """
-    Classify the user's intent based on their latest message.
+    Classify the intent without the LLM when possible.
     
-    Returns one of:
-    - 'greeting': Casual hello/hi
-    - 'inquiry': Product or pricing questions
-    - 'high_intent': Ready to sign up/try the product
-    - 'unknown': Cannot determine intent
+    Returns the intent, or None if the LLM classifier is needed.
     """
     messages = state.get("messages", [])
     if not messages:
@@ -35,33 +71,185 @@ def classify_intent(state: ConversationState, llm: ChatGoogleGenerativeAI) -> st
         if not (has_name and has_email and has_platform):
             return "high_intent"  # Continue lead collection
     
-    system_prompt = """You are an intent classifier for AutoStream, a video editing SaaS.
-Classify the user's message into exactly one of these categories:
-- greeting: Casual greetings like hi, hello, hey, what's up
-- inquiry: Questions about pricing, features, plans, refunds, support, or the product
-- high_intent: User shows interest in signing up, trying, buying, subscribing, or mentions their platform (YouTube, Instagram, etc.)
+    # Zero-LLM fast path for confidently classified messages
+    return fast_classifier.classify(last_message)
 
-Respond with ONLY the category name, nothing else."""
 
-    classification_messages = [
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=f"Classify this message: {last_message}")
-    ]
+# Weight given to the previous turn's intent when predicting the next one
+PREVIOUS_INTENT_PRIOR = float(os.getenv("AUTOSTREAM_SPECULATION_PRIOR", "0.2"))
+
+
+def predict_intent(state: ConversationState) -> Optional[str]:
+    """
+    Guess the intent of a turn whose classification needs the LLM.
     
-    response = llm.invoke(classification_messages)
-    intent = response.content.strip().lower()
+    Combines the local classifier's probabilities with a prior on the
+    previous turn's intent (conversations tend to stay on topic). Returns
+    None when local_intent would classify the turn without the LLM, as
+    there is then no LLM round-trip to overlap. Fast-path counters are not
+    updated.
+    """
+    messages = state.get("messages", [])
+    if not messages:
+        return None
+    lead_info = state.get("lead_info", {})
+    if state.get("intent") == "high_intent" and not state.get("lead_captured", False):
+        if not all(lead_info.get(field) for field in ("name", "email", "platform")):
+            return None  # Lead collection continues (see local_intent)
     
-    # Validate the intent
+    probs = fast_classifier.predict_proba(messages[-1].content)
+    if probs.max() >= fast_classifier.threshold:
+        return None
+    previous = state.get("intent")
+    if previous in INTENTS:
+        probs = probs.copy()
+        probs[INTENTS.index(previous)] += PREVIOUS_INTENT_PRIOR
+    return INTENTS[int(probs.argmax())]
+
+
+def fallback_intent(state: ConversationState) -> dict:
+    """
+    Classify without the LLM when it is unavailable: the local fast path,
+    else the local classifier's best guess regardless of confidence.
+    """
+    intent = local_intent(state)
+    if intent is None:
+        intent, _ = fast_classifier.predict(state["messages"][-1].content)
+    return {"intent": intent}
+
+
+def build_classification_messages(state: ConversationState) -> list:
+    """Build the LLM classification prompt for the latest message."""
+    last_message = state["messages"][-1].content
+    return [
+        SystemMessage(content=SYSTEM_PROMPT),
+        HumanMessage(content=f"Classify this message: {last_message}")
+    ]
+
+
+def parse_intent(text: str) -> str:
+    """Validate the LLM's classification, mapping anything else to 'unknown'."""
+    intent = text.strip().lower()
     valid_intents = ["greeting", "inquiry", "high_intent"]
     if intent not in valid_intents:
         return "unknown"
-    
     return intent
 
 
-def intent_node(state: ConversationState, llm: ChatGoogleGenerativeAI) -> dict:
+# Earlier user messages (since the last lead extraction) included in the
+# combined prompt for name/platform extraction
+EXTRACTION_WINDOW = int(os.getenv("AUTOSTREAM_EXTRACTION_WINDOW", "4"))
+
+
+def build_combined_messages(state: ConversationState) -> list:
+    """
+    Build the single-call classification + lead extraction prompt.
+    
+    The intent is classified on the latest message alone. Up to
+    EXTRACTION_WINDOW earlier user messages since the last lead extraction
+    are added for name/platform extraction only, and none once both are known.
+    """
+    messages = state["messages"]
+    parts = []
+    if EXTRACTION_WINDOW > 0 and missing_llm_fields(state.get("lead_info", {})):
+        earlier = [
+            msg.content for msg in messages[state.get("lead_cursor", 0):-1]
+            if isinstance(msg, HumanMessage)
+        ][-EXTRACTION_WINDOW:]
+        if earlier:
+            parts.append("Earlier user messages (for extraction only):\n" + "\n".join(earlier))
+    parts.append(f"Latest message: {messages[-1].content}")
+    return [
+        SystemMessage(content=COMBINED_PROMPT),
+        HumanMessage(content="\n\n".join(parts))
+    ]
+
+
+def parse_combined(text: str) -> tuple[str, dict]:
+    """Parse the combined response into (intent, extracted lead fields)."""
+    intent = "unknown"
+    for line in text.strip().split("\n"):
+        if line.startswith("intent:"):
+            intent = parse_intent(line.split(":", 1)[1])
+    return intent, parse_extraction(text, {})
+
+
+def _combined_update(state: ConversationState, local: Optional[str], text: str) -> dict:
+    intent, extracted = parse_combined(text)
+    return {
+        "intent": local or intent,
+        "extracted_lead": extracted,
+        "extracted_at": len(state["messages"])
+    }
+
+
+def needs_combined_call(state: ConversationState, local: Optional[str]) -> bool:
+    """
+    Whether the combined call should run: the LLM is needed for the intent
+    anyway, or the turn is already known to be a lead turn that still needs
+    name/platform extraction.
+    """
+    if local is None:
+        return True
+    return local == "high_intent" and missing_llm_fields(state.get("lead_info", {}))
+
+
+def classify_intent(state: ConversationState, llm: "ChatGoogleGenerativeAI") -> str:
+    """
+    Classify the user's intent based on their latest message.
+    
+    Returns one of:
+    - 'greeting': Casual hello/hi
+    - 'inquiry': Product or pricing questions
+    - 'high_intent': Ready to sign up/try the product
+    - 'unknown': Cannot determine intent
+    """
+    intent = local_intent(state)
+    if intent is not None:
+        return intent
+    
+    response = llm.invoke(build_classification_messages(state))
+    return parse_intent(response.content)
+
+
+async def aclassify_intent(state: ConversationState, llm: "ChatGoogleGenerativeAI") -> str:
+    """Async variant of classify_intent."""
+    intent = local_intent(state)
+    if intent is not None:
+        return intent
+    
+    response = await llm.ainvoke(build_classification_messages(state))
+    return parse_intent(response.content)
+
+
+def intent_node(state: ConversationState, llm: "ChatGoogleGenerativeAI", combined: bool = False) -> dict:
     """
     LangGraph node that classifies intent and updates state.
+    
+    With combined=True, a single LLM call classifies the intent and extracts
+    name/platform; lead_node reuses the extraction instead of calling the LLM.
     """
+    if combined:
+        local = local_intent(state)
+        if needs_combined_call(state, local):
+            response = llm.invoke(build_combined_messages(state))
+            return _combined_update(state, local, response.content)
+        return {"intent": local}
+    
     intent = classify_intent(state, llm)
     return {"intent": intent}
+
+
+async def aintent_node(state: ConversationState, llm: "ChatGoogleGenerativeAI", combined: bool = False) -> dict:
+    """
+    Async LangGraph node that classifies intent and updates state.
+    """
+    if combined:
+        local = local_intent(state)
+        if needs_combined_call(state, local):
+            response = await llm.ainvoke(build_combined_messages(state))
+            return _combined_update(state, local, response.content)
+        return {"intent": local}
+    
+    intent = await aclassify_intent(state, llm)
+    return {"intent": intent}
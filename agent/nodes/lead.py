@@ -2,54 +2,102 @@
 Lead qualification and capture node for the AutoStream AI Agent.
 """
 import re
-from langchain_google_genai import ChatGoogleGenerativeAI
+from typing import TYPE_CHECKING, Optional
 from langchain_core.messages import HumanMessage, SystemMessage
 from agent.state import ConversationState
 from agent.tools.lead_capture import mock_lead_capture
 
+if TYPE_CHECKING:
+    from langchain_google_genai import ChatGoogleGenerativeAI
 
-def extract_lead_info(state: ConversationState, llm: ChatGoogleGenerativeAI) -> dict:
+
+EMAIL_PATTERN = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+
+# Fields the regex extractors cannot find
+LLM_FIELDS = ("name", "platform")
+
+EXTRACTION_PROMPT = """You are extracting lead information from a conversation.
+Extract the following if mentioned:
+- name: The person's name
+- platform: Their content platform (YouTube, Instagram, TikTok, etc.)
+
+Respond in this exact format (use null if not found):
+name: [extracted name or null]
+platform: [extracted platform or null]
+
+Only extract information that is clearly stated. Do not guess."""
+
+
+def new_user_text(state: ConversationState) -> str:
+    """Join the user messages added since the last lead extraction."""
+    cursor = state.get("lead_cursor", 0)
+    return "\n".join([
+        msg.content for msg in state.get("messages", [])[cursor:]
+        if isinstance(msg, HumanMessage)
+    ])
+
+
+def missing_llm_fields(lead_info: dict) -> bool:
+    """Whether any field only the LLM can extract is still missing."""
+    return not all(lead_info.get(field) for field in LLM_FIELDS)
+
+
+def local_extraction(state: ConversationState) -> tuple[dict, str]:
     """
-    Extract lead information from the conversation.
-    Uses LLM to identify name, email, and platform from messages.
+    Apply the local (regex) extractors to the new user messages.
+    
+    Returns:
+        Tuple of (lead_info with locally extracted fields, new_text)
     """
-    messages = state.get("messages", [])
     lead_info = state.get("lead_info", {}).copy()
     
-    # Get all user messages as context
-    conversation_text = "\n".join([
-        msg.content for msg in messages 
-        if isinstance(msg, HumanMessage)
-    ])
+    # Only messages since the last extraction; earlier fields are in lead_info
+    new_text = new_user_text(state)
     
     # Check for email in the latest messages using regex first
-    email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-    emails = re.findall(email_pattern, conversation_text)
+    emails = EMAIL_PATTERN.findall(new_text)
     if emails and not lead_info.get("email"):
         lead_info["email"] = emails[-1]  # Use most recent email
     
-    # Use LLM to extract other info
-    system_prompt = """You are extracting lead information from a conversation.
-Extract the following if mentioned:
-- name: The person's name
-- platform: Their content platform (YouTube, Instagram, TikTok, etc.)
-
-Respond in this exact format (use null if not found):
-name: [extracted name or null]
-platform: [extracted platform or null]
+    return lead_info, new_text
 
-Only extract information that is clearly stated. Do not guess."""
 
-    extraction_messages = [
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=f"Extract info from this conversation:\n{conversation_text}")
-    ]
+def prepare_extraction(state: ConversationState) -> tuple[dict, Optional[list]]:
+    """
+    Apply local extractors and build the LLM extraction prompt.
     
-    response = llm.invoke(extraction_messages)
-    response_text = response.content.strip()
+    Returns:
+        Tuple of (lead_info with locally extracted fields, prompt_messages).
+        prompt_messages is None when the LLM has nothing left to extract.
+    """
+    lead_info, new_text = local_extraction(state)
+    if not new_text or not missing_llm_fields(lead_info):
+        return lead_info, None
     
-    # Parse the response
-    for line in response_text.split("\n"):
+    extraction_messages = [
+        SystemMessage(content=EXTRACTION_PROMPT),
+        HumanMessage(content=f"Extract info from this conversation:\n{new_text}")
+    ]
+    return lead_info, extraction_messages
+
+
+def reused_extraction(state: ConversationState) -> Optional[dict]:
+    """
+    Return lead info built from the combined intent+extraction call made
+    earlier in this turn, or None if there was no such call.
+    """
+    if state.get("extracted_at") != len(state.get("messages", [])):
+        return None
+    lead_info, _ = local_extraction(state)
+    for key, value in state.get("extracted_lead", {}).items():
+        if value and not lead_info.get(key):
+            lead_info[key] = value
+    return lead_info
+
+
+def parse_extraction(response_text: str, lead_info: dict) -> dict:
+    """Merge name/platform parsed from the LLM response into lead_info."""
+    for line in response_text.strip().split("\n"):
         if line.startswith("name:"):
             value = line.split(":", 1)[1].strip()
             if value.lower() != "null" and not lead_info.get("name"):
@@ -58,11 +106,41 @@ Only extract information that is clearly stated. Do not guess."""
             value = line.split(":", 1)[1].strip()
             if value.lower() != "null" and not lead_info.get("platform"):
                 lead_info["platform"] = value
-    
     return lead_info
 
 
-def generate_lead_response(state: ConversationState, lead_info: dict, llm: ChatGoogleGenerativeAI) -> str:
+def extract_lead_info(state: ConversationState, llm: "ChatGoogleGenerativeAI") -> dict:
+    """
+    Extract lead information from the conversation.
+    Uses LLM to identify name, email, and platform from messages.
+    """
+    lead_info = reused_extraction(state)
+    if lead_info is not None:
+        return lead_info
+    
+    lead_info, extraction_messages = prepare_extraction(state)
+    if extraction_messages is None:
+        return lead_info
+    
+    response = llm.invoke(extraction_messages)
+    return parse_extraction(response.content, lead_info)
+
+
+async def aextract_lead_info(state: ConversationState, llm: "ChatGoogleGenerativeAI") -> dict:
+    """Async variant of extract_lead_info."""
+    lead_info = reused_extraction(state)
+    if lead_info is not None:
+        return lead_info
+    
+    lead_info, extraction_messages = prepare_extraction(state)
+    if extraction_messages is None:
+        return lead_info
+    
+    response = await llm.ainvoke(extraction_messages)
+    return parse_extraction(response.content, lead_info)
+
+
+def generate_lead_response(state: ConversationState, lead_info: dict, llm: "ChatGoogleGenerativeAI") -> str:
     """
     Generate appropriate response for lead qualification.
     """
@@ -106,15 +184,10 @@ To set you up, could you please share:
         return f"Almost there! Just need {missing[0]}."
 
 
-def lead_node(state: ConversationState, llm: ChatGoogleGenerativeAI) -> dict:
-    """
-    LangGraph node for lead qualification and capture.
-    """
-    # Extract any new lead info from conversation
-    lead_info = extract_lead_info(state, llm)
-    
+def build_lead_update(state: ConversationState, lead_info: dict, llm: "ChatGoogleGenerativeAI") -> dict:
+    """Build the lead node's state update from the merged lead info."""
     # Check if all info is now available
-    has_all = (
+    has_all = bool(
         lead_info.get("name") and 
         lead_info.get("email") and 
         lead_info.get("platform")
@@ -126,5 +199,36 @@ def lead_node(state: ConversationState, llm: ChatGoogleGenerativeAI) -> dict:
     return {
         "lead_info": lead_info,
         "lead_captured": has_all,
-        "response": response
+        "response": response,
+        "lead_cursor": len(state.get("messages", []))
     }
+
+
+def fallback_lead_node(state: ConversationState) -> dict:
+    """Lead node update using only the local extractors, for when the LLM is unavailable."""
+    lead_info = reused_extraction(state)
+    if lead_info is not None:
+        return build_lead_update(state, lead_info, None)
+    lead_info, _ = local_extraction(state)
+    update = build_lead_update(state, lead_info, None)
+    # Names and platforms need the LLM: leave the cursor so the messages
+    # are read again once it is back
+    update["lead_cursor"] = state.get("lead_cursor", 0)
+    return update
+
+
+def lead_node(state: ConversationState, llm: "ChatGoogleGenerativeAI") -> dict:
+    """
+    LangGraph node for lead qualification and capture.
+    """
+    # Extract any new lead info from conversation
+    lead_info = extract_lead_info(state, llm)
+    return build_lead_update(state, lead_info, llm)
+
+
+async def alead_node(state: ConversationState, llm: "ChatGoogleGenerativeAI") -> dict:
+    """
+    Async LangGraph node for lead qualification and capture.
+    """
+    lead_info = await aextract_lead_info(state, llm)
+    return build_lead_update(state, lead_info, llm)
@@ -1,17 +1,40 @@
 """
 RAG-powered knowledge retrieval node for the AutoStream AI Agent.
 """
+import asyncio
 import json
+import os
 from pathlib import Path
-from langchain_google_genai import ChatGoogleGenerativeAI
+from typing import TYPE_CHECKING, Optional
 from langchain_core.messages import HumanMessage, SystemMessage
 from agent.state import ConversationState
+from agent.metrics import metrics
+from agent.knowledge.snapshot import KnowledgeBaseCache, KnowledgeSnapshot
+from agent.knowledge.retrieval import BM25Index, chunk_knowledge_base, select_within_budget, format_chunks
+from agent.knowledge.faq import FAQMatcher, FAQStats
+from agent.knowledge.index import knowledge_indexer_from_env
+from agent.answer_cache import answer_cache_from_env
+from agent.context import context_manager, summary_note, refresh_summary, arefresh_summary
+
+if TYPE_CHECKING:
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+
+KB_PATH = Path(__file__).parent.parent.parent / "knowledge" / "autostream_kb.json"
+
+# Number of chunks and character budget for the knowledge injected per turn
+RAG_TOP_K = int(os.getenv("AUTOSTREAM_RAG_TOP_K", "4"))
+RAG_CONTEXT_CHARS = int(os.getenv("AUTOSTREAM_RAG_CONTEXT_CHARS", "1500"))
+
+# Questions matching an FAQ entry at least this closely get its stored
+# answer without an LLM call; "off" disables direct FAQ answers
+FAQ_MODE = os.getenv("AUTOSTREAM_FAQ", "on")
+FAQ_THRESHOLD = float(os.getenv("AUTOSTREAM_FAQ_THRESHOLD", "0.8"))
 
 
 def load_knowledge_base() -> dict:
     """Load the AutoStream knowledge base from JSON."""
-    kb_path = Path(__file__).parent.parent.parent / "knowledge" / "autostream_kb.json"
-    with open(kb_path, "r", encoding="utf-8") as f:
+    with open(KB_PATH, "r", encoding="utf-8") as f:
         return json.load(f)
 
 
@@ -49,21 +72,95 @@ def format_knowledge_base(kb: dict) -> str:
     return "\n".join(lines)
 
 
-def retrieve_and_respond(state: ConversationState, llm: ChatGoogleGenerativeAI) -> str:
+_kb_cache = KnowledgeBaseCache(KB_PATH, formatter=format_knowledge_base)
+
+
+def get_knowledge_snapshot() -> KnowledgeSnapshot:
+    """Return the cached knowledge base snapshot (parsed data, prompt text, version)."""
+    return _kb_cache.get()
+
+
+# On-disk index over every file in the knowledge directory (None when
+# AUTOSTREAM_KNOWLEDGE_INDEX=off: in-memory BM25 over the knowledge base)
+knowledge_indexer = knowledge_indexer_from_env(KB_PATH.parent)
+metrics.register_stats(
+    "knowledge_index", lambda: knowledge_indexer.stats.as_dict() if knowledge_indexer is not None else None
+)
+
+_index_cache: tuple = (None, None)
+_faq_cache: tuple = (None, None)
+faq_stats = FAQStats()
+metrics.register_stats("faq", lambda: faq_stats.as_dict() if FAQ_MODE != "off" else None)
+
+# Answers to repeated questions, keyed on normalized question + KB version
+answer_cache = answer_cache_from_env()
+metrics.register_stats("answer_cache", lambda: answer_cache.stats.as_dict() if answer_cache is not None else None)
+
+
+def get_retrieval_index() -> BM25Index:
+    """Return the BM25 index for the current knowledge base version."""
+    global _index_cache
+    snapshot = get_knowledge_snapshot()
+    version, index = _index_cache
+    if version != snapshot.version:
+        index = BM25Index(chunk_knowledge_base(snapshot.data))
+        _index_cache = (snapshot.version, index)
+    return index
+
+
+def get_faq_matcher() -> FAQMatcher:
+    """Return the FAQ matcher for the current knowledge base version."""
+    global _faq_cache
+    snapshot = get_knowledge_snapshot()
+    version, matcher = _faq_cache
+    if version != snapshot.version:
+        matcher = FAQMatcher(snapshot.data.get("faq", []), threshold=FAQ_THRESHOLD, stats=faq_stats)
+        _faq_cache = (snapshot.version, matcher)
+    return matcher
+
+
+def get_search_index():
+    """The on-disk knowledge index, or the BM25 index when it is off or cannot be built."""
+    global knowledge_indexer
+    if knowledge_indexer is not None:
+        try:
+            return knowledge_indexer.get()
+        except OSError:
+            # e.g. a read-only knowledge directory: stop trying for this process
+            knowledge_indexer = None
+    return get_retrieval_index()
+
+
+def knowledge_version() -> str:
+    """Version of all knowledge answers may draw on (keys the answer cache)."""
+    snapshot_version = get_knowledge_snapshot().version
+    index = get_search_index()
+    if isinstance(index, BM25Index):
+        return snapshot_version
+    return f"{snapshot_version}:{index.version}"
+
+
+def retrieve_context(query: str, top_k: int = RAG_TOP_K, char_budget: int = RAG_CONTEXT_CHARS) -> str:
     """
-    Retrieve relevant knowledge and generate a response.
+    Retrieve the knowledge relevant to a query as prompt text.
+
+    Args:
+        query: The user's question
+        top_k: Maximum number of chunks to include
+        char_budget: Maximum characters of knowledge to include
+
+    Returns:
+        Formatted knowledge base excerpt
     """
-    messages = state.get("messages", [])
-    if not messages:
-        return "How can I help you today?"
-    
-    last_message = messages[-1].content
-    
-    # Load and format knowledge base
-    kb = load_knowledge_base()
-    kb_text = format_knowledge_base(kb)
-    
-    system_prompt = f"""You are a helpful sales assistant for AutoStream, a SaaS product that provides automated video editing tools for content creators.
+    index = get_search_index()
+    chunks = [chunk for chunk, _ in index.search(query, top_k)]
+    if not chunks:
+        # Nothing matched: fall back to the overview and pricing chunks
+        chunks = get_retrieval_index().chunks[:top_k]
+    return format_chunks(select_within_budget(chunks, char_budget))
+
+
+SYSTEM_PROMPT = """You are a helpful sales assistant for AutoStream, a SaaS product that provides automated video editing tools for content creators.
 
 Use the following knowledge base to answer questions accurately:
 
@@ -76,18 +173,83 @@ Guidelines:
 - If the user shows interest in signing up, encourage them and let them know we'd love to help them get started
 - Keep responses concise but informative"""
 
-    # Build conversation context
-    conversation_messages = [SystemMessage(content=system_prompt)]
-    for msg in messages:
-        conversation_messages.append(msg)
+
+def local_response(state: ConversationState) -> Optional[str]:
+    """Answer a RAG turn without the LLM (FAQ match or cached answer), or return None."""
+    messages = state.get("messages", [])
+    if not messages:
+        return "How can I help you today?"
+    
+    # An FAQ question asked (nearly) verbatim gets the stored answer
+    if FAQ_MODE != "off":
+        match = get_faq_matcher().match(messages[-1].content)
+        if match is not None:
+            return match.answer
     
-    response = llm.invoke(conversation_messages)
-    return response.content
+    if answer_cache is not None:
+        return answer_cache.get(messages, knowledge_version())
+    return None
+
+
+def build_response_messages(state: ConversationState) -> list:
+    """Build the LLM prompt for a RAG turn."""
+    # Only the top-k chunks relevant to this question go into the prompt
+    kb_text = retrieve_context(state["messages"][-1].content)
+    
+    # Build conversation context: rolling summary plus the recent window
+    summary, history = context_manager.history(state, "rag")
+    conversation_messages = [SystemMessage(content=SYSTEM_PROMPT.format(kb_text=kb_text) + summary_note(summary))]
+    for msg in history:
+        conversation_messages.append(msg)
+    return conversation_messages
+
+
+def fallback_response(state: ConversationState) -> str:
+    """Answer with the most relevant knowledge base excerpt when the LLM is unavailable."""
+    messages = state.get("messages", [])
+    if not messages:
+        return "How can I help you today?"
+    excerpt = retrieve_context(messages[-1].content, top_k=2, char_budget=600)
+    return f"Here's what I can tell you from our product information:\n\n{excerpt}"
 
 
-def rag_node(state: ConversationState, llm: ChatGoogleGenerativeAI) -> dict:
+def finish_response(state: ConversationState, content: str) -> str:
+    """Record a generated answer in the answer cache and return it."""
+    if answer_cache is not None:
+        answer_cache.set(state["messages"], knowledge_version(), content)
+    return content
+
+
+def rag_node(state: ConversationState, llm: "ChatGoogleGenerativeAI") -> dict:
     """
     LangGraph node that performs RAG retrieval and generates response.
+    
+    FAQ and cached answers come first; the summary is only folded when the
+    turn needs an LLM prompt.
     """
-    response = retrieve_and_respond(state, llm)
-    return {"response": response}
+    answer = local_response(state)
+    if answer is not None:
+        return {"response": answer}
+    
+    updates = refresh_summary(state, llm)
+    state = {**state, **updates}
+    response = llm.invoke(build_response_messages(state))
+    return {"response": finish_response(state, response.content), **updates}
+
+
+async def arag_node(state: ConversationState, llm: "ChatGoogleGenerativeAI") -> dict:
+    """
+    Async LangGraph node that performs RAG retrieval and generates response.
+    
+    The answer cache (possibly SQLite) and retrieval (possibly the on-disk
+    index) run in a worker thread, off the event loop.
+    """
+    answer = await asyncio.to_thread(local_response, state)
+    if answer is not None:
+        return {"response": answer}
+    
+    updates = await arefresh_summary(state, llm)
+    state = {**state, **updates}
+    prompt = await asyncio.to_thread(build_response_messages, state)
+    response = await llm.ainvoke(prompt)
+    return {"response": await asyncio.to_thread(finish_response, state, response.content), **updates}
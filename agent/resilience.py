@@ -0,0 +1,456 @@
+"""
+Resilient LLM calls for the AutoStream AI Agent.
+
+ResilientLLM wraps the chat model the nodes call. Every call:
+    - must finish within the turn's latency budget (measured from the start
+      of the turn, see turn_scope), or within one budget outside a turn
+    - is retried on errors with exponential backoff and full jitter while
+      the budget allows, unless it already streamed output (a retry would
+      repeat those tokens in the graph's message stream)
+    - is hedged: if no output has arrived after the task's recent p95
+      latency, a duplicate request is sent and the first to produce output
+      wins (the loser is cancelled)
+    - goes through a circuit breaker that fails fast after repeated failures
+
+When a call cannot succeed it raises LLMUnavailableError; the graph then
+answers with a degraded local response (see create_agent).
+
+Calls are made with stream()/astream() so the first output is observable;
+streamed tokens still reach the graph's message stream, while hedged
+duplicates are tagged not to stream.
+
+A sync attempt that times out or loses a hedge race cannot be interrupted
+while it waits on the model; it keeps its worker thread until the model
+returns. While max_abandoned such attempts are still running, no hedges are
+sent and new calls fail fast instead of queueing behind them.
+"""
+import asyncio
+import contextvars
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional
+
+from langchain_core.messages import message_chunk_to_message
+from langchain_core.runnables.config import ensure_config
+from langgraph.constants import TAG_NOSTREAM
+
+from agent.metrics import llm_task
+
+
+_turn_started: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("autostream_turn_started", default=None)
+
+
+@contextmanager
+def turn_scope():
+    """Mark the start of a turn; LLM calls inside share the turn's budget."""
+    token = _turn_started.set(time.monotonic())
+    try:
+        yield
+    finally:
+        _turn_started.reset(token)
+
+
+class LLMUnavailableError(Exception):
+    """The LLM could not answer within the budget, or the circuit is open."""
+
+
+@dataclass
+class ResilienceStats:
+    """Counters for resilient LLM calls."""
+    calls: int = 0
+    retries: int = 0
+    timeouts: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    failures: int = 0
+    rejected: int = 0
+    degraded: int = 0
+    abandoned: int = 0
+    abandoned_running: int = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "degraded": self.degraded,
+            "abandoned": self.abandoned,
+            "abandoned_running": self.abandoned_running,
+        }
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failed attempts and rejects
+    calls for reset_after seconds, then lets one trial call through.
+
+    Args:
+        failure_threshold: Consecutive failures that open the circuit
+        reset_after: Seconds the circuit stays open
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_after: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_after:
+                self.state = "half_open"
+                self._trial_in_flight = False
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+
+class LatencyTracker:
+    """Recent time-to-first-output per task, for hedge delays."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+        self._p95: Dict[str, float] = {}
+        self._window = window
+        self._lock = threading.Lock()
+
+    def record(self, task: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.setdefault(task, deque(maxlen=self._window))
+            samples.append(seconds)
+            # Re-sort occasionally rather than on every call
+            if len(samples) >= self.min_samples and (task not in self._p95 or len(samples) % 10 == 0):
+                ordered = sorted(samples)
+                self._p95[task] = ordered[int(0.95 * (len(ordered) - 1))]
+
+    def p95(self, task: str) -> Optional[float]:
+        return self._p95.get(task)
+
+
+def _nostream(config: Optional[dict]) -> dict:
+    config = dict(config or {})
+    config["tags"] = [*config.get("tags", []), TAG_NOSTREAM]
+    return config
+
+
+class ResilientLLM:
+    """
+    Budgeted, retried, hedged and circuit-broken calls to a chat model.
+    Exposes invoke/ainvoke like the wrapped model.
+
+    Args:
+        llm: Chat model (or runnable) to wrap
+        turn_budget: Seconds all LLM calls of one turn may take
+        max_retries: Retries after the first attempt
+        backoff: Base backoff in seconds (doubled per retry, full jitter)
+        hedge: Send hedged duplicates once a task's p95 is known
+        min_hedge_delay: Never hedge earlier than this (seconds)
+        breaker: Circuit breaker shared by all calls
+        max_workers: Threads running sync attempts
+        max_abandoned: Abandoned sync attempts still running at which calls
+            are rejected (default: half of max_workers)
+    """
+
+    def __init__(
+        self,
+        llm,
+        turn_budget: float = 20.0,
+        max_retries: int = 2,
+        backoff: float = 0.2,
+        hedge: bool = True,
+        min_hedge_delay: float = 0.05,
+        breaker: Optional[CircuitBreaker] = None,
+        max_workers: int = 32,
+        max_abandoned: Optional[int] = None
+    ):
+        self.llm = llm
+        self.turn_budget = turn_budget
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.hedge = hedge
+        self.min_hedge_delay = min_hedge_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = LatencyTracker()
+        self.stats = ResilienceStats()
+        self._rng = random.Random()
+        self.max_abandoned = max_abandoned if max_abandoned is not None else max(1, max_workers // 2)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+        self._abandoned_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+    # -- policy ------------------------------------------------------------
+
+    def _deadline(self) -> float:
+        started = _turn_started.get()
+        return (started if started is not None else time.monotonic()) + self.turn_budget
+
+    def _hedge_delay(self, task: str) -> Optional[float]:
+        if not self.hedge or self.stats.abandoned_running >= self.max_abandoned:
+            return None
+        p95 = self.latency.p95(task)
+        return None if p95 is None else max(self.min_hedge_delay, p95)
+
+    def _backoff(self, attempt: int, deadline: float) -> Optional[float]:
+        """Jittered delay before the next attempt, or None to give up."""
+        if attempt > self.max_retries:
+            return None
+        delay = self._rng.uniform(0, self.backoff * 2 ** (attempt - 1))
+        if time.monotonic() + delay >= deadline:
+            return None
+        return delay
+
+    def _task(self, config: Optional[dict]) -> str:
+        merged = ensure_config(config)
+        return llm_task(merged.get("tags"), merged.get("metadata"))
+
+    def _admit(self) -> None:
+        """Fail fast while abandoned attempts hold the workers or the circuit is open."""
+        if self.stats.abandoned_running >= self.max_abandoned:
+            self.stats.rejected += 1
+            raise LLMUnavailableError("LLM workers busy with abandoned calls")
+        if not self.breaker.allow():
+            self.stats.rejected += 1
+            raise LLMUnavailableError("LLM circuit open")
+
+    def _give_up(self, error: Optional[BaseException]) -> LLMUnavailableError:
+        self.stats.failures += 1
+        return LLMUnavailableError(f"LLM unavailable: {error!r}")
+
+    # -- sync --------------------------------------------------------------
+
+    def invoke(self, messages, config: Optional[dict] = None, **kwargs):
+        task = self._task(config)
+        deadline = self._deadline()
+        self.stats.calls += 1
+        error: Optional[BaseException] = None
+        attempt = 0
+        while True:
+            self._admit()
+            streamed = threading.Event()
+            try:
+                result = self._hedged(messages, config, kwargs, task, deadline, streamed)
+                self.breaker.record_success()
+                return result
+            except TimeoutError as e:
+                self.stats.timeouts += 1
+                self.breaker.record_failure()
+                raise self._give_up(e) from e
+            except Exception as e:
+                self.breaker.record_failure()
+                if streamed.is_set():
+                    raise self._give_up(e) from e  # Its tokens were already streamed
+                error = e
+            attempt += 1
+            delay = self._backoff(attempt, deadline)
+            if delay is None:
+                raise self._give_up(error) from error
+            self.stats.retries += 1
+            time.sleep(delay)
+
+    def _collect(self, messages, config, kwargs, first: threading.Event, stop: threading.Event, signal: threading.Event):
+        result = None
+        for chunk in self.llm.stream(messages, config, **kwargs):
+            if stop.is_set():
+                return None  # Lost the race; stop pulling tokens
+            if not first.is_set():
+                first.set()
+                signal.set()
+            result = chunk if result is None else result + chunk
+        return result
+
+    def _submit(self, messages, config, kwargs, first, stop, signal):
+        future = self._pool.submit(
+            contextvars.copy_context().run, self._collect, messages, config, kwargs, first, stop, signal
+        )
+        future.add_done_callback(lambda _: signal.set())
+        return future
+
+    def _abandon(self, future) -> None:
+        """Count an attempt that is no longer awaited until it finishes."""
+        if future is None or future.done():
+            return
+        with self._abandoned_lock:
+            self.stats.abandoned += 1
+            self.stats.abandoned_running += 1
+        future.add_done_callback(self._abandoned_done)
+
+    def _abandoned_done(self, _future) -> None:
+        with self._abandoned_lock:
+            self.stats.abandoned_running -= 1
+
+    def _hedged(self, messages, config, kwargs, task: str, deadline: float, first: threading.Event):
+        """One attempt (plus its hedge); first is set once the primary streams output."""
+        start = time.monotonic()
+        signal = threading.Event()
+        stop = threading.Event()
+        primary = self._submit(messages, config, kwargs, first, stop, signal)
+        delay = self._hedge_delay(task)
+        hedge_at = start + delay if delay is not None and start + delay < deadline else None
+        hedge = hedge_stop = None
+        try:
+            while True:
+                signal.clear()
+                if first.is_set() or (primary.done() and primary.exception() is None):
+                    if hedge_stop is not None:
+                        hedge_stop.set()
+                    self.latency.record(task, time.monotonic() - start)
+                    result = primary.result(timeout=max(0.0, deadline - time.monotonic()))
+                    return message_chunk_to_message(result)
+                if hedge is not None and hedge.done():
+                    if hedge.exception() is None:
+                        stop.set()
+                        self.stats.hedge_wins += 1
+                        return message_chunk_to_message(hedge.result())
+                    if primary.done():
+                        raise primary.exception()
+                if primary.done() and hedge is None:
+                    raise primary.exception()
+                now = time.monotonic()
+                if now >= deadline:
+                    raise TimeoutError("LLM call exceeded the turn budget")
+                if hedge is None and hedge_at is not None and now >= hedge_at:
+                    self.stats.hedges += 1
+                    hedge_stop = threading.Event()
+                    hedge = self._submit(messages, _nostream(config), kwargs, threading.Event(), hedge_stop, signal)
+                    continue
+                wake = deadline if hedge is not None or hedge_at is None else min(deadline, hedge_at)
+                signal.wait(wake - now)
+        except BaseException:
+            stop.set()
+            if hedge_stop is not None:
+                hedge_stop.set()
+            raise
+        finally:
+            self._abandon(primary)
+            self._abandon(hedge)
+
+    # -- async -------------------------------------------------------------
+
+    async def ainvoke(self, messages, config: Optional[dict] = None, **kwargs):
+        task = self._task(config)
+        deadline = self._deadline()
+        self.stats.calls += 1
+        error: Optional[BaseException] = None
+        attempt = 0
+        while True:
+            self._admit()
+            streamed = asyncio.Event()
+            try:
+                result = await asyncio.wait_for(
+                    self._ahedged(messages, config, kwargs, task, deadline, streamed),
+                    max(0.0, deadline - time.monotonic())
+                )
+                self.breaker.record_success()
+                return result
+            except asyncio.TimeoutError as e:
+                self.stats.timeouts += 1
+                self.breaker.record_failure()
+                raise self._give_up(e) from e
+            except Exception as e:
+                self.breaker.record_failure()
+                if streamed.is_set():
+                    raise self._give_up(e) from e  # Its tokens were already streamed
+                error = e
+            attempt += 1
+            delay = self._backoff(attempt, deadline)
+            if delay is None:
+                raise self._give_up(error) from error
+            self.stats.retries += 1
+            await asyncio.sleep(delay)
+
+    async def _acollect(self, messages, config, kwargs, first: Optional[asyncio.Event]):
+        result = None
+        async for chunk in self.llm.astream(messages, config, **kwargs):
+            if first is not None and not first.is_set():
+                first.set()
+            result = chunk if result is None else result + chunk
+        return result
+
+    async def _ahedged(self, messages, config, kwargs, task: str, deadline: float, first: asyncio.Event):
+        """Async variant of _hedged. Losing and timed-out attempts are cancelled."""
+        start = time.monotonic()
+        primary = asyncio.ensure_future(self._acollect(messages, config, kwargs, first))
+        first_seen = asyncio.ensure_future(first.wait())
+        hedge = None
+        try:
+            delay = self._hedge_delay(task)
+            if delay is not None and start + delay < deadline:
+                await asyncio.wait({primary, first_seen}, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                if not first.is_set() and not primary.done():
+                    self.stats.hedges += 1
+                    hedge = asyncio.ensure_future(self._acollect(messages, _nostream(config), kwargs, None))
+
+            while True:
+                if first.is_set() or (primary.done() and primary.exception() is None):
+                    if hedge is not None:
+                        hedge.cancel()
+                    self.latency.record(task, time.monotonic() - start)
+                    return message_chunk_to_message(await primary)
+                if hedge is not None and hedge.done():
+                    if hedge.exception() is None:
+                        primary.cancel()
+                        self.stats.hedge_wins += 1
+                        return message_chunk_to_message(hedge.result())
+                    if primary.done():
+                        raise primary.exception()
+                if primary.done() and hedge is None:
+                    raise primary.exception()
+                waiting = {t for t in (primary, first_seen, hedge) if t is not None and not t.done()}
+                await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for pending in (primary, first_seen, hedge):
+                if pending is not None and not pending.done():
+                    pending.cancel()
+
+
+def resilient_llm_from_env(llm) -> Optional[ResilientLLM]:
+    """
+    Wrap llm as configured by the environment, or return None when
+    AUTOSTREAM_LLM_RESILIENCE=off.
+    """
+    if os.getenv("AUTOSTREAM_LLM_RESILIENCE", "on") == "off":
+        return None
+    return ResilientLLM(
+        llm,
+        turn_budget=float(os.getenv("AUTOSTREAM_LLM_TURN_BUDGET", "20")),
+        max_retries=int(os.getenv("AUTOSTREAM_LLM_RETRIES", "2")),
+        hedge=os.getenv("AUTOSTREAM_LLM_HEDGE", "on") != "off",
+        breaker=CircuitBreaker(
+            failure_threshold=int(os.getenv("AUTOSTREAM_LLM_BREAKER_FAILURES", "5")),
+            reset_after=float(os.getenv("AUTOSTREAM_LLM_BREAKER_RESET", "30"))
+        ),
+        max_abandoned=int(os.getenv("AUTOSTREAM_LLM_MAX_ABANDONED", "16"))
+    )
@@ -0,0 +1,339 @@
+"""
+HTTP server for the AutoStream AI Agent.
+
+Serves the agent over ASGI with one compiled graph per process.
+Conversations are keyed by thread id and persisted by the SQLite
+checkpointer, so several worker processes can share one database.
+
+Endpoints:
+    POST /threads/{thread_id}/messages          {"message": "..."} -> JSON reply
+    POST /threads/{thread_id}/messages/stream   Server-sent events: "token"
+                                                events, then "done" (or "error")
+    GET  /health                                Liveness and load
+    GET  /metrics                               Prometheus text (?format=json for JSON)
+
+At most max_in_flight turns run at once and at most max_queue more wait;
+beyond that requests are rejected with 503 and Retry-After.
+
+Turns of one thread run one at a time, also across worker processes: within
+a process they wait on an asyncio lock, and the turn holds the thread's
+lease in the checkpoint database (SQLiteCheckpointer.athread_lock), renewed
+while the turn waits for a slot and runs. The checkpointer, retrieval and
+answer cache calls of a turn run in worker threads, off the event loop.
+
+To run offline, pass a prebuilt agent with a stub LLM:
+    create_app(create_agent("offline", llm=stub, checkpointer=SQLiteCheckpointer(path)))
+
+Usage:
+    python -m agent.server [--host 127.0.0.1] [--port 8000] [--workers 1]
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Optional
+
+from dotenv import load_dotenv
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from agent.checkpoint import SQLiteCheckpointer
+from agent.graph import ConcurrencyLimiter, arun_thread, astream_thread, create_agent
+from agent.metrics import metrics
+from agent.tools import lead_capture
+
+
+MAX_MESSAGE_CHARS = 4000
+MAX_THREAD_ID_CHARS = 128
+
+
+@dataclass
+class ServerStats:
+    """Request counters for the HTTP server."""
+    requests: int = 0
+    rejected: int = 0
+    failed: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    @property
+    def mean_ms(self) -> float:
+        completed = self.requests - self.rejected
+        return self.total_ms / completed if completed else 0.0
+
+    def record(self, elapsed_ms: float) -> None:
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "mean_ms": round(self.mean_ms, 2),
+            "max_ms": round(self.max_ms, 2),
+        }
+
+
+class ThreadLocks:
+    """Runs turns of the same thread in this process one at a time; locks are dropped when idle."""
+
+    def __init__(self):
+        self._locks: Dict[str, list] = {}  # thread_id -> [lock, holders and waiters]
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    @asynccontextmanager
+    async def hold(self, thread_id: str):
+        entry = self._locks.setdefault(thread_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[thread_id]
+
+
+class _Admission:
+    """One admitted request; release() is idempotent."""
+
+    def __init__(self, server: "AgentServer"):
+        self.server = server
+        self.start = time.perf_counter()
+        self.released = False
+
+    def release(self, failed: bool = False) -> None:
+        if self.released:
+            return
+        self.released = True
+        self.server.pending -= 1
+        self.server.stats.record((time.perf_counter() - self.start) * 1000)
+        if failed:
+            self.server.stats.failed += 1
+
+
+class AgentServer:
+    """
+    Request handling shared by the routes of one app.
+
+    Args:
+        agent: Agent compiled with a checkpointer, or None to build one at startup
+        max_in_flight: Maximum turns running at once
+        max_queue: Maximum turns waiting for a slot before requests are rejected
+    """
+
+    def __init__(self, agent=None, max_in_flight: int = 64, max_queue: int = 256):
+        self.agent = agent
+        self.max_queue = max_queue
+        self.limiter = ConcurrencyLimiter(max_in_flight)
+        self.locks = ThreadLocks()
+        self.stats = ServerStats()
+        self.pending = 0
+
+    def build_agent(self) -> None:
+        """Create the process-wide agent from the environment if none was given."""
+        if self.agent is None:
+            load_dotenv()
+            api_key = os.getenv("GOOGLE_API_KEY")
+            if not api_key:
+                raise RuntimeError("GOOGLE_API_KEY not found in environment variables.")
+            checkpointer = SQLiteCheckpointer(os.getenv("AUTOSTREAM_CHECKPOINT_DB", "conversations.db"))
+            self.agent = create_agent(api_key, checkpointer=checkpointer)
+        if getattr(self.agent, "checkpointer", None) is None:
+            raise ValueError("The server needs an agent compiled with a checkpointer")
+
+    @asynccontextmanager
+    async def hold_thread(self, thread_id: str):
+        """Wait until no other turn of the thread runs, in this or another worker process."""
+        async with self.locks.hold(thread_id):
+            checkpointer = self.agent.checkpointer
+            if isinstance(checkpointer, SQLiteCheckpointer):
+                async with checkpointer.athread_lock(thread_id):
+                    yield
+            else:
+                yield
+
+    def admit(self) -> Optional[_Admission]:
+        """Count a new request in, or return None if the server is saturated."""
+        self.stats.requests += 1
+        if self.pending >= self.limiter.max_concurrent + self.max_queue:
+            self.stats.rejected += 1
+            return None
+        self.pending += 1
+        return _Admission(self)
+
+    async def parse_message(self, request: Request) -> tuple[str, str]:
+        """Return (thread_id, message) from a request or raise ValueError."""
+        thread_id = request.path_params["thread_id"]
+        if len(thread_id) > MAX_THREAD_ID_CHARS:
+            raise ValueError("thread id is too long")
+        try:
+            body = await request.json()
+        except ValueError:
+            # JSONDecodeError and UnicodeDecodeError (body is not UTF-8)
+            raise ValueError("request body must be JSON") from None
+        message = body.get("message") if isinstance(body, dict) else None
+        if not isinstance(message, str) or not message.strip():
+            raise ValueError('"message" must be a non-empty string')
+        if len(message) > MAX_MESSAGE_CHARS:
+            raise ValueError(f'"message" is longer than {MAX_MESSAGE_CHARS} characters')
+        return thread_id, message.strip()
+
+    def server_stats(self) -> dict:
+        return {
+            **self.stats.as_dict(),
+            "pending": self.pending,
+            "in_flight": self.limiter.in_flight,
+            "queued": self.limiter.queued,
+            "active_threads": len(self.locks),
+        }
+
+
+def turn_payload(thread_id: str, state: dict, response: str) -> dict:
+    """JSON body describing a finished turn."""
+    return {
+        "thread_id": thread_id,
+        "response": response,
+        "intent": state.get("intent", "unknown"),
+        "lead_info": state.get("lead_info", {}),
+        "lead_captured": state.get("lead_captured", False),
+    }
+
+
+def _error(status: int, message: str, headers: Optional[dict] = None) -> JSONResponse:
+    return JSONResponse({"error": message}, status_code=status, headers=headers)
+
+
+def _busy() -> JSONResponse:
+    return _error(503, "server busy, retry later", headers={"Retry-After": "1"})
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def create_app(
+    agent=None,
+    max_in_flight: Optional[int] = None,
+    max_queue: Optional[int] = None
+) -> Starlette:
+    """
+    Build the ASGI app.
+
+    Args:
+        agent: Agent compiled with a checkpointer; built from the environment
+            at startup when None
+        max_in_flight: Maximum turns running at once (env AUTOSTREAM_MAX_IN_FLIGHT)
+        max_queue: Maximum waiting turns (env AUTOSTREAM_MAX_QUEUE)
+
+    Returns:
+        Starlette application
+    """
+    server = AgentServer(
+        agent,
+        max_in_flight=max_in_flight or int(os.getenv("AUTOSTREAM_MAX_IN_FLIGHT", "64")),
+        max_queue=max_queue if max_queue is not None else int(os.getenv("AUTOSTREAM_MAX_QUEUE", "256"))
+    )
+
+    async def post_message(request: Request) -> JSONResponse:
+        try:
+            thread_id, message = await server.parse_message(request)
+        except ValueError as e:
+            return _error(400, str(e))
+        admission = server.admit()
+        if admission is None:
+            return _busy()
+        try:
+            async with server.hold_thread(thread_id):
+                state, response = await arun_thread(server.agent, thread_id, message, server.limiter)
+        except Exception as e:
+            admission.release(failed=True)
+            return _error(500, f"agent error: {e}")
+        admission.release()
+        return JSONResponse(turn_payload(thread_id, state, response))
+
+    async def post_message_stream(request: Request) -> StreamingResponse:
+        try:
+            thread_id, message = await server.parse_message(request)
+        except ValueError as e:
+            return _error(400, str(e))
+        admission = server.admit()
+        if admission is None:
+            return _busy()
+
+        async def events() -> AsyncIterator[str]:
+            failed = False
+            try:
+                async with server.hold_thread(thread_id):
+                    stream = astream_thread(server.agent, thread_id, message, server.limiter)
+                    async for token in stream:
+                        yield _sse("token", {"text": token})
+                    yield _sse("done", turn_payload(thread_id, stream.state, stream.response))
+            except Exception as e:
+                failed = True
+                yield _sse("error", {"error": f"agent error: {e}"})
+            finally:
+                admission.release(failed=failed)
+
+        return StreamingResponse(
+            events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    async def health(request: Request) -> JSONResponse:
+        ready = server.agent is not None
+        return JSONResponse(
+            {"status": "ok" if ready else "starting", "pending": server.pending},
+            status_code=200 if ready else 503
+        )
+
+    async def get_metrics(request: Request) -> Response:
+        if request.query_params.get("format") == "json":
+            return JSONResponse({**metrics.as_dict(), "server": server.server_stats()})
+        return PlainTextResponse(
+            metrics.prometheus({"server": server.server_stats()}),
+            media_type="text/plain; version=0.0.4"
+        )
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette):
+        server.build_agent()
+        lead_capture.get_lead_sink()  # Start loading the captured emails before the first lead turn
+        yield
+        lead_capture.close_lead_sink()
+
+    app = Starlette(
+        routes=[
+            Route("/threads/{thread_id}/messages", post_message, methods=["POST"]),
+            Route("/threads/{thread_id}/messages/stream", post_message_stream, methods=["POST"]),
+            Route("/health", health, methods=["GET"]),
+            Route("/metrics", get_metrics, methods=["GET"]),
+        ],
+        lifespan=lifespan
+    )
+    app.state.server = server
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the AutoStream agent over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (each builds its own agent)")
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run("agent.server:create_app", factory=True, host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+Compact in-memory conversation sessions for the AutoStream AI Agent.
+
+A ConversationState keeps a LangChain message object per message, a pydantic
+model costing about 0.9 KB before its text. Idle conversations are held here
+in compact form instead:
+    MessageLog      one role byte, one token count and the text per
+                    message; HumanMessage/AIMessage objects are only built
+                    for the messages a node reads (the recent window, the
+                    latest message) and dropped when the session is saved
+    CompactSession  the other state fields in __slots__, intent strings
+                    interned and empty dicts stored as None
+Sessions idle for cold_after seconds are frozen: their texts are joined and
+zlib-compressed, and decompressed on the next read.
+
+The graph runs directly on a session's state: the MessageLog is a
+SharedHistory, adopted by the append_messages reducer and extended in place,
+so saving a turn copies no history. Only message content (and the cached token count) is kept;
+other message metadata is dropped.
+
+    store = SessionStore()
+    state, reply = run_conversation(agent, store.load(session_id), message)
+    store.save(session_id, state)
+
+A session must not run two turns at once (as with a ConversationState).
+"""
+import sys
+import threading
+import time
+import zlib
+from array import array
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from agent.state import ConversationState, SharedHistory, new_conversation_state
+from agent.tokens import CACHE_KEY, message_tokens
+
+
+HUMAN, AI = 0, 1
+
+# Role names used by chat UIs, indexed by role byte
+ROLE_NAMES = ("user", "assistant")
+
+
+class MessageLog(Sequence, SharedHistory):
+    """
+    Conversation history stored as packed columns. Supports the list
+    operations the agent uses: len, indexing, slicing, iteration, append,
+    extend and pop of the last message.
+
+    Args:
+        messages: Initial HumanMessage/AIMessage objects
+    """
+
+    __slots__ = ("_roles", "_tokens", "_texts", "_frozen", "_messages")
+
+    def __init__(self, messages=()):
+        self._roles = bytearray()
+        self._tokens = array("I")
+        self._texts: Optional[List[str]] = []
+        self._frozen: Optional[tuple] = None  # (text lengths, compressed texts)
+        self._messages: Optional[Dict[int, BaseMessage]] = None  # Built or appended since release()
+        self.extend(messages)
+
+    def __len__(self) -> int:
+        return len(self._roles)
+
+    def _text_list(self) -> List[str]:
+        texts = self._texts
+        if texts is None:
+            texts = self._thaw()
+        return texts
+
+    def _message(self, index: int) -> BaseMessage:
+        messages = self._messages
+        if messages is None:
+            messages = self._messages = {}
+        message = messages.get(index)
+        if message is None:
+            message_class = HumanMessage if self._roles[index] == HUMAN else AIMessage
+            message = message_class(
+                content=self._text_list()[index],
+                response_metadata={CACHE_KEY: self._tokens[index]}
+            )
+            messages[index] = message
+        return message
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._message(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("message index out of range")
+        return self._message(index)
+
+    def __iter__(self) -> Iterator[BaseMessage]:
+        for index in range(len(self)):
+            yield self._message(index)
+
+    def __reversed__(self) -> Iterator[BaseMessage]:
+        for index in reversed(range(len(self))):
+            yield self._message(index)
+
+    def append(self, message: BaseMessage) -> None:
+        if not isinstance(message, (HumanMessage, AIMessage)):
+            raise TypeError(f"MessageLog holds HumanMessage and AIMessage, not {type(message).__name__}")
+        content = message.content
+        self._text_list().append(content if isinstance(content, str) else str(content))
+        self._tokens.append(message_tokens(message))
+        if self._messages is None:
+            self._messages = {}
+        self._messages[len(self._roles)] = message
+        self._roles.append(HUMAN if isinstance(message, HumanMessage) else AI)
+
+    def extend(self, messages) -> None:
+        for message in messages:
+            self.append(message)
+
+    def pop(self, index: int = -1) -> BaseMessage:
+        """Remove and return the last message (the only position supported)."""
+        last = len(self) - 1
+        if last < 0:
+            raise IndexError("pop from empty MessageLog")
+        if index not in (-1, last):
+            raise IndexError("MessageLog only pops its last message")
+        message = self._message(last)
+        del self._roles[last]
+        self._tokens.pop()
+        self._text_list().pop()
+        self._messages.pop(last, None)
+        return message
+
+    def turns(self) -> Iterator[tuple[str, str]]:
+        """Yield (role name, text) per message without building message objects."""
+        for role, text in zip(self._roles, self._text_list()):
+            yield ROLE_NAMES[role], text
+
+    def release(self) -> None:
+        """Drop the message objects built for the last turn."""
+        self._messages = None
+
+    @property
+    def frozen(self) -> bool:
+        return self._frozen is not None
+
+    def freeze(self, level: int = 6) -> None:
+        """Compress the texts (and release message objects) until the next read."""
+        self._messages = None
+        if self._frozen is None:
+            texts = self._texts
+            self._frozen = (array("I", map(len, texts)), zlib.compress("".join(texts).encode("utf-8"), level))
+            self._texts = None
+
+    def _thaw(self) -> List[str]:
+        frozen = self._frozen
+        if frozen is None:
+            return self._texts  # Thawed by a concurrent reader
+        lengths, blob = frozen
+        joined = zlib.decompress(blob).decode("utf-8")
+        texts = []
+        start = 0
+        for length in lengths:
+            texts.append(joined[start:start + length])
+            start += length
+        self._texts = texts
+        self._frozen = None
+        return texts
+
+
+class CompactSession:
+    """
+    One conversation in compact form. state() returns the ConversationState
+    for the next turn; update() stores the state a turn returned.
+
+    The reply of the last turn (response) is not stored; it is the last
+    message of the log. extracted_lead is only valid within the turn that
+    produced it, so it is not stored either.
+    """
+
+    __slots__ = (
+        "messages", "intent", "lead_info", "lead_captured", "extracted_at", "lead_cursor",
+        "summary", "summary_cursor", "summarized_tokens", "speculated", "token_usage", "last_active"
+    )
+
+    def __init__(self, state: Optional[ConversationState] = None):
+        self.messages = MessageLog()
+        self.update(state or new_conversation_state())
+
+    def update(self, state: ConversationState) -> None:
+        """Store a turn's resulting state and release its message objects."""
+        messages = state.get("messages") or ()
+        if messages is not self.messages:
+            self.messages = messages if isinstance(messages, MessageLog) else MessageLog(messages)
+        self.messages.release()
+        self.intent = sys.intern(state.get("intent", "unknown"))
+        self.lead_info = state.get("lead_info") or None
+        self.lead_captured = state.get("lead_captured", False)
+        self.extracted_at = state.get("extracted_at", -1)
+        self.lead_cursor = state.get("lead_cursor", 0)
+        self.summary = state.get("summary", "")
+        self.summary_cursor = state.get("summary_cursor", 0)
+        self.summarized_tokens = state.get("summarized_tokens", 0)
+        self.speculated = sys.intern(state.get("speculated", ""))
+        self.token_usage = state.get("token_usage") or None
+        self.last_active = time.monotonic()
+
+    def state(self) -> ConversationState:
+        """The ConversationState for the next turn; its messages are this session's log."""
+        self.last_active = time.monotonic()
+        return {
+            "messages": self.messages,
+            "intent": self.intent,
+            "lead_info": self.lead_info or {},
+            "lead_captured": self.lead_captured,
+            "response": "",
+            "extracted_lead": {},
+            "extracted_at": self.extracted_at,
+            "lead_cursor": self.lead_cursor,
+            "summary": self.summary,
+            "summary_cursor": self.summary_cursor,
+            "summarized_tokens": self.summarized_tokens,
+            "speculated": self.speculated,
+            "token_usage": self.token_usage or {}
+        }
+
+
+@dataclass
+class SessionStats:
+    """Counters for a SessionStore."""
+    sessions: int = 0
+    frozen: int = 0
+    freezes: int = 0
+    thaws: int = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "sessions": self.sessions,
+            "frozen": self.frozen,
+            "freezes": self.freezes,
+            "thaws": self.thaws,
+        }
+
+
+class SessionStore:
+    """
+    Conversations by session id, held as CompactSessions.
+
+    Args:
+        cold_after: Seconds idle after which a session's texts are
+            compressed (0: never)
+        sweep_every: Saves between scans for cold sessions
+    """
+
+    def __init__(self, cold_after: float = 300.0, sweep_every: int = 256):
+        self.cold_after = cold_after
+        self.sweep_every = sweep_every
+        self.stats = SessionStats()
+        self._sessions: Dict[str, CompactSession] = {}
+        self._lock = threading.Lock()
+        self._saves = 0
+
+    def _session(self, session_id: str) -> CompactSession:
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = CompactSession()
+            self.stats.sessions += 1
+        return session
+
+    def load(self, session_id: str) -> ConversationState:
+        """Return the state for the session's next turn (a new session if unknown)."""
+        with self._lock:
+            session = self._session(session_id)
+            if session.messages.frozen:
+                self.stats.frozen -= 1
+                self.stats.thaws += 1
+            return session.state()
+
+    def save(self, session_id: str, state: ConversationState) -> None:
+        """Store the state a turn returned."""
+        with self._lock:
+            session = self._session(session_id)
+            if session.messages.frozen:
+                self.stats.frozen -= 1  # Saved without a load in between
+            session.update(state)
+            self._saves += 1
+            sweep = self.cold_after > 0 and self._saves % self.sweep_every == 0
+        if sweep:
+            self.sweep()
+
+    def get(self, session_id: str) -> Optional[CompactSession]:
+        return self._sessions.get(session_id)
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is not None:
+                self.stats.sessions -= 1
+                self.stats.frozen -= session.messages.frozen
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Freeze the sessions idle for cold_after seconds; return how many."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            candidates = list(self._sessions.values())
+        frozen = 0
+        for session in candidates:
+            # One session per lock hold, so loads are not blocked for the whole scan
+            with self._lock:
+                messages = session.messages
+                if messages.frozen or not messages or now - session.last_active < self.cold_after:
+                    continue
+                messages.freeze()
+                self.stats.frozen += 1
+                self.stats.freezes += 1
+                frozen += 1
+        return frozen
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
@@ -0,0 +1,177 @@
+"""
+Speculative response execution for the AutoStream AI Agent.
+
+A turn normally runs classify_intent and then one response node, so a turn
+whose intent needs the LLM pays two LLM round-trips back to back. With
+speculation on, the classification node predicts the route
+(agent.nodes.intent.predict_intent) and starts the predicted response node
+alongside the classification call. If route_by_intent agrees with the
+prediction, the speculative update is committed together with the intent
+and the graph ends there; otherwise the speculative run is cancelled (async)
+or abandoned (sync), its result discarded, and the routed node runs as usual.
+
+Only side-effect-free response nodes are speculated: the lead node may
+capture a lead, which cannot be taken back on a miss. Speculative LLM calls
+are tagged not to stream, so a committed speculative reply reaches a
+streaming caller in one piece at the end of the turn.
+"""
+import asyncio
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from langchain_core.runnables.config import ensure_config, var_child_runnable_config
+from langgraph.constants import TAG_NOSTREAM
+
+from agent.state import ConversationState
+
+
+# Response nodes that are safe to run before the route is known
+SPECULATIVE_NODES = frozenset({"greeting_response", "rag_response"})
+
+
+@dataclass
+class SpeculationStats:
+    """Counters for speculative response runs."""
+    turns: int = 0
+    attempts: int = 0
+    hits: int = 0
+    misses: int = 0
+    saved_ms: float = 0.0
+    wasted_ms: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.attempts if self.attempts else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "turns": self.turns,
+            "attempts": self.attempts,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 4),
+            "saved_ms": round(self.saved_ms, 2),
+            "wasted_ms": round(self.wasted_ms, 2),
+        }
+
+
+def _speculative_config(node: str) -> dict:
+    """The current node's config, relabelled as node and excluded from streaming."""
+    config = ensure_config()
+    return {
+        **config,
+        "metadata": {**config.get("metadata", {}), "langgraph_node": node},
+        "tags": [*config.get("tags", []), TAG_NOSTREAM],
+    }
+
+
+class Speculator:
+    """
+    Runs the classification node with the predicted response node in parallel.
+
+    Args:
+        classify: (func, afunc) of the classification node
+        responders: Response node name -> (func, afunc)
+        predict: Returns the node a turn is likely routed to, or None to not speculate
+        route: Returns the node the classified state is routed to
+        max_workers: Threads for speculative runs of synchronous turns
+    """
+
+    def __init__(
+        self,
+        classify: tuple,
+        responders: Dict[str, tuple],
+        predict: Callable[[ConversationState], Optional[str]],
+        route: Callable[[ConversationState], str],
+        max_workers: int = 32
+    ):
+        self.classify, self.aclassify = classify
+        self.responders = {name: pair for name, pair in responders.items() if name in SPECULATIVE_NODES}
+        self.predict = predict
+        self.route = route
+        self.stats = SpeculationStats()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculate")
+
+    def _target(self, state: ConversationState) -> Optional[str]:
+        self.stats.turns += 1
+        node = self.predict(state)
+        if node not in self.responders:
+            return None
+        self.stats.attempts += 1
+        return node
+
+    def _settle(self, state: ConversationState, update: dict, node: str, classified: float) -> bool:
+        """Whether the classification routes to node; counts a miss if not."""
+        if self.route({**state, **update}) == node:
+            return True
+        self.stats.misses += 1
+        self.stats.wasted_ms += classified * 1000
+        return False
+
+    def _commit(self, update: dict, node: str, result: tuple, classified: float) -> dict:
+        speculative, seconds = result
+        self.stats.hits += 1
+        # Sequential cost would be classified + seconds; the overlap is saved
+        self.stats.saved_ms += min(classified, seconds) * 1000
+        return {**speculative, **update, "speculated": node}
+
+    # -- sync --------------------------------------------------------------
+
+    def _respond(self, node: str, state: ConversationState) -> tuple:
+        var_child_runnable_config.set(_speculative_config(node))
+        start = time.perf_counter()
+        update = self.responders[node][0](state)
+        return update, time.perf_counter() - start
+
+    def run(self, state: ConversationState) -> dict:
+        node = self._target(state)
+        if node is None:
+            return {**self.classify(state), "speculated": ""}
+        start = time.perf_counter()
+        future = self._pool.submit(contextvars.copy_context().run, self._respond, node, state)
+        try:
+            update = self.classify(state)
+        except BaseException:
+            future.cancel()
+            raise
+        classified = time.perf_counter() - start
+        if not self._settle(state, update, node, classified):
+            # A running thread cannot be stopped; its result is dropped
+            future.cancel()
+            return {**update, "speculated": ""}
+        return self._commit(update, node, future.result(), classified)
+
+    # -- async -------------------------------------------------------------
+
+    async def _arespond(self, node: str, state: ConversationState) -> tuple:
+        # The task runs in its own copy of the context
+        var_child_runnable_config.set(_speculative_config(node))
+        start = time.perf_counter()
+        update = await self.responders[node][1](state)
+        return update, time.perf_counter() - start
+
+    async def arun(self, state: ConversationState) -> dict:
+        node = self._target(state)
+        if node is None:
+            return {**(await self.aclassify(state)), "speculated": ""}
+        start = time.perf_counter()
+        task = asyncio.ensure_future(self._arespond(node, state))
+        try:
+            update = await self.aclassify(state)
+        except BaseException:
+            task.cancel()
+            raise
+        classified = time.perf_counter() - start
+        if not self._settle(state, update, node, classified):
+            task.cancel()
+            return {**update, "speculated": ""}
+        return self._commit(update, node, await task, classified)
+
+
+def speculation_enabled() -> bool:
+    """Whether AUTOSTREAM_SPECULATIVE turns speculation on (off by default)."""
+    return os.getenv("AUTOSTREAM_SPECULATIVE", "off") == "on"
@@ -1,10 +1,43 @@
 """
 Conversation state schema for the AutoStream AI Agent.
 """
-from typing import TypedDict, Optional, List, Literal
+from typing import Annotated, TypedDict, Optional, List, Literal
 from langchain_core.messages import BaseMessage
 
 
+class SharedHistory:
+    """
+    Marker base for message histories a turn may extend in place.
+    
+    The graph copies any other history it is given, so a caller's list is
+    never modified. A SharedHistory (agent.sessions.MessageLog) is adopted by
+    reference instead: the turn appends to it directly and the returned state
+    holds the same object, so saving a turn copies no history. Its owner must
+    not run two turns on it at once or expect it to keep the old contents.
+    """
+    __slots__ = ()
+
+
+def append_messages(left: List[BaseMessage], right: List[BaseMessage]) -> List[BaseMessage]:
+    """
+    Reducer for the append-only message channel.
+    
+    The first write takes a copy of the incoming history (or adopts a
+    SharedHistory as-is) and later writes extend it in place, so nodes
+    returning new messages cost O(new messages).
+    """
+    if not left:
+        return right if isinstance(right, SharedHistory) else list(right)
+    left.extend(right)
+    return left
+
+
+def add_token_usage(left: Optional[dict], right: Optional[dict]) -> dict:
+    """Reducer summing token usage deltas into the conversation's totals."""
+    left, right = left or {}, right or {}
+    return {key: left.get(key, 0) + right.get(key, 0) for key in ("prompt_tokens", "completion_tokens", "calls")}
+
+
 class LeadInfo(TypedDict, total=False):
     """Information collected from a potential lead."""
     name: Optional[str]
@@ -17,8 +50,8 @@ class ConversationState(TypedDict):
     State schema for the AutoStream agent conversation.
     Maintains context across multiple turns.
     """
-    # Conversation history
-    messages: List[BaseMessage]
+    # Conversation history (append-only; nodes return only new messages)
+    messages: Annotated[List[BaseMessage], append_messages]
     
     # Current classified intent
     intent: Literal["greeting", "inquiry", "high_intent", "unknown"]
@@ -31,3 +64,44 @@ class ConversationState(TypedDict):
     
     # Current response to send to user
     response: str
+    
+    # Lead fields extracted by the combined intent+extraction call, and the
+    # message count they were extracted at (reused only on that same turn)
+    extracted_lead: LeadInfo
+    extracted_at: int
+    
+    # Number of messages already scanned for lead info
+    lead_cursor: int
+    
+    # Rolling summary of older messages, how many messages it covers and
+    # their estimated token count
+    summary: str
+    summary_cursor: int
+    summarized_tokens: int
+    
+    # Response node whose speculative result was committed with this turn's
+    # classification ("" if none; see agent.speculation)
+    speculated: str
+    
+    # LLM token usage of the whole conversation (prompt_tokens,
+    # completion_tokens, calls); nodes return deltas (see agent.tokens)
+    token_usage: Annotated[dict, add_token_usage]
+
+
+def new_conversation_state() -> ConversationState:
+    """Return the initial state for a new conversation."""
+    return {
+        "messages": [],
+        "intent": "unknown",
+        "lead_info": {},
+        "lead_captured": False,
+        "response": "",
+        "extracted_lead": {},
+        "extracted_at": -1,
+        "lead_cursor": 0,
+        "summary": "",
+        "summary_cursor": 0,
+        "summarized_tokens": 0,
+        "speculated": "",
+        "token_usage": {}
+    }
@@ -0,0 +1,307 @@
+"""
+Token accounting for the AutoStream AI Agent.
+
+Token counts are local estimates (count_tokens: word pieces of up to four
+characters plus punctuation, roughly what subword tokenizers produce for
+English). A message's count is computed once and cached on the message
+(response_metadata["token_count"]), so it is kept in the conversation state
+and its checkpoints; prompt sizes are sums of cached counts.
+
+TokenAccountant wraps the chat model the nodes call. Before each call it
+sizes the prompt and, when a budget is configured, trims it to fit:
+    turn      prompt tokens all LLM calls of one turn may send
+              (AUTOSTREAM_TOKEN_BUDGET_TURN)
+    session   prompt + completion tokens of a whole conversation
+              (AUTOSTREAM_TOKEN_BUDGET_SESSION)
+Trimming drops history from the oldest end; the system prompt and the
+latest message are always sent, so an exhausted budget shrinks prompts to
+that minimum rather than failing the turn. After each call the usage the
+model reported (or the estimate, if it reported none) is added to the
+node's update under token_usage, which the state sums per conversation.
+"""
+import contextvars
+import os
+import re
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional
+
+from langchain_core.messages import BaseMessage, SystemMessage
+
+from agent.metrics import metrics
+
+
+_PIECE = re.compile(r"\w+|[^\w\s]")
+
+# Role and framing tokens added per message
+MESSAGE_OVERHEAD = 4
+
+# response_metadata key holding a message's cached token count
+CACHE_KEY = "token_count"
+
+
+def count_tokens(text: str) -> int:
+    """Estimated tokens of text."""
+    return sum(1 + (len(piece) - 1) // 4 for piece in _PIECE.findall(text))
+
+
+def _content(message) -> str:
+    content = message.get("content", "") if isinstance(message, dict) else message.content
+    return content if isinstance(content, str) else str(content)
+
+
+def message_tokens(message) -> int:
+    """Tokens of a message (BaseMessage or role dict), counted once per BaseMessage."""
+    if not isinstance(message, BaseMessage):
+        return count_tokens(_content(message)) + MESSAGE_OVERHEAD
+    cached = message.response_metadata.get(CACHE_KEY)
+    if cached is None:
+        cached = count_tokens(_content(message)) + MESSAGE_OVERHEAD
+        message.response_metadata[CACHE_KEY] = cached
+        token_stats.counted += 1
+    else:
+        token_stats.cached += 1
+    return cached
+
+
+def prompt_tokens(messages: list) -> int:
+    """Estimated prompt size of a message list."""
+    return sum(message_tokens(message) for message in messages)
+
+
+def _is_system(message) -> bool:
+    if isinstance(message, dict):
+        return message.get("role") == "system"
+    return isinstance(message, SystemMessage)
+
+
+def fit_prompt(messages: list, limit: int) -> tuple[list, int]:
+    """
+    Drop the oldest history messages until the prompt fits limit tokens.
+    Leading system messages and the last message are always kept.
+
+    Returns:
+        Tuple of (messages, prompt tokens)
+    """
+    sizes = [message_tokens(message) for message in messages]
+    total = sum(sizes)
+    head = 0
+    while head < len(messages) - 1 and _is_system(messages[head]):
+        head += 1
+    drop = head
+    while total > limit and drop < len(messages) - 1:
+        total -= sizes[drop]
+        drop += 1
+    if drop == head:
+        return messages, total
+    return messages[:head] + messages[drop:], total
+
+
+@dataclass
+class TokenStats:
+    """Counters for token accounting across all conversations."""
+    calls: int = 0
+    estimated_prompt_tokens: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    trimmed_calls: int = 0
+    trimmed_messages: int = 0
+    trimmed_tokens: int = 0
+    counted: int = 0
+    cached: int = 0
+
+    def as_dict(self) -> dict:
+        lookups = self.counted + self.cached
+        return {
+            "calls": self.calls,
+            "estimated_prompt_tokens": self.estimated_prompt_tokens,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "trimmed_calls": self.trimmed_calls,
+            "trimmed_messages": self.trimmed_messages,
+            "trimmed_tokens": self.trimmed_tokens,
+            "count_cache_hit_rate": round(self.cached / lookups, 4) if lookups else 0.0,
+        }
+
+
+token_stats = TokenStats()
+metrics.register_stats("tokens", lambda: token_stats.as_dict())
+
+
+class Usage:
+    """Token usage accumulated by the LLM calls of one node run or turn."""
+
+    def __init__(self, base: Optional[dict] = None):
+        self.base = base or {}
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def add(self, prompt: int, completion: int) -> None:
+        with self._lock:
+            self.prompt_tokens += prompt
+            self.completion_tokens += completion
+            self.calls += 1
+
+    def as_dict(self) -> dict:
+        return {"prompt_tokens": self.prompt_tokens, "completion_tokens": self.completion_tokens, "calls": self.calls}
+
+    def session_total(self) -> int:
+        """Prompt and completion tokens of the conversation, including this run."""
+        return (
+            self.base.get("prompt_tokens", 0) + self.base.get("completion_tokens", 0)
+            + self.prompt_tokens + self.completion_tokens
+        )
+
+
+_turn_usage: contextvars.ContextVar[Optional[Usage]] = contextvars.ContextVar("autostream_turn_usage", default=None)
+_node_usage: contextvars.ContextVar[Optional[Usage]] = contextvars.ContextVar("autostream_node_usage", default=None)
+
+
+@contextmanager
+def usage_scope():
+    """Scope one turn: LLM calls inside share the turn's token budget."""
+    token = _turn_usage.set(Usage())
+    try:
+        yield
+    finally:
+        _turn_usage.reset(token)
+
+
+def wrap_node(func, afunc) -> tuple:
+    """
+    Return (func, afunc) that add the token usage of the node's LLM calls
+    (including speculative runs it starts) to its update as token_usage.
+    """
+
+    def finish(update: dict, usage: Usage) -> dict:
+        if not usage.calls:
+            return update
+        metrics.annotate_turn(session_tokens=usage.session_total())
+        return {**update, "token_usage": usage.as_dict()}
+
+    def counted(state):
+        usage = Usage(state.get("token_usage"))
+        token = _node_usage.set(usage)
+        try:
+            update = func(state)
+        finally:
+            _node_usage.reset(token)
+        return finish(update, usage)
+
+    async def acounted(state):
+        usage = Usage(state.get("token_usage"))
+        token = _node_usage.set(usage)
+        try:
+            update = await afunc(state)
+        finally:
+            _node_usage.reset(token)
+        return finish(update, usage)
+
+    return counted, acounted
+
+
+class TokenAccountant:
+    """
+    Sizes, budgets and records the prompts sent to a chat model.
+    Exposes invoke/ainvoke/stream/astream like the wrapped model.
+
+    Args:
+        llm: Chat model (or runnable) to wrap
+        turn_budget: Prompt tokens all calls of one turn may send (0: no limit)
+        session_budget: Prompt + completion tokens of one conversation (0: no limit)
+        stats: Counters to record into
+    """
+
+    def __init__(self, llm, turn_budget: int = 0, session_budget: int = 0, stats: Optional[TokenStats] = None):
+        self.llm = llm
+        self.turn_budget = turn_budget
+        self.session_budget = session_budget
+        self.stats = stats if stats is not None else token_stats
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+    def _limit(self) -> Optional[int]:
+        """Prompt tokens the next call may send, or None if unlimited."""
+        limits = []
+        turn = _turn_usage.get()
+        if self.turn_budget and turn is not None:
+            limits.append(self.turn_budget - turn.prompt_tokens)
+        node = _node_usage.get()
+        if self.session_budget and node is not None:
+            limits.append(self.session_budget - node.session_total())
+        return max(0, min(limits)) if limits else None
+
+    def _prepare(self, messages) -> tuple[list, int]:
+        if not isinstance(messages, list):
+            return messages, 0  # A plain string prompt: not budgeted
+        limit = self._limit()
+        size = prompt_tokens(messages)
+        if limit is not None and size > limit:
+            trimmed, trimmed_size = fit_prompt(messages, limit)
+            if len(trimmed) < len(messages):
+                self.stats.trimmed_calls += 1
+                self.stats.trimmed_messages += len(messages) - len(trimmed)
+                self.stats.trimmed_tokens += size - trimmed_size
+                messages, size = trimmed, trimmed_size
+        self.stats.estimated_prompt_tokens += size
+        return messages, size
+
+    def _record(self, estimate: int, result) -> None:
+        """Record a call's usage as reported by the model, else as estimated."""
+        usage = getattr(result, "usage_metadata", None) or {}
+        prompt = usage.get("input_tokens") or estimate
+        completion = usage.get("output_tokens")
+        if completion is None:
+            completion = count_tokens(_content(result)) if result is not None else 0
+        self.stats.calls += 1
+        self.stats.prompt_tokens += prompt
+        self.stats.completion_tokens += completion
+        for scope in (_turn_usage.get(), _node_usage.get()):
+            if scope is not None:
+                scope.add(prompt, completion)
+
+    def invoke(self, messages, config: Optional[dict] = None, **kwargs):
+        messages, estimate = self._prepare(messages)
+        result = self.llm.invoke(messages, config, **kwargs)
+        self._record(estimate, result)
+        return result
+
+    async def ainvoke(self, messages, config: Optional[dict] = None, **kwargs):
+        messages, estimate = self._prepare(messages)
+        result = await self.llm.ainvoke(messages, config, **kwargs)
+        self._record(estimate, result)
+        return result
+
+    def stream(self, messages, config: Optional[dict] = None, **kwargs):
+        messages, estimate = self._prepare(messages)
+        result = None
+        try:
+            for chunk in self.llm.stream(messages, config, **kwargs):
+                result = chunk if result is None else result + chunk
+                yield chunk
+        finally:
+            # Abandoned streams (e.g. a losing hedge) still cost their prompt
+            self._record(estimate, result)
+
+    async def astream(self, messages, config: Optional[dict] = None, **kwargs):
+        messages, estimate = self._prepare(messages)
+        result = None
+        try:
+            async for chunk in self.llm.astream(messages, config, **kwargs):
+                result = chunk if result is None else result + chunk
+                yield chunk
+        finally:
+            self._record(estimate, result)
+
+
+def token_accountant_from_env(llm) -> TokenAccountant:
+    """Wrap llm with the budgets set by AUTOSTREAM_TOKEN_BUDGET_TURN and _SESSION (0: no limit)."""
+    return TokenAccountant(
+        llm,
+        turn_budget=int(os.getenv("AUTOSTREAM_TOKEN_BUDGET_TURN", "0")),
+        session_budget=int(os.getenv("AUTOSTREAM_TOKEN_BUDGET_SESSION", "0"))
+    )
@@ -1,19 +1,66 @@
 """
-Mock lead capture tool for the AutoStream AI Agent.
+Lead capture tool for the AutoStream AI Agent.
 """
+import threading
+from pathlib import Path
+from typing import Optional
+
+from agent.metrics import metrics
+from agent.tools.lead_sink import LeadSink, lead_sink_from_env
+
+
+# Default directory of the lead file: the project root, not the working directory
+LEADS_DIR = Path(__file__).parent.parent.parent
+
+# Buffered, deduplicating sink, created on the first capture (its flush thread
+# loads the already captured emails); None when AUTOSTREAM_LEAD_SINK=off
+lead_sink: Optional[LeadSink] = None
+_lead_sink_ready = False
+_lead_sink_lock = threading.Lock()
+metrics.register_stats("lead_sink", lambda: lead_sink.stats.as_dict() if lead_sink is not None else None)
+
+
+def get_lead_sink() -> Optional[LeadSink]:
+    """Return the lead sink, creating it from the environment on first use."""
+    global lead_sink, _lead_sink_ready
+    if not _lead_sink_ready:
+        with _lead_sink_lock:
+            if not _lead_sink_ready:
+                lead_sink = lead_sink_from_env(LEADS_DIR)
+                _lead_sink_ready = True
+    return lead_sink
+
+
+def set_lead_sink(sink: Optional[LeadSink]) -> None:
+    """Store captured leads in sink instead (None: do not store them)."""
+    global lead_sink, _lead_sink_ready
+    with _lead_sink_lock:
+        lead_sink = sink
+        _lead_sink_ready = True
+
+
+def close_lead_sink() -> None:
+    """Write the queued leads, if a sink was created."""
+    if lead_sink is not None:
+        lead_sink.close()
 
 
 def mock_lead_capture(name: str, email: str, platform: str) -> str:
     """
     Capture a qualified lead's information.
-    
+
+    The lead is queued on the lead sink and written in the background;
+    a lead whose email was already captured is not stored again.
+
     Args:
         name: The lead's full name
         email: The lead's email address
         platform: The creator platform (YouTube, Instagram, etc.)
-    
+
     Returns:
         Confirmation message
     """
-    print(f"Lead captured successfully: {name}, {email}, {platform}")
+    sink = get_lead_sink()
+    if sink is None or sink.capture(name, email, platform):
+        print(f"Lead captured successfully: {name}, {email}, {platform}")
     return f"Lead captured successfully: {name}, {email}, {platform}"
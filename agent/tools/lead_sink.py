@@ -0,0 +1,280 @@
+"""
+Buffered lead sink for the AutoStream AI Agent.
+
+Captured leads are queued in memory and written to a backend in batches by
+a background thread, so the response path never waits on file or database
+I/O. A batch is flushed once batch_size leads are queued or flush_interval
+seconds have passed. Leads are deduplicated by email: capturing the same
+lead again costs a set lookup and is never written twice.
+
+Two backends are provided: a JSONL file and a SQLite database. Both seed
+the dedupe index with the emails they already hold, so duplicates are also
+skipped across restarts. The flush thread reads them when the sink is
+created; leads captured before it finishes are checked against them before
+they are written.
+"""
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Set
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+
+@dataclass
+class LeadSinkStats:
+    """Counters for a lead sink."""
+    captured: int = 0
+    duplicates: int = 0
+    written: int = 0
+    batches: int = 0
+    failures: int = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "captured": self.captured,
+            "duplicates": self.duplicates,
+            "written": self.written,
+            "batches": self.batches,
+            "failures": self.failures,
+        }
+
+
+class JSONLBackend:
+    """
+    Appends one JSON line per lead to a file.
+
+    Args:
+        path: Output file path
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def known_emails(self) -> Set[str]:
+        emails: Set[str] = set()
+        if not os.path.exists(self.path):
+            return emails
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    emails.add(normalize_email(json.loads(line)["email"]))
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    continue  # Torn or foreign line
+        return emails
+
+    def write_batch(self, leads: List[dict]) -> None:
+        data = "".join(json.dumps(lead, ensure_ascii=False) + "\n" for lead in leads)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class SQLiteBackend:
+    """
+    Stores leads in a SQLite table keyed by email.
+
+    Args:
+        path: Database file path
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # Only the flush thread writes, but known_emails may run elsewhere
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leads ("
+                "email TEXT PRIMARY KEY, name TEXT NOT NULL, platform TEXT NOT NULL, captured_at REAL NOT NULL)"
+            )
+            self._local.conn = conn
+        return conn
+
+    def known_emails(self) -> Set[str]:
+        return {row[0] for row in self._connect().execute("SELECT email FROM leads")}
+
+    def write_batch(self, leads: List[dict]) -> None:
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO leads (email, name, platform, captured_at) VALUES (?, ?, ?, ?)",
+                [(normalize_email(l["email"]), l["name"], l["platform"], l["captured_at"]) for l in leads]
+            )
+
+
+class LeadSink:
+    """
+    Queues leads and flushes them to a backend from a background thread,
+    which first loads the emails the backend already holds.
+
+    Args:
+        backend: JSONLBackend, SQLiteBackend or any object with
+            known_emails() and write_batch(leads)
+        batch_size: Flush as soon as this many leads are queued
+        flush_interval: Flush queued leads at least this often (seconds)
+    """
+
+    def __init__(self, backend, batch_size: int = 50, flush_interval: float = 1.0):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stats = LeadSinkStats()
+        self._seen: Set[str] = set()
+        self._queue: List[dict] = []
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        with self._cond:
+            self._start()
+
+    def _start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="lead-sink", daemon=True)
+            self._thread.start()
+
+    def _load_known(self) -> None:
+        """Seed the dedupe index from the backend and drop queued leads it already holds."""
+        if self._loaded.is_set():
+            return
+        with self._load_lock:
+            if self._loaded.is_set():
+                return
+            try:
+                known = {normalize_email(email) for email in self.backend.known_emails()}
+            except Exception as e:
+                known = set()
+                print(f"Lead sink could not read the captured emails, duplicates may be written: {e}")
+            with self._cond:
+                queued, self._queue = self._queue, []
+                for lead in queued:
+                    if normalize_email(lead["email"]) in known:
+                        self.stats.captured -= 1
+                        self.stats.duplicates += 1
+                    else:
+                        self._queue.append(lead)
+                self._seen |= known
+            self._loaded.set()
+
+    def capture(self, name: str, email: str, platform: str) -> bool:
+        """
+        Queue a lead without blocking on I/O.
+
+        Returns:
+            True if the lead is new, False if this email was already captured.
+            Until the stored emails are loaded, only this process's earlier
+            captures are known; a lead the backend already holds is then
+            dropped before it is written.
+        """
+        key = normalize_email(email)
+        with self._cond:
+            if key in self._seen:
+                self.stats.duplicates += 1
+                return False
+            self._seen.add(key)
+            self.stats.captured += 1
+            self._queue.append({"name": name, "email": email, "platform": platform, "captured_at": time.time()})
+            self._start()
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify()
+        return True
+
+    def flush(self) -> int:
+        """Write everything queued now; return the number of leads written."""
+        self._load_known()
+        with self._write_lock:
+            with self._cond:
+                batch, self._queue = self._queue, []
+            if not batch:
+                return 0
+            try:
+                self.backend.write_batch(batch)
+            except Exception as e:
+                # Requeue in order so the next flush retries the batch
+                with self._cond:
+                    self._queue[:0] = batch
+                    self.stats.failures += 1
+                print(f"Lead sink flush failed ({len(batch)} leads queued for retry): {e}")
+                return 0
+            with self._cond:
+                self.stats.written += len(batch)
+                self.stats.batches += 1
+            return len(batch)
+
+    def _run(self) -> None:
+        self._load_known()
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.flush_interval
+                while not self._closed and len(self._queue) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                closed = self._closed
+            self.flush()
+            if closed:
+                return
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """
+        Stop the flush thread and write everything still queued.
+        Safe to call more than once; a later capture starts a new thread.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        with self._cond:
+            self._closed = False
+            self._thread = None
+        self.flush()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+
+def lead_sink_from_env(default_dir: Path) -> Optional[LeadSink]:
+    """
+    Build the lead sink configured by AUTOSTREAM_LEAD_SINK: "jsonl:<path>",
+    "sqlite:<path>" or "off". Without a path the file is leads.jsonl
+    (leads.db) in default_dir.
+    """
+    setting = os.getenv("AUTOSTREAM_LEAD_SINK", "jsonl:")
+    if setting == "off":
+        return None
+    kind, _, path = setting.partition(":")
+    if kind == "sqlite":
+        backend = SQLiteBackend(path or str(default_dir / "leads.db"))
+    elif kind == "jsonl":
+        backend = JSONLBackend(path or str(default_dir / "leads.jsonl"))
+    else:
+        raise ValueError(
+            f'AUTOSTREAM_LEAD_SINK must be "jsonl:<path>", "sqlite:<path>" or "off", got {setting!r}'
+        )
+    sink = LeadSink(
+        backend,
+        batch_size=int(os.getenv("AUTOSTREAM_LEAD_BATCH_SIZE", "50")),
+        flush_interval=float(os.getenv("AUTOSTREAM_LEAD_FLUSH_SECONDS", "1.0"))
+    )
+    # Final flush on interpreter exit
+    atexit.register(sink.close)
+    return sink
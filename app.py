@@ -1,39 +1,38 @@
 """
 Streamlit UI for the AutoStream AI Agent.
+
+The agent modules are imported when first needed, and all sessions share
+the process-wide compiled agent (agent.graph.get_agent) instead of
+building one per session. Each session keeps its conversation as an
+agent.sessions.CompactSession.
 """
 import os
 import streamlit as st
 from dotenv import load_dotenv
-from langchain_core.messages import HumanMessage, AIMessage
-
-from agent.graph import create_agent, run_conversation
-from agent.state import ConversationState
 
 
 # Load environment variables
 load_dotenv()
 
 
+def session_agent():
+    """The shared agent for this session's API key, or None without a key."""
+    if not st.session_state.api_key:
+        return None
+    from agent.graph import get_agent
+    return get_agent(st.session_state.api_key)
+
+
 def initialize_session_state():
     """Initialize Streamlit session state variables."""
-    if "agent" not in st.session_state:
-        api_key = os.getenv("GOOGLE_API_KEY")
-        if api_key:
-            st.session_state.agent = create_agent(api_key)
-        else:
-            st.session_state.agent = None
+    if "api_key" not in st.session_state:
+        st.session_state.api_key = os.getenv("GOOGLE_API_KEY")
     
-    if "conversation_state" not in st.session_state:
-        st.session_state.conversation_state = {
-            "messages": [],
-            "intent": "unknown",
-            "lead_info": {},
-            "lead_captured": False,
-            "response": ""
-        }
-    
-    if "chat_history" not in st.session_state:
-        st.session_state.chat_history = []
+    # The conversation, kept compact between turns; its message log is
+    # also the chat history shown on the page
+    if "session" not in st.session_state:
+        from agent.sessions import CompactSession
+        st.session_state.session = CompactSession()
 
 
 def main():
@@ -80,11 +79,12 @@ def main():
     st.divider()
     
     # Sidebar with info
+    session = st.session_state.session
     with st.sidebar:
         st.header("📊 Conversation Status")
         
         # Show current intent
-        intent = st.session_state.conversation_state.get("intent", "unknown")
+        intent = session.intent
         intent_emoji = {
             "greeting": "👋",
             "inquiry": "❓",
@@ -94,7 +94,7 @@ def main():
         st.metric("Current Intent", f"{intent_emoji.get(intent, '🔍')} {intent.title()}")
         
         # Show lead info if any
-        lead_info = st.session_state.conversation_state.get("lead_info", {})
+        lead_info = session.lead_info
         if lead_info:
             st.subheader("📋 Lead Information")
             st.write(f"**Name:** {lead_info.get('name', 'Not provided')}")
@@ -102,7 +102,7 @@ def main():
             st.write(f"**Platform:** {lead_info.get('platform', 'Not provided')}")
         
         # Show lead captured status
-        if st.session_state.conversation_state.get("lead_captured", False):
+        if session.lead_captured:
             st.success("✅ Lead Captured!")
         
         st.divider()
@@ -119,7 +119,7 @@ def main():
         if st.button("Update API Key"):
             if api_key_input:
                 os.environ["GOOGLE_API_KEY"] = api_key_input
-                st.session_state.agent = create_agent(api_key_input)
+                st.session_state.api_key = api_key_input
                 st.success("API Key updated!")
                 st.rerun()
         
@@ -127,18 +127,12 @@ def main():
         
         # Reset button
         if st.button("🔄 Reset Conversation"):
-            st.session_state.conversation_state = {
-                "messages": [],
-                "intent": "unknown",
-                "lead_info": {},
-                "lead_captured": False,
-                "response": ""
-            }
-            st.session_state.chat_history = []
+            from agent.sessions import CompactSession
+            st.session_state.session = CompactSession()
             st.rerun()
     
     # Check for API key
-    if not st.session_state.agent:
+    if not st.session_state.api_key:
         st.warning("⚠️ Please configure your Google API Key in the sidebar to start chatting.")
         st.info("""
         **How to get an API key:**
@@ -149,9 +143,9 @@ def main():
         return
     
     # Display chat history
-    for message in st.session_state.chat_history:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
+    for role, text in session.messages.turns():
+        with st.chat_message(role):
+            st.markdown(text)
     
     # Chat input
     if prompt := st.chat_input("Type your message here..."):
@@ -159,41 +153,28 @@ def main():
         with st.chat_message("user"):
             st.markdown(prompt)
         
-        # Add to chat history
-        st.session_state.chat_history.append({
-            "role": "user",
-            "content": prompt
-        })
-        
         # Get response from agent
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                try:
-                    state, response = run_conversation(
-                        st.session_state.agent,
-                        st.session_state.conversation_state,
-                        prompt
-                    )
-                    st.session_state.conversation_state = state
-                    st.markdown(response)
-                    
-                    # Add to chat history
-                    st.session_state.chat_history.append({
-                        "role": "assistant",
-                        "content": response
-                    })
+            try:
+                from agent.graph import stream_conversation
+                
+                # Render tokens as they arrive instead of waiting for the full response
+                was_captured = session.lead_captured
+                stream = stream_conversation(session_agent(), session.state(), prompt)
+                st.write_stream(stream)
+                session.update(stream.state)
+                
+                # Show lead captured notification
+                if session.lead_captured and not was_captured:
+                    st.balloons()
                     
-                    # Show lead captured notification
-                    if state.get("lead_captured", False) and len([m for m in st.session_state.chat_history if "Lead captured" in m.get("content", "")]) == 0:
-                        st.balloons()
-                        
-                except Exception as e:
-                    st.error(f"Error: {str(e)}")
+            except Exception as e:
+                st.error(f"Error: {str(e)}")
         
         st.rerun()
     
     # Welcome message if no chat history
-    if not st.session_state.chat_history:
+    if not session.messages:
         st.info("""
         👋 **Welcome to AutoStream!**
         
@@ -0,0 +1,103 @@
+"""
+Benchmark: SQLite checkpointer save/load latency with many sessions.
+
+Writes --turns checkpoints for each of --sessions threads (interleaved, as a
+server would), then loads random threads with the in-memory cache cleared
+so every load reads its snapshot and tail from the database. Reports
+latency percentiles for put and get_tuple and the database size.
+
+Usage:
+    python -m benchmarks.bench_checkpoint [--sessions 10000] [--turns 6] [--compact-every 20]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.base.id import uuid6
+
+from agent.checkpoint import SQLiteCheckpointer
+from agent.state import new_conversation_state
+from benchmarks.common import percentiles
+
+
+def make_checkpoint(state: dict, turn: int) -> dict:
+    checkpoint = empty_checkpoint()
+    checkpoint["id"] = str(uuid6())
+    checkpoint["channel_values"] = dict(state)
+    checkpoint["channel_versions"] = {key: turn for key in state}
+    return checkpoint
+
+
+def bench(sessions: int, turns: int, compact_every: int, loads: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "checkpoints.db")
+        saver = SQLiteCheckpointer(path, compact_every=compact_every, cache_size=sessions)
+
+        states = {f"thread-{i}": new_conversation_state() for i in range(sessions)}
+        parents = {}
+        put_times = []
+        for turn in range(1, turns + 1):
+            for thread_id, state in states.items():
+                state["messages"].append(HumanMessage(content=f"Question {turn}: how much is the Pro plan?"))
+                state["messages"].append(AIMessage(content="The Pro plan is $79/month with unlimited 4K videos. " * 3))
+                state["intent"] = "inquiry"
+                config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+                if thread_id in parents:
+                    config["configurable"]["checkpoint_id"] = parents[thread_id]
+                start = time.perf_counter()
+                saved = saver.put(config, make_checkpoint(state, turn), {"source": "loop", "step": turn}, {})
+                put_times.append(time.perf_counter() - start)
+                parents[thread_id] = saved["configurable"]["checkpoint_id"]
+
+        # Cold loads: clear the cache and use a fresh saver (another process)
+        reader = SQLiteCheckpointer(path, compact_every=compact_every)
+        thread_ids = random.Random(0).sample(list(states), min(loads, sessions))
+        load_times = []
+        for thread_id in thread_ids:
+            start = time.perf_counter()
+            loaded = reader.get_tuple({"configurable": {"thread_id": thread_id}})
+            load_times.append(time.perf_counter() - start)
+            assert len(loaded.checkpoint["channel_values"]["messages"]) == turns * 2
+
+        db_bytes = sum(
+            os.path.getsize(path + suffix) for suffix in ("", "-wal") if os.path.exists(path + suffix)
+        )
+        return {
+            "sessions": sessions,
+            "turns": turns,
+            "compact_every": compact_every,
+            "put": percentiles(put_times),
+            "get_tuple_cold": percentiles(load_times),
+            "db_bytes": db_bytes,
+            "bytes_per_session": db_bytes // sessions,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument("--compact-every", type=int, default=20)
+    parser.add_argument("--loads", type=int, default=2000, help="Number of cold loads to time")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    result = bench(args.sessions, args.turns, args.compact_every, args.loads)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"{result['sessions']} sessions x {result['turns']} turns, compact every {result['compact_every']}")
+    for name in ("put", "get_tuple_cold"):
+        r = result[name]
+        print(f"  {name:<15} p50 {r['p50_ms']:>7} ms  p95 {r['p95_ms']:>7} ms  "
+              f"p99 {r['p99_ms']:>7} ms  max {r['max_ms']:>7} ms")
+    print(f"  database        {result['db_bytes'] / 1e6:.1f} MB ({result['bytes_per_session']} bytes/session)")
+
+
+if __name__ == "__main__":
+    main()
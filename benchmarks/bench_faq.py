@@ -0,0 +1,126 @@
+"""
+Benchmark: direct FAQ matching (agent.knowledge.faq) on large FAQ sets.
+
+Generates --entries synthetic FAQ questions and times lookups of:
+    verbatim    a question with case and punctuation changed (exact path)
+    reworded    a question with stopwords added and word order shuffled
+                (fuzzy path; same content tokens)
+    changed     a question with one content word replaced (should usually
+                not match at the default threshold)
+    unrelated   random words (should not match)
+
+Reports build time, match rate and lookup latency per query kind, and the
+latency of a brute-force Jaccard scan over every entry for comparison.
+
+Usage:
+    python -m benchmarks.bench_faq [--entries 10000,100000] [--queries 2000] [--threshold 0.8]
+"""
+import argparse
+import json
+import random
+import time
+
+from agent.knowledge.faq import FAQMatcher
+from agent.knowledge.retrieval import tokenize
+from benchmarks.common import percentiles
+
+
+TOPICS = [
+    "refund", "invoice", "caption", "export", "resolution", "template", "watermark", "upload",
+    "subtitle", "thumbnail", "storage", "team", "seat", "discount", "trial", "billing", "account",
+    "password", "integration", "youtube", "instagram", "tiktok", "twitch", "render", "audio",
+    "music", "font", "brand", "logo", "transition", "filter", "clip", "timeline", "preview",
+    "license", "coupon", "student", "nonprofit", "api", "webhook", "language", "translation",
+]
+VERBS = ["change", "cancel", "add", "remove", "enable", "disable", "download", "share", "schedule", "edit"]
+OBJECTS = ["plan", "video", "project", "workspace", "channel", "library", "draft", "export", "asset", "profile"]
+FILLER = ["please", "can", "you", "tell", "me", "how", "do", "i", "the", "my", "about"]
+
+
+def make_entries(n: int, rng: random.Random) -> list:
+    entries, seen = [], set()
+    while len(entries) < n:
+        words = [rng.choice(VERBS), rng.choice(TOPICS), rng.choice(TOPICS), rng.choice(OBJECTS),
+                 f"{rng.choice(OBJECTS)}{rng.randint(0, 999)}"]
+        question = f"How do I {words[0]} the {words[1]} {words[2]} for my {words[3]} {words[4]}?"
+        if question in seen:
+            continue
+        seen.add(question)
+        entries.append({"question": question, "answer": f"Answer {len(entries)}"})
+    return entries
+
+
+def make_query(kind: str, entries: list, rng: random.Random) -> str:
+    question = rng.choice(entries)["question"]
+    if kind == "verbatim":
+        return question.upper().rstrip("?") + " ?!"
+    words = question.rstrip("?").split()
+    if kind == "reworded":
+        rng.shuffle(words)
+        return " ".join(rng.sample(FILLER, 3) + words) + "?"
+    if kind == "changed":
+        content = [i for i, w in enumerate(words) if tokenize(w)]
+        words[rng.choice(content)] = f"zz{rng.randint(0, 10 ** 6)}"
+        return " ".join(words) + "?"
+    return " ".join(rng.choice(TOPICS + VERBS) for _ in range(5)) + "?"
+
+
+def brute_force(entries_tokens: list, text: str) -> float:
+    tokens = frozenset(tokenize(text))
+    return max((len(tokens & other) / len(tokens | other) for other in entries_tokens), default=0.0)
+
+
+def bench(n: int, queries: int, threshold: float, seed: int) -> dict:
+    rng = random.Random(seed)
+    entries = make_entries(n, rng)
+    start = time.perf_counter()
+    matcher = FAQMatcher(entries, threshold=threshold)
+    build_s = time.perf_counter() - start
+
+    result = {"entries": n, "build_s": round(build_s, 3), "kinds": {}}
+    for kind in ("verbatim", "reworded", "changed", "unrelated"):
+        texts = [make_query(kind, entries, rng) for _ in range(queries)]
+        times, matched = [], 0
+        for text in texts:
+            start = time.perf_counter()
+            found = matcher.match(text)
+            times.append(time.perf_counter() - start)
+            matched += found is not None
+        result["kinds"][kind] = {"match_rate": round(matched / queries, 4), "lookup": percentiles(times)}
+
+    entries_tokens = [frozenset(tokenize(e["question"])) for e in entries]
+    scan_times = []
+    for _ in range(min(queries, 50)):
+        text = make_query("reworded", entries, rng)
+        start = time.perf_counter()
+        brute_force(entries_tokens, text)
+        scan_times.append(time.perf_counter() - start)
+    result["brute_force_scan"] = percentiles(scan_times)
+    result["stats"] = matcher.stats.as_dict()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", default="10000,100000", help="Comma-separated FAQ set sizes")
+    parser.add_argument("--queries", type=int, default=2000, help="Lookups per query kind")
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = [bench(int(n), args.queries, args.threshold, args.seed) for n in args.entries.split(",")]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        print(f"{r['entries']} entries, built in {r['build_s']} s")
+        for kind, k in r["kinds"].items():
+            print(f"  {kind:<10} match rate {k['match_rate']:<7} p50 {k['lookup']['p50_ms']} ms  "
+                  f"p99 {k['lookup']['p99_ms']} ms")
+        scan = r["brute_force_scan"]
+        print(f"  brute-force scan          p50 {scan['p50_ms']} ms  p99 {scan['p99_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark: the on-disk knowledge index (agent.knowledge.index) on large
+synthetic corpora.
+
+Writes --files Markdown support articles (a few sections each, words drawn
+from a Zipf-distributed vocabulary of --vocabulary terms plus the product
+topics) to a temporary directory and measures:
+    cold build      first index build (every file parsed)
+    warm start      a new indexer (as in a new worker process) opening the
+                    existing index: a stat of every file, no parsing
+    incremental     rebuild after one file changes (one file parsed, the
+                    postings merged)
+    search          query latency over the memory-mapped postings
+
+Usage:
+    python -m benchmarks.bench_knowledge_index [--files 1000,10000] [--queries 2000] [--vocabulary 50000]
+"""
+import argparse
+import itertools
+import json
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from agent.knowledge.index import KnowledgeIndexer
+from benchmarks.bench_faq import TOPICS, VERBS, OBJECTS
+from benchmarks.common import percentiles
+
+
+class Vocabulary:
+    """Product words followed by synthetic terms, sampled with Zipf(1) frequencies."""
+
+    def __init__(self, size: int, rng: random.Random):
+        syllables = ["ka", "lo", "mi", "ra", "te", "su", "vo", "ne", "pi", "do", "ze", "fu"]
+        words = TOPICS + VERBS + OBJECTS
+        for length in itertools.count(2):
+            for parts in itertools.product(syllables, repeat=length):
+                if len(words) >= size:
+                    break
+                words.append("".join(parts))
+            if len(words) >= size:
+                break
+        rng.shuffle(words)
+        self.words = words
+        self.weights = list(itertools.accumulate(1.0 / rank for rank in range(1, len(words) + 1)))
+        self.rng = rng
+
+    def sample(self, k: int) -> list:
+        return self.rng.choices(self.words, cum_weights=self.weights, k=k)
+
+
+def write_article(path: Path, n: int, vocabulary: Vocabulary, rng: random.Random) -> None:
+    lines = [f"# How to {rng.choice(VERBS)} {rng.choice(TOPICS)} {rng.choice(OBJECTS)} ({n})", ""]
+    for _ in range(rng.randint(2, 5)):
+        lines += [f"## {rng.choice(TOPICS).title()} {' '.join(vocabulary.sample(2))}", ""]
+        for _ in range(rng.randint(1, 3)):
+            lines += [" ".join(vocabulary.sample(rng.randint(20, 60))) + ".", ""]
+    path.write_text("\n".join(lines), encoding="utf-8")
+
+
+def disk_bytes(directory: Path) -> int:
+    return sum(p.stat().st_size for p in directory.rglob("*") if p.is_file())
+
+
+def bench(n: int, queries: int, vocabulary_size: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    vocabulary = Vocabulary(vocabulary_size, rng)
+    root = Path(tempfile.mkdtemp(prefix="kb-bench-"))
+    try:
+        sources, index_dir = root / "knowledge", root / "index"
+        for i in range(n):
+            folder = sources / f"section{i % 20}"
+            folder.mkdir(parents=True, exist_ok=True)
+            write_article(folder / f"article{i}.md", i, vocabulary, rng)
+
+        start = time.perf_counter()
+        indexer = KnowledgeIndexer(sources, index_dir)
+        index = indexer.update()
+        cold_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        worker = KnowledgeIndexer(sources, index_dir)
+        worker.update()
+        warm_s = time.perf_counter() - start
+
+        write_article(sources / "section0" / "article0.md", n, vocabulary, rng)
+        start = time.perf_counter()
+        index = indexer.update()
+        incremental_s = time.perf_counter() - start
+
+        times = []
+        for _ in range(queries):
+            text = f"how do i {rng.choice(VERBS)} {rng.choice(TOPICS)} {' '.join(vocabulary.sample(3))}"
+            start = time.perf_counter()
+            index.search(text, 4)
+            times.append(time.perf_counter() - start)
+
+        return {
+            "files": n,
+            "chunks": len(index),
+            "cold_build_s": round(cold_s, 3),
+            "warm_start_ms": round(warm_s * 1000, 2),
+            "incremental_s": round(incremental_s, 3),
+            "index_mb": round(disk_bytes(index_dir) / 2 ** 20, 1),
+            "search": percentiles(times),
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", default="1000,10000", help="Comma-separated corpus sizes (files)")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--vocabulary", type=int, default=50000, help="Distinct terms in the corpus")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = [bench(int(n), args.queries, args.vocabulary, args.seed) for n in args.files.split(",")]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        print(f"{r['files']} files, {r['chunks']} chunks, {r['index_mb']} MB on disk")
+        print(f"  cold build {r['cold_build_s']} s  warm start {r['warm_start_ms']} ms  "
+              f"one file changed {r['incremental_s']} s")
+        print(f"  search p50 {r['search']['p50_ms']} ms  p99 {r['search']['p99_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
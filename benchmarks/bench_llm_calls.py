@@ -0,0 +1,95 @@
+"""
+Benchmark: LLM calls and latency per turn, combined vs two-call extraction.
+
+Runs scripted high-intent conversations through the agent with a fake LLM
+in both extraction modes and reports LLM calls per turn, turn latency and
+prompt tokens per call of each kind.
+
+The answer cache is disabled so both modes do the same work. Pass
+--no-fast-path to also disable the local intent classifier, which shows the
+difference on turns where the LLM must classify the intent.
+
+Usage:
+    python -m benchmarks.bench_llm_calls [--latency 0.2] [--conversations 20] [--no-fast-path]
+"""
+import argparse
+import contextlib
+import io
+import json
+import time
+
+from agent.graph import create_agent, run_conversation, EXTRACTION_MODES
+from agent.nodes import intent, rag
+from agent.state import new_conversation_state
+from benchmarks.fake_llm import FakeChatModel
+
+
+SCRIPTS = [
+    ["Hi there", "What does the Pro plan include?", "Sounds good, I want to try it for my YouTube channel",
+     "I'm Alex", "alex@example.com"],
+    ["How much is the Basic plan?", "OK I'd like to sign up. I'm Sam, sam@example.com, I post on TikTok"],
+    ["I'm ready to subscribe", "My name is Priya", "priya@example.com", "Instagram"],
+    ["What does the Pro plan include?", "Do you support 4K?", "What is your refund policy?",
+     "Which platforms do you support?", "Is support 24/7?", "OK, sign me up. I'm Jo, jo@example.com, I'm on Twitch"],
+]
+
+
+def bench(mode: str, latency: float, conversations: int) -> dict:
+    llm = FakeChatModel(latency=latency)
+    agent = create_agent("fake-key", llm=llm, extraction_mode=mode)
+    turns = 0
+    lead_turns = 0
+    lead_calls = 0
+    lead_latency = 0.0
+    start = time.perf_counter()
+    for i in range(conversations):
+        state = new_conversation_state()
+        for message in SCRIPTS[i % len(SCRIPTS)]:
+            before = sum(llm.calls.values())
+            turn_start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                state, _ = run_conversation(agent, state, message)
+            turns += 1
+            if state["intent"] == "high_intent":
+                lead_turns += 1
+                lead_calls += sum(llm.calls.values()) - before
+                lead_latency += time.perf_counter() - turn_start
+    elapsed = time.perf_counter() - start
+    total_calls = sum(llm.calls.values())
+    return {
+        "mode": mode,
+        "turns": turns,
+        "llm_calls": total_calls,
+        "calls_per_turn": round(total_calls / turns, 3),
+        "calls_per_lead_turn": round(lead_calls / max(lead_turns, 1), 3),
+        "mean_turn_ms": round(elapsed * 1000 / turns, 2),
+        "mean_lead_turn_ms": round(lead_latency * 1000 / max(lead_turns, 1), 2),
+        "calls_by_kind": dict(llm.calls),
+        "prompt_tokens_per_call": {kind: round(llm.prompt_tokens[kind] / n) for kind, n in llm.calls.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake LLM latency in seconds")
+    parser.add_argument("--conversations", type=int, default=9)
+    parser.add_argument("--no-fast-path", action="store_true", help="Disable the local intent classifier")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    rag.answer_cache = None
+    if args.no_fast_path:
+        intent.fast_classifier.threshold = float("inf")
+
+    results = [bench(mode, args.latency, args.conversations) for mode in EXTRACTION_MODES]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        print(f"{r['mode']:>9}: {r['calls_per_turn']} calls/turn, {r['calls_per_lead_turn']} calls/lead turn, "
+              f"{r['mean_turn_ms']} ms/turn, {r['mean_lead_turn_ms']} ms/lead turn  {r['calls_by_kind']}")
+        print(f"{'':>11}prompt tokens/call: {r['prompt_tokens_per_call']}")
+
+
+if __name__ == "__main__":
+    main()
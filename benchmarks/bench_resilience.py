@@ -0,0 +1,104 @@
+"""
+Benchmark: turn latency and failures with a faulty LLM, with and without
+the resilience layer (agent.resilience).
+
+Runs the same seeded conversations against FaultyChatModel, which raises
+on --error-rate of calls and hangs for --hang-seconds on --hang-rate of
+them, once with ResilientLLM (turn budget, retries, hedging, circuit
+breaker) and once with the bare model. Reports p50/p95/p99 turn latency,
+turns that raised, turns answered in degraded mode and the hedging and
+retry counters.
+
+Usage:
+    python -m benchmarks.bench_resilience [--turns 300] [--concurrency 16] [--error-rate 0.05]
+        [--hang-rate 0.02] [--hang-seconds 10] [--budget 3] [--json]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import time
+
+from agent.graph import arun_conversation, create_agent
+from agent.metrics import metrics
+from agent.nodes import rag
+from agent.state import new_conversation_state
+from agent.tools import lead_capture
+from benchmarks.common import percentiles
+from benchmarks.fake_llm import FaultyChatModel
+from benchmarks.loadgen import QUESTIONS
+
+
+async def _run(agent, turns: int, concurrency: int) -> dict:
+    samples, errors = [], 0
+    queue = list(range(turns))
+
+    async def worker() -> None:
+        nonlocal errors
+        while queue:
+            i = queue.pop()
+            start = time.perf_counter()
+            try:
+                await arun_conversation(agent, new_conversation_state(), QUESTIONS[i % len(QUESTIONS)])
+            except Exception:
+                errors += 1
+            samples.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return {"turns": len(samples), "errors": errors, "turn": percentiles(samples)}
+
+
+def bench(turns: int, concurrency: int, latency: str, error_rate: float, hang_rate: float,
+          hang_seconds: float, budget: float, seed: int) -> dict:
+    # Every turn should reach the LLM: no answer reuse, no lead file writes
+    rag.answer_cache = None
+    lead_capture.set_lead_sink(None)
+    os.environ["AUTOSTREAM_LLM_RESILIENCE"] = "on"
+    os.environ["AUTOSTREAM_LLM_TURN_BUDGET"] = str(budget)
+
+    results = {}
+    for mode in ("resilient", "bare"):
+        llm = FaultyChatModel(latency_dist=latency, seed=seed, error_rate=error_rate,
+                              hang_rate=hang_rate, hang_seconds=hang_seconds, fault_seed=seed)
+        agent = create_agent("fake-key", llm=llm, resilient=None if mode == "resilient" else False)
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = asyncio.run(_run(agent, turns, concurrency))
+        result["faults"] = dict(llm.faults)
+        if mode == "resilient":
+            result["resilience"] = metrics.component_stats()["llm_resilience"]
+        results[mode] = result
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", default="lognormal:0.2,0.4", help="Fake LLM latency distribution")
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--hang-rate", type=float, default=0.02)
+    parser.add_argument("--hang-seconds", type=float, default=10.0)
+    parser.add_argument("--budget", type=float, default=3.0, help="Per-turn LLM budget (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = bench(args.turns, args.concurrency, args.latency, args.error_rate, args.hang_rate,
+                    args.hang_seconds, args.budget, args.seed)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for mode, r in results.items():
+        t = r["turn"]
+        print(f"{mode:<10} p50 {t['p50_ms']:>8} ms  p95 {t['p95_ms']:>8} ms  p99 {t['p99_ms']:>8} ms  "
+              f"{r['errors']} failed turns  faults {r['faults']}")
+    stats = results["resilient"]["resilience"]
+    print(f"resilient  retries {stats['retries']}  timeouts {stats['timeouts']}  hedges {stats['hedges']} "
+          f"({stats['hedge_wins']} won)  degraded {stats['degraded']}  rejected {stats['rejected']}  "
+          f"abandoned {stats['abandoned']}")
+
+
+if __name__ == "__main__":
+    main()
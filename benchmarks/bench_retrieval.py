@@ -0,0 +1,100 @@
+"""
+Benchmark: full knowledge base prompt vs top-k retrieval.
+
+Grows the AutoStream knowledge base with synthetic FAQ entries and compares
+the prompt size and build time of format_knowledge_base (the whole KB in
+every prompt) against BM25 top-k retrieval within a character budget.
+
+Usage:
+    python -m benchmarks.bench_retrieval [--sizes 10 100 1000 5000]
+"""
+import argparse
+import json
+import random
+import time
+
+from agent.nodes.rag import load_knowledge_base, format_knowledge_base, RAG_TOP_K, RAG_CONTEXT_CHARS
+from agent.knowledge.retrieval import BM25Index, chunk_knowledge_base, select_within_budget, format_chunks
+
+
+TOPICS = [
+    "export", "captions", "subtitles", "templates", "music", "transitions", "thumbnails",
+    "collaboration", "storage", "upload", "render", "color", "audio", "branding", "watermark",
+    "scheduling", "analytics", "shorts", "reels", "livestream", "podcast", "billing", "invoice",
+    "team", "seats", "api", "integrations", "fonts", "stickers", "effects",
+]
+QUERIES = [
+    "How much is the Pro plan?",
+    "Can I get a refund after a week?",
+    "Do you support TikTok?",
+    "How do I add captions to my reels?",
+    "Is there a watermark on exported videos?",
+]
+
+
+def synthetic_kb(n_faq: int, seed: int = 0) -> dict:
+    """Return the real KB padded with n_faq synthetic FAQ entries."""
+    rng = random.Random(seed)
+    kb = load_knowledge_base()
+    faq = list(kb["faq"])
+    for i in range(n_faq):
+        a, b = rng.sample(TOPICS, 2)
+        faq.append({
+            "question": f"How does {a} work with {b} in workflow {i}?",
+            "answer": f"AutoStream handles {a} and {b} automatically for workflow {i}. "
+                      f"Pro users get priority {a} processing."
+        })
+    return {**kb, "faq": faq}
+
+
+def bench(n_faq: int, repeat: int = 20) -> dict:
+    kb = synthetic_kb(n_faq)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        full_text = format_knowledge_base(kb)
+    full_ms = (time.perf_counter() - start) * 1000 / repeat
+
+    start = time.perf_counter()
+    index = BM25Index(chunk_knowledge_base(kb))
+    build_ms = (time.perf_counter() - start) * 1000
+
+    sizes = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in QUERIES:
+            chunks = [c for c, _ in index.search(query, RAG_TOP_K)]
+            text = format_chunks(select_within_budget(chunks, RAG_CONTEXT_CHARS))
+            sizes.append(len(text))
+    search_ms = (time.perf_counter() - start) * 1000 / (repeat * len(QUERIES))
+
+    return {
+        "faq_entries": len(kb["faq"]),
+        "chunks": len(index),
+        "full_prompt_chars": len(full_text),
+        "full_format_ms": round(full_ms, 3),
+        "topk_prompt_chars": round(sum(sizes) / len(sizes), 1),
+        "topk_search_ms": round(search_ms, 3),
+        "index_build_ms": round(build_ms, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = [bench(n) for n in args.sizes]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'faq':>6} {'full chars':>11} {'full ms':>8} {'top-k chars':>12} {'top-k ms':>9} {'build ms':>9}")
+    for r in results:
+        print(f"{r['faq_entries']:>6} {r['full_prompt_chars']:>11} {r['full_format_ms']:>8} "
+              f"{r['topk_prompt_chars']:>12} {r['topk_search_ms']:>9} {r['index_build_ms']:>9}")
+
+
+if __name__ == "__main__":
+    main()
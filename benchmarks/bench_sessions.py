@@ -0,0 +1,135 @@
+"""
+Benchmark: memory per idle conversation, ConversationState vs agent.sessions.
+
+Runs --sessions generated visitor conversations (the load generator's
+scripts, extended with --extra questions) through the agent with the
+zero-latency fake LLM, once on plain ConversationState dicts and once
+through a SessionStore, and reports the retained bytes per session of:
+    state           the ConversationState dicts (LangChain message objects)
+    state+history   plus the per-session chat_history list of dicts the
+                    Streamlit app used to keep alongside the state
+    compact         CompactSessions after save (no message objects)
+    frozen          CompactSessions with their texts compressed
+Retained size is the total size of all objects reachable from the sessions
+(classes, modules and functions excluded), each object counted once, divided
+by the number of sessions. Also checks both runs gave the same replies and
+reports the mean turn time of each.
+
+Usage:
+    python -m benchmarks.bench_sessions [--sessions 1000] [--extra 0,10] [--seed 0]
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import random
+import sys
+import time
+import types
+
+from agent.graph import create_agent, run_conversation
+from agent.nodes import rag
+from agent.sessions import SessionStore
+from agent.state import new_conversation_state
+from agent.tools import lead_capture
+from benchmarks.fake_llm import FakeChatModel
+from benchmarks.loadgen import QUESTIONS, generate_script
+
+
+SHARED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+def retained_bytes(roots) -> int:
+    """Total size of the objects reachable from roots, each counted once."""
+    seen = set()
+    stack = list(roots)
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, SHARED_TYPES):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+    return total
+
+
+def bench(sessions: int, extra: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    scripts = []
+    for i in range(sessions):
+        turns = generate_script(rng, i).turns
+        scripts.append(turns + [rng.choice(QUESTIONS) for _ in range(extra)])
+
+    agent = create_agent("fake-key", llm=FakeChatModel(latency_dist="const:0", seed=seed))
+    states, histories = [], []
+    store = SessionStore(cold_after=0.0)
+    plain_s = compact_s = 0.0
+    turns = mismatches = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i, script in enumerate(scripts):
+            state, history = new_conversation_state(), []
+            for message in script:
+                start = time.perf_counter()
+                state, reply = run_conversation(agent, state, message)
+                plain_s += time.perf_counter() - start
+                history += [{"role": "user", "content": message}, {"role": "assistant", "content": reply}]
+
+                start = time.perf_counter()
+                compact_state, compact_reply = run_conversation(agent, store.load(str(i)), message)
+                store.save(str(i), compact_state)
+                compact_s += time.perf_counter() - start
+                mismatches += compact_reply != reply
+                turns += 1
+            states.append(state)
+            histories.append(history)
+
+    compact = [store.get(str(i)) for i in range(sessions)]
+    state_bytes = retained_bytes(states)
+    result = {
+        "sessions": sessions,
+        "messages_per_session": round(sum(len(s["messages"]) for s in states) / sessions, 1),
+        "bytes_per_session": {
+            "state": state_bytes // sessions,
+            "state+history": retained_bytes([states, histories]) // sessions,
+            "compact": retained_bytes(compact) // sessions,
+        },
+        "turn_ms": {
+            "state": round(plain_s * 1000 / turns, 3),
+            "compact": round(compact_s * 1000 / turns, 3),
+        },
+        "reply_mismatches": mismatches,
+    }
+    store.sweep(now=time.monotonic() + 1)
+    result["bytes_per_session"]["frozen"] = retained_bytes(compact) // sessions
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--extra", default="0,10", help="Comma-separated extra questions per conversation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    # Measure the sessions: no answer reuse, no lead file writes
+    rag.answer_cache = None
+    lead_capture.set_lead_sink(None)
+
+    results = [bench(args.sessions, int(extra), args.seed) for extra in args.extra.split(",")]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        sizes = r["bytes_per_session"]
+        print(f"{r['sessions']} sessions, {r['messages_per_session']} messages each "
+              f"(turn {r['turn_ms']['state']} ms plain, {r['turn_ms']['compact']} ms compact, "
+              f"{r['reply_mismatches']} reply mismatches)")
+        for name, size in sizes.items():
+            print(f"  {name:<14} {size:>8} bytes/session  ({size / sizes['state']:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
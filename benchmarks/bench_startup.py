@@ -0,0 +1,123 @@
+"""
+Benchmark: process startup (cold imports and first turn).
+
+Each measurement runs in a fresh interpreter:
+    imports      `python -X importtime -c "import <module>"` for each entry
+                 module: total import time and the top-level packages that
+                 spend the most of it
+    first turn   import agent.graph, build the agent (get_agent) and answer
+                 one message with the zero-latency fake LLM; also checks that
+                 building a Gemini-backed agent does not import the Gemini
+                 client library (clients are created on first call)
+
+Usage:
+    python -m benchmarks.bench_startup [--modules agent.main,agent.graph,agent.batch] [--runs 5] [--top 8]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+FIRST_TURN = """
+import json, sys, time
+start = time.perf_counter()
+from agent.graph import get_agent, run_conversation
+from agent.state import new_conversation_state
+imported = time.perf_counter()
+from benchmarks.fake_llm import FakeChatModel
+agent = get_agent("offline", llm=FakeChatModel(latency_dist="const:0"))
+built = time.perf_counter()
+run_conversation(agent, new_conversation_state(), "What does the Pro plan include?")
+answered = time.perf_counter()
+get_agent("offline")
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "build_ms": (built - imported) * 1000,
+    "first_turn_ms": (answered - built) * 1000,
+    "gemini_imported_by_build": "langchain_google_genai" in sys.modules,
+}))
+"""
+
+
+def run_python(args: list) -> subprocess.CompletedProcess:
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")])),
+        "AUTOSTREAM_LEAD_SINK": "off",
+        "AUTOSTREAM_ANSWER_CACHE": "off",
+    }
+    return subprocess.run([sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+
+
+def parse_importtime(stderr: str) -> list:
+    """(self_us, cumulative_us, depth, module) per line of -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        module = name.strip()
+        rows.append((int(self_us), int(cumulative_us), (len(name) - len(name.lstrip())) // 2, module))
+    return rows
+
+
+def bench_imports(module: str, runs: int, top: int) -> dict:
+    totals = []
+    by_package = defaultdict(int)
+    for _ in range(runs):
+        rows = parse_importtime(run_python(["-X", "importtime", "-c", f"import {module}"]).stderr)
+        # Interpreter startup imports (site, encodings) come first at depth 0 too
+        totals.append(next(cumulative for _, cumulative, depth, name in rows if depth == 0 and name == module))
+        for self_us, _, _, name in rows:
+            by_package[name.split(".")[0]] += self_us
+    heaviest = sorted(by_package.items(), key=lambda item: -item[1])[:top]
+    return {
+        "module": module,
+        "import_ms": round(statistics.median(totals) / 1000, 1),
+        "packages_ms": {package: round(us / runs / 1000, 1) for package, us in heaviest},
+    }
+
+
+def bench_first_turn(runs: int) -> dict:
+    samples = [json.loads(run_python(["-c", FIRST_TURN]).stdout.strip().splitlines()[-1]) for _ in range(runs)]
+    result = {
+        key: round(statistics.median(sample[key] for sample in samples), 1)
+        for key in ("import_ms", "build_ms", "first_turn_ms")
+    }
+    result["gemini_imported_by_build"] = any(sample["gemini_imported_by_build"] for sample in samples)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", default="agent.main,agent.graph,agent.batch", help="Comma-separated entry modules")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per measurement (median reported)")
+    parser.add_argument("--top", type=int, default=8, help="Packages listed per module")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = {
+        "imports": [bench_imports(module, args.runs, args.top) for module in args.modules.split(",")],
+        "first_turn": bench_first_turn(args.runs),
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results["imports"]:
+        print(f"import {r['module']}: {r['import_ms']} ms")
+        for package, ms in r["packages_ms"].items():
+            print(f"  {package:<28} {ms:8.1f} ms")
+    first = results["first_turn"]
+    print(f"first turn: import {first['import_ms']} ms  build {first['build_ms']} ms  "
+          f"reply {first['first_turn_ms']} ms  (Gemini client imported by build: {first['gemini_imported_by_build']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark: per-turn graph overhead as a conversation grows.
+
+Runs one long conversation through the agent with a zero-latency fake LLM
+and reports the mean turn time per window of turns. With the append-only
+message channel the overhead should stay flat as history grows.
+
+Usage:
+    python -m benchmarks.bench_state [--turns 2000] [--window 250]
+"""
+import argparse
+import json
+import time
+
+from agent.graph import create_agent, run_conversation
+from agent.nodes import rag
+from agent.state import new_conversation_state
+from benchmarks.fake_llm import FakeChatModel
+
+
+def bench(turns: int, window: int) -> list:
+    rag.answer_cache = None
+    agent = create_agent("fake-key", llm=FakeChatModel())
+    state = new_conversation_state()
+    results = []
+    start = time.perf_counter()
+    for turn in range(1, turns + 1):
+        state, _ = run_conversation(agent, state, f"Tell me more about feature {turn}?")
+        if turn % window == 0:
+            elapsed = time.perf_counter() - start
+            results.append({
+                "turns": turn,
+                "history_messages": len(state["messages"]),
+                "mean_turn_ms": round(elapsed * 1000 / window, 3),
+            })
+            start = time.perf_counter()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--window", type=int, default=250)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = bench(args.turns, args.window)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        print(f"turns {r['turns']:>6}  history {r['history_messages']:>6}  {r['mean_turn_ms']:>8} ms/turn")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Deterministic fake chat model for offline benchmarks.
+
+Answers each AutoStream prompt type (intent classification, lead
+extraction, combined classification + extraction, free-form replies) from
+simple rules instead of calling Gemini, after a configurable delay. The
+delay is either fixed or drawn from a seeded distribution, and responses
+carry estimated token usage like a real model's.
+"""
+import asyncio
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import Field, PrivateAttr
+
+
+PLATFORMS = ("YouTube", "Instagram", "TikTok", "Twitch", "Facebook")
+NAME_PATTERN = re.compile(r"\b(?i:i'm|i am|my name is|name's|this is)\s+([A-Z][a-z]+)")
+HIGH_INTENT_PATTERN = re.compile(r"\b(sign|subscribe|buy|try|start|ready|upgrade)\b|" + "|".join(PLATFORMS), re.I)
+GREETING_PATTERN = re.compile(r"^\s*(hi|hello|hey|yo|good (morning|evening))\b", re.I)
+
+
+def _text(message: Any) -> str:
+    if isinstance(message, dict):
+        return message.get("content", "")
+    return message.content
+
+
+class LatencyModel:
+    """
+    Seeded latency distribution, parsed from a spec string:
+        "const:0.2"            always 0.2 s
+        "uniform:0.1,0.3"      uniform between 0.1 and 0.3 s
+        "lognormal:0.2,0.5"    median 0.2 s, sigma 0.5 (long right tail)
+    """
+
+    KINDS = ("const", "uniform", "lognormal")
+
+    def __init__(self, spec: str, seed: int = 0):
+        kind, _, args = spec.partition(":")
+        if kind not in self.KINDS:
+            raise ValueError(f"latency kind must be one of {self.KINDS}, got {kind!r}")
+        self.spec = spec
+        self.kind = kind
+        self.args = [float(a) for a in args.split(",")] if args else []
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        with self._lock:
+            if self.kind == "uniform":
+                return self._rng.uniform(self.args[0], self.args[1])
+            if self.kind == "lognormal":
+                return self._rng.lognormvariate(math.log(self.args[0]), self.args[1])
+            return self.args[0]
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def fake_intent(text: str) -> str:
+    if HIGH_INTENT_PATTERN.search(text):
+        return "high_intent"
+    if GREETING_PATTERN.search(text):
+        return "greeting"
+    return "inquiry"
+
+
+def fake_extraction(text: str) -> str:
+    names = NAME_PATTERN.findall(text)
+    platforms = [p for p in PLATFORMS if p.lower() in text.lower()]
+    return f"name: {names[-1].title() if names else 'null'}\nplatform: {platforms[-1] if platforms else 'null'}"
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Rule-based stand-in for ChatGoogleGenerativeAI.
+
+    Args:
+        latency: Seconds to wait before answering each call
+        latency_dist: Optional LatencyModel spec (e.g. "lognormal:0.2,0.5")
+            that overrides latency
+        seed: Seed for latency_dist
+        reply: Text returned for free-form (greeting/RAG) prompts
+    """
+    latency: float = 0.0
+    latency_dist: Optional[str] = None
+    seed: int = 0
+    reply: str = "AutoStream offers a Basic Plan at $29/month and a Pro Plan at $79/month."
+    calls: Counter = Field(default_factory=Counter)
+    prompt_tokens: Counter = Field(default_factory=Counter)
+    _latency_model: Optional[LatencyModel] = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any) -> None:
+        if self.latency_dist:
+            self._latency_model = LatencyModel(self.latency_dist, self.seed)
+
+    def delay(self) -> float:
+        """Seconds to wait for the next call."""
+        if self._latency_model is not None:
+            return self._latency_model.sample()
+        return self.latency
+
+    @staticmethod
+    def usage(messages: List[BaseMessage], text: str) -> dict:
+        prompt_tokens = sum(estimate_tokens(_text(m)) for m in messages)
+        completion_tokens = estimate_tokens(text)
+        return {
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-autostream"
+
+    def respond(self, messages: List[BaseMessage]) -> tuple[str, str]:
+        """Return (call kind, response text) for a prompt, counting its prompt tokens."""
+        kind, text = self.answer(messages)
+        self.prompt_tokens[kind] += sum(estimate_tokens(_text(m)) for m in messages)
+        return kind, text
+
+    def answer(self, messages: List[BaseMessage]) -> tuple[str, str]:
+        """Return (call kind, response text) for a prompt."""
+        system = _text(messages[0]) if messages else ""
+        user = _text(messages[-1]) if messages else ""
+        if system.startswith("You are an intent classifier and lead extractor"):
+            latest = user.rsplit("Latest message:", 1)[-1]
+            return "combined", f"intent: {fake_intent(latest)}\n{fake_extraction(user)}"
+        if system.startswith("You are an intent classifier"):
+            return "intent", fake_intent(user)
+        if system.startswith("You are extracting lead information"):
+            return "extraction", fake_extraction(user)
+        if system.startswith("You maintain a running summary"):
+            return "summary", "The user asked about AutoStream plans and pricing."
+        return "reply", self.reply
+
+    def _result(self, messages, text: str) -> ChatResult:
+        message = AIMessage(content=text, usage_metadata=self.usage(messages, text))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _chunks(self, messages, text: str) -> list:
+        words = text.split(" ")
+        chunks = []
+        for i, word in enumerate(words):
+            last = i == len(words) - 1
+            chunks.append(ChatGenerationChunk(message=AIMessageChunk(
+                content=word if last else word + " ",
+                usage_metadata=self.usage(messages, text) if last else None
+            )))
+        return chunks
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        kind, text = self.respond(messages)
+        self.calls[kind] += 1
+        delay = self.delay()
+        if delay:
+            time.sleep(delay)
+        return self._result(messages, text)
+
+    async def _agenerate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        kind, text = self.respond(messages)
+        self.calls[kind] += 1
+        delay = self.delay()
+        if delay:
+            await asyncio.sleep(delay)
+        return self._result(messages, text)
+
+    def stream_delays(self, n_chunks: int) -> tuple[float, float]:
+        """(delay before the first chunk, delay before each later chunk)."""
+        step = self.delay() / n_chunks
+        return step, step
+
+    def _stream(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs):
+        kind, text = self.respond(messages)
+        self.calls[kind] += 1
+        chunks = self._chunks(messages, text)
+        first, step = self.stream_delays(len(chunks))
+        for i, chunk in enumerate(chunks):
+            delay = first if i == 0 else step
+            if delay:
+                time.sleep(delay)
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs):
+        kind, text = self.respond(messages)
+        self.calls[kind] += 1
+        chunks = self._chunks(messages, text)
+        first, step = self.stream_delays(len(chunks))
+        for i, chunk in enumerate(chunks):
+            delay = first if i == 0 else step
+            if delay:
+                await asyncio.sleep(delay)
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+class FakeLLMError(RuntimeError):
+    """Error injected by FaultyChatModel."""
+
+
+class FaultyChatModel(FakeChatModel):
+    """
+    FakeChatModel that injects faults, drawn from a seeded RNG.
+
+    Args:
+        error_rate: Fraction of calls that raise FakeLLMError
+        hang_rate: Fraction of calls that wait hang_seconds before answering
+        hang_seconds: How long a hung call waits
+        fault_seed: Seed for the fault draws
+    """
+    error_rate: float = 0.0
+    hang_rate: float = 0.0
+    hang_seconds: float = 30.0
+    fault_seed: int = 0
+    faults: Counter = Field(default_factory=Counter)
+    _fault_rng: Any = PrivateAttr(default=None)
+    _fault_lock: Any = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any) -> None:
+        super().model_post_init(__context)
+        self._fault_rng = random.Random(self.fault_seed)
+        self._fault_lock = threading.Lock()
+
+    def _draw(self) -> float:
+        with self._fault_lock:
+            return self._fault_rng.random()
+
+    def respond(self, messages: List[BaseMessage]) -> tuple[str, str]:
+        if self._draw() < self.error_rate:
+            self.faults["error"] += 1
+            raise FakeLLMError("injected LLM error")
+        return super().respond(messages)
+
+    def delay(self) -> float:
+        if self._draw() < self.hang_rate:
+            self.faults["hang"] += 1
+            return self.hang_seconds
+        return super().delay()
+
+    def stream_delays(self, n_chunks: int) -> tuple[float, float]:
+        # A hung call produces nothing until it recovers
+        delay = self.delay()
+        if delay >= self.hang_seconds:
+            return delay, 0.0
+        return delay / n_chunks, delay / n_chunks
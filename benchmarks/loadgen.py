@@ -0,0 +1,287 @@
+"""
+Synthetic load generator for the AutoStream agent.
+
+Simulates many concurrent visitors, each running a generated conversation
+script against the agent backed by the fake LLM:
+    greeting     say hello, ask what AutoStream is
+    pricing      two to four pricing / policy / feature questions
+    high_intent  ask to sign up, then drip name, email and platform over
+                 the following turns (sometimes several in one message)
+
+Visitors arrive over --ramp seconds and pause --think seconds (exponential)
+between turns, so --visitors is the number of conversations open at once.
+Turns run through arun_conversation (--mode async) or run_conversation on a
+thread pool (--mode sync).
+
+Reports p50/p95/p99 turn latency, turns/s, the lead-capture completion rate
+of high-intent visitors and process RSS sampled over the run.
+
+Usage:
+    python -m benchmarks.loadgen [--visitors 1000] [--mode async] [--latency lognormal:0.3,0.4]
+        [--think 1.0] [--ramp 10] [--max-in-flight 200] [--json out.json]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import resource
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List
+
+from agent.graph import ConcurrencyLimiter, arun_conversation, create_agent, run_conversation
+from agent.nodes import rag
+from agent.state import new_conversation_state
+from agent.tools import lead_capture
+from benchmarks.common import percentiles
+from benchmarks.fake_llm import FakeChatModel, PLATFORMS
+
+
+NAMES = ("Alex", "Sam", "Priya", "Jordan", "Maria", "Kenji", "Fatima", "Liam", "Noah", "Zoe")
+GREETINGS = ("Hi!", "Hello there", "Hey", "Good morning")
+QUESTIONS = (
+    "How much is the Pro plan?",
+    "What does the Basic plan include?",
+    "What is your refund policy?",
+    "Do you have AI captions?",
+    "Is support available 24/7?",
+    "Can I export in 4K?",
+    "How many videos can I edit per month on Basic?",
+)
+OPENERS = (
+    "I want to sign up for the Pro plan",
+    "I'm ready to subscribe",
+    "Sounds great, I'd like to try it",
+    "How do I get started? I want to buy Pro",
+)
+
+DEFAULT_MIX = {"greeting": 0.3, "pricing": 0.4, "high_intent": 0.3}
+
+
+@dataclass
+class Script:
+    kind: str
+    turns: List[str]
+
+
+def generate_script(rng: random.Random, visitor_id: int, mix: dict = DEFAULT_MIX) -> Script:
+    """Build one visitor's conversation script."""
+    kind = rng.choices(list(mix), weights=list(mix.values()))[0]
+    if kind == "greeting":
+        return Script(kind, [rng.choice(GREETINGS), "What is AutoStream?"])
+    if kind == "pricing":
+        return Script(kind, rng.sample(QUESTIONS, rng.randint(2, 4)))
+
+    name = rng.choice(NAMES)
+    fields = [
+        f"I'm {name}",
+        f"{name.lower()}.{visitor_id}@example.com",
+        f"I make videos for {rng.choice(PLATFORMS)}",
+    ]
+    rng.shuffle(fields)
+    turns = [rng.choice(OPENERS)]
+    if rng.random() < 0.5:
+        turns.append(rng.choice(QUESTIONS))
+    # Drip the fields, sometimes two in one message
+    while fields:
+        take = 2 if len(fields) > 1 and rng.random() < 0.25 else 1
+        turns.append(", ".join(fields[:take]))
+        fields = fields[take:]
+    return Script(kind, turns)
+
+
+def rss_mb() -> float:
+    """Current resident set size in MB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+@dataclass
+class LoadStats:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    active: int = 0
+    high_intent: int = 0
+    captured: int = 0
+    by_kind: dict = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def turn(self, seconds: float) -> None:
+        with self.lock:
+            self.latencies.append(seconds)
+
+    def finish(self, script: Script, state: dict) -> None:
+        with self.lock:
+            self.by_kind[script.kind] = self.by_kind.get(script.kind, 0) + 1
+            if script.kind == "high_intent":
+                self.high_intent += 1
+                self.captured += bool(state.get("lead_captured"))
+
+
+class RSSSampler:
+    """Samples RSS and progress on a background thread."""
+
+    def __init__(self, stats: LoadStats, interval: float):
+        self.stats = stats
+        self.interval = interval
+        self.samples: List[dict] = []
+        self._stop = threading.Event()
+        self._start = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while True:
+            self.samples.append({
+                "t_s": round(time.perf_counter() - self._start, 2),
+                "rss_mb": round(rss_mb(), 1),
+                "active_visitors": self.stats.active,
+                "turns": len(self.stats.latencies),
+            })
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+async def run_async(agent, scripts: List[Script], stats: LoadStats, think: float, ramp: float,
+                    max_in_flight: int, seed: int) -> None:
+    limiter = ConcurrencyLimiter(max_in_flight)
+    rng = random.Random(seed)
+
+    async def visitor(script: Script, arrival: float, pauses: List[float]) -> None:
+        await asyncio.sleep(arrival)
+        stats.active += 1
+        state = new_conversation_state()
+        try:
+            for message, pause in zip(script.turns, pauses):
+                start = time.perf_counter()
+                try:
+                    state, _ = await arun_conversation(agent, state, message, limiter)
+                except Exception:
+                    stats.errors += 1
+                stats.turn(time.perf_counter() - start)
+                await asyncio.sleep(pause)
+        finally:
+            stats.active -= 1
+        stats.finish(script, state)
+
+    await asyncio.gather(*(
+        visitor(s, rng.uniform(0, ramp), [rng.expovariate(1 / think) if think else 0.0 for _ in s.turns])
+        for s in scripts
+    ))
+
+
+def run_sync(agent, scripts: List[Script], stats: LoadStats, think: float, ramp: float,
+             workers: int, seed: int) -> None:
+    rng = random.Random(seed)
+    plans = [(s, rng.uniform(0, ramp), [rng.expovariate(1 / think) if think else 0.0 for _ in s.turns])
+             for s in scripts]
+    start = time.perf_counter()
+
+    def visitor(script: Script, arrival: float, pauses: List[float]) -> None:
+        time.sleep(max(0.0, arrival - (time.perf_counter() - start)))
+        with stats.lock:
+            stats.active += 1
+        state = new_conversation_state()
+        try:
+            for message, pause in zip(script.turns, pauses):
+                turn_start = time.perf_counter()
+                try:
+                    state, _ = run_conversation(agent, state, message)
+                except Exception:
+                    with stats.lock:
+                        stats.errors += 1
+                stats.turn(time.perf_counter() - turn_start)
+                time.sleep(pause)
+        finally:
+            with stats.lock:
+                stats.active -= 1
+        stats.finish(script, state)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for future in [pool.submit(visitor, *plan) for plan in plans]:
+            future.result()
+
+
+def run_load(visitors: int, mode: str, latency: str, think: float, ramp: float,
+             max_in_flight: int, sample_interval: float, seed: int) -> dict:
+    # Measure the agent: no answer reuse across visitors, no lead file writes
+    rag.answer_cache = None
+    lead_capture.set_lead_sink(None)
+
+    rng = random.Random(seed)
+    scripts = [generate_script(rng, i) for i in range(visitors)]
+    agent = create_agent("fake-key", llm=FakeChatModel(latency_dist=latency, seed=seed))
+    stats = LoadStats()
+
+    start = time.perf_counter()
+    with RSSSampler(stats, sample_interval) as sampler, contextlib.redirect_stdout(io.StringIO()):
+        if mode == "async":
+            asyncio.run(run_async(agent, scripts, stats, think, ramp, max_in_flight, seed))
+        else:
+            run_sync(agent, scripts, stats, think, ramp, max_in_flight, seed)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "visitors": visitors,
+        "mode": mode,
+        "latency": latency,
+        "elapsed_s": round(elapsed, 2),
+        "turns": len(stats.latencies),
+        "errors": stats.errors,
+        "turns_per_s": round(len(stats.latencies) / elapsed, 2),
+        "turn": percentiles(stats.latencies),
+        "scripts": stats.by_kind,
+        "lead_completion_rate": round(stats.captured / stats.high_intent, 4) if stats.high_intent else None,
+        "peak_active_visitors": max((s["active_visitors"] for s in sampler.samples), default=0),
+        "rss": sampler.samples,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--visitors", type=int, default=1000)
+    parser.add_argument("--mode", choices=("async", "sync"), default="async")
+    parser.add_argument("--latency", default="lognormal:0.3,0.4", help="Fake LLM latency distribution")
+    parser.add_argument("--think", type=float, default=1.0, help="Mean pause between a visitor's turns (s)")
+    parser.add_argument("--ramp", type=float, default=10.0, help="Seconds over which visitors arrive")
+    parser.add_argument("--max-in-flight", type=int, default=200,
+                        help="Turns running at once (async limiter, or sync worker threads)")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="RSS sampling interval (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the full report to this file")
+    args = parser.parse_args()
+
+    report = run_load(args.visitors, args.mode, args.latency, args.think, args.ramp,
+                      args.max_in_flight, args.sample_interval, args.seed)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    t = report["turn"]
+    print(f"{report['visitors']} visitors ({args.mode}), {report['turns']} turns in {report['elapsed_s']} s, "
+          f"{report['errors']} errors")
+    print(f"  turns/s           {report['turns_per_s']}")
+    print(f"  turn latency      p50 {t['p50_ms']} ms  p95 {t['p95_ms']} ms  p99 {t['p99_ms']} ms")
+    print(f"  lead completion   {report['lead_completion_rate']} ({report['scripts'].get('high_intent', 0)} high-intent visitors)")
+    print(f"  peak active       {report['peak_active_visitors']} visitors")
+    rss = [s["rss_mb"] for s in report["rss"]]
+    print(f"  RSS               start {rss[0]} MB  peak {max(rss)} MB  end {rss[-1]} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Offline benchmark suite for the AutoStream agent.
+
+Runs the agent against the deterministic fake LLM and records:
+    overhead     per-turn graph overhead with a zero-latency LLM, plus the
+                 mean time per node from agent.metrics
+    prompts      prompt construction: format_knowledge_base, retrieve_context
+                 and extract_lead_info (zero-latency LLM)
+    memory       bytes allocated per session and per turn (tracemalloc)
+    throughput   turns/s and turn latency for each history length and
+                 concurrency level, with a seeded LLM latency distribution
+
+Results are written as JSON together with the commit they were measured on.
+Pass --compare with an earlier result file to list metrics that moved by
+more than --threshold.
+
+Usage:
+    python -m benchmarks.suite [--out results.json] [--compare baseline.json]
+        [--latency lognormal:0.05,0.5] [--histories 0,50,200] [--concurrency 1,8,32] [--quick]
+"""
+import argparse
+import asyncio
+import contextlib
+import gc
+import io
+import json
+import time
+import tracemalloc
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agent.graph import arun_conversation, create_agent, run_conversation
+from agent.metrics import metrics
+from agent.nodes import rag
+from agent.nodes.lead import extract_lead_info
+from agent.state import new_conversation_state
+from agent.tools import lead_capture
+from benchmarks.common import environment, percentiles
+from benchmarks.fake_llm import FakeChatModel
+
+
+SCRIPT = [
+    "Hi there",
+    "What does the Pro plan include?",
+    "Is there a refund policy?",
+    "Do you support 4K exports?",
+    "I want to try it for my YouTube channel",
+    "I'm Alex",
+    "alex@example.com",
+    "Thanks! What about captions?",
+]
+
+QUESTIONS = [
+    "How much is the Pro plan?",
+    "What is your refund policy?",
+    "Do you have AI captions?",
+    "Is support available 24/7?",
+]
+
+
+def quiet():
+    """Silence the lead capture confirmation lines."""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def session_with_history(length: int) -> dict:
+    """A conversation state with length prior messages, already summarized
+    up to the verbatim window (the steady state of a long conversation)."""
+    state = new_conversation_state()
+    for i in range(length // 2):
+        state["messages"].append(HumanMessage(content=QUESTIONS[i % len(QUESTIONS)]))
+        state["messages"].append(AIMessage(content=f"Answer {i}: the Pro plan is $79/month with 4K exports and AI captions."))
+    if length:
+        window = 8
+        state["summary"] = "The user asked about AutoStream plans, pricing, refunds and captions."
+        state["summary_cursor"] = max(0, len(state["messages"]) - window)
+        state["lead_cursor"] = len(state["messages"])
+        state["intent"] = "inquiry"
+    return state
+
+
+def bench_overhead(turns: int) -> dict:
+    agent = create_agent("fake-key", llm=FakeChatModel())
+    metrics.reset()
+    state = new_conversation_state()
+    samples = []
+    with quiet():
+        for i in range(turns):
+            start = time.perf_counter()
+            state, _ = run_conversation(agent, state, SCRIPT[i % len(SCRIPT)])
+            samples.append(time.perf_counter() - start)
+    snapshot = metrics.as_dict()
+    return {
+        "turns": turns,
+        "turn": percentiles(samples),
+        "mean_turn_ms": round(sum(samples) * 1000 / turns, 3),
+        "node_mean_ms": {node: h["mean_ms"] for node, h in snapshot["nodes"].items()},
+    }
+
+
+def _time_calls(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return round((time.perf_counter() - start) * 1e6 / repeat, 2)
+
+
+def bench_prompts(repeat: int) -> dict:
+    kb = rag.load_knowledge_base()
+    llm = FakeChatModel()
+    state = session_with_history(20)
+    state["messages"].append(HumanMessage(content="Sign me up, I'm Alex and I stream on Twitch"))
+    return {
+        "format_knowledge_base_us": _time_calls(lambda: rag.format_knowledge_base(kb), repeat),
+        "retrieve_context_us": _time_calls(lambda: rag.retrieve_context("How much is the Pro plan?"), repeat),
+        "extract_lead_info_us": _time_calls(lambda: extract_lead_info(state, llm), repeat),
+    }
+
+
+def bench_memory(sessions: int, turns: int) -> dict:
+    agent = create_agent("fake-key", llm=FakeChatModel())
+    # Warm up lazily built structures (classifier, index) outside the measurement
+    with quiet():
+        run_conversation(agent, new_conversation_state(), SCRIPT[0])
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    states = []
+    with quiet():
+        for _ in range(sessions):
+            state = new_conversation_state()
+            for i in range(turns):
+                state, _ = run_conversation(agent, state, SCRIPT[i % len(SCRIPT)])
+            states.append(state)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return {
+        "sessions": sessions,
+        "turns_per_session": turns,
+        "bytes_per_session": retained // sessions,
+        "bytes_per_turn": retained // (sessions * turns),
+    }
+
+
+async def _throughput(agent, history: int, concurrency: int, turns: int) -> dict:
+    samples = []
+
+    async def session() -> None:
+        state = session_with_history(history)
+        for i in range(turns):
+            start = time.perf_counter()
+            state, _ = await arun_conversation(agent, state, QUESTIONS[i % len(QUESTIONS)])
+            samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(session() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "history": history,
+        "concurrency": concurrency,
+        "turns": len(samples),
+        "turns_per_s": round(len(samples) / elapsed, 2),
+        "turn": percentiles(samples),
+    }
+
+
+def bench_throughput(latency: str, histories: list, levels: list, turns: int) -> list:
+    agent = create_agent("fake-key", llm=FakeChatModel(latency_dist=latency, seed=0))
+    results = []
+    with quiet():
+        for history in histories:
+            for concurrency in levels:
+                results.append(asyncio.run(_throughput(agent, history, concurrency, turns)))
+    return results
+
+
+def flatten(value, prefix: str = "") -> dict:
+    """Flatten nested results into {"a.b.c": number}; list items are keyed by their parameters."""
+    flat = {}
+    if isinstance(value, dict):
+        for key, item in value.items():
+            flat.update(flatten(item, f"{prefix}{key}."))
+    elif isinstance(value, list):
+        for item in value:
+            label = f"h{item.get('history')}_c{item.get('concurrency')}" if isinstance(item, dict) else "?"
+            flat.update(flatten(item, f"{prefix}{label}."))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        flat[prefix[:-1]] = value
+    return flat
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Return (metric, old, new, change) rows that moved by more than threshold."""
+    old = flatten(baseline["results"])
+    new = flatten(current["results"])
+    rows = []
+    for key, value in new.items():
+        if key in old and old[key]:
+            change = (value - old[key]) / old[key]
+            if abs(change) > threshold:
+                rows.append((key, old[key], value, change))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default="bench-results.json", help="JSON file to write results to")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change reported by --compare")
+    parser.add_argument("--latency", default="lognormal:0.05,0.5", help="Fake LLM latency distribution")
+    parser.add_argument("--histories", default="0,50,200", help="History lengths (messages) for throughput")
+    parser.add_argument("--concurrency", default="1,8,32", help="Concurrency levels for throughput")
+    parser.add_argument("--quick", action="store_true", help="Fewer iterations, for a smoke run")
+    args = parser.parse_args()
+
+    # Measure the agent itself: no cross-turn answer reuse, no lead file writes
+    rag.answer_cache = None
+    lead_capture.set_lead_sink(None)
+
+    scale = 0.2 if args.quick else 1.0
+    results = {
+        "overhead": bench_overhead(int(500 * scale)),
+        "prompts": bench_prompts(int(2000 * scale)),
+        "memory": bench_memory(int(100 * scale), 10),
+        "throughput": bench_throughput(
+            args.latency,
+            [int(h) for h in args.histories.split(",")],
+            [int(c) for c in args.concurrency.split(",")],
+            max(2, int(10 * scale))
+        ),
+    }
+    report = {"environment": environment(), "config": {"latency": args.latency, "quick": args.quick}, "results": results}
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"Turn overhead      p50 {results['overhead']['turn']['p50_ms']} ms  "
+          f"p95 {results['overhead']['turn']['p95_ms']} ms")
+    for name, us in results["prompts"].items():
+        print(f"{name:<26} {us} us")
+    print(f"Memory             {results['memory']['bytes_per_session']} bytes/session, "
+          f"{results['memory']['bytes_per_turn']} bytes/turn")
+    for r in results["throughput"]:
+        print(f"history {r['history']:>4}  concurrency {r['concurrency']:>3}  {r['turns_per_s']:>8} turns/s  "
+              f"p50 {r['turn']['p50_ms']} ms  p95 {r['turn']['p95_ms']} ms")
+    print(f"Results written to {args.out}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(report, baseline, args.threshold)
+        print(f"\nChanged by more than {args.threshold:.0%} vs {baseline['environment'].get('commit')}:")
+        for key, old, new, change in rows:
+            print(f"  {key:<45} {old:>12} -> {new:<12} ({change:+.1%})")
+        if not rows:
+            print("  (none)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+Shared fixtures. The agent runs offline against benchmarks.fake_llm; the
+lead sink, answer cache and on-disk knowledge index are disabled so tests
+write nothing into the working tree.
+"""
+import os
+
+os.environ.setdefault("AUTOSTREAM_LEAD_SINK", "off")
+os.environ.setdefault("AUTOSTREAM_ANSWER_CACHE", "off")
+os.environ.setdefault("AUTOSTREAM_KNOWLEDGE_INDEX", "off")
+
+import pytest
+
+from benchmarks.fake_llm import FakeChatModel
+
+
+@pytest.fixture
+def fake_llm():
+    return FakeChatModel(latency_dist="const:0")
+
+
+@pytest.fixture
+def make_agent(fake_llm):
+    """Build an agent on the fake LLM (extra create_agent options allowed)."""
+    from agent.graph import create_agent
+
+    def make(**options):
+        options.setdefault("resilient", False)
+        return create_agent("fake-key", llm=fake_llm, **options)
+
+    return make
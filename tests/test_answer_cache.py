@@ -0,0 +1,51 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agent.answer_cache import AnswerCache, MemoryBackend, SQLiteBackend
+
+KB = "kb-1"
+QUESTION = "How much is the Pro plan?"
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def cache(request, tmp_path):
+    backend = MemoryBackend() if request.param == "memory" else SQLiteBackend(str(tmp_path / "answers.db"))
+    return AnswerCache(backend)
+
+
+def test_key_ignores_case_punctuation_and_spacing():
+    assert AnswerCache.make_key("How much is  the PRO plan?", KB) == AnswerCache.make_key("how much is the pro plan", KB)
+
+
+def test_key_includes_knowledge_version_and_context():
+    key = AnswerCache.make_key(QUESTION, KB)
+    assert AnswerCache.make_key(QUESTION, "kb-2") != key
+    assert AnswerCache.make_key(QUESTION, KB, ["hi", "Hello! How can I help?"]) != key
+    assert AnswerCache.make_key(QUESTION, KB, ["hi", "Hello!"]) != AnswerCache.make_key(QUESTION, KB, ["hey", "Hello!"])
+
+
+def test_answer_is_reused_for_the_same_question(cache):
+    cache.set([HumanMessage(content=QUESTION)], KB, "$79/month")
+    assert cache.get([HumanMessage(content="how much is the pro plan")], KB) == "$79/month"
+    assert cache.get([HumanMessage(content=QUESTION)], "kb-2") is None
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.sets) == (1, 1, 1)
+
+
+def test_answer_is_not_reused_after_a_different_exchange(cache):
+    first = [HumanMessage(content="Do you support 4K?"), AIMessage(content="Pro exports in 4K."),
+             HumanMessage(content="How much is it?")]
+    cache.set(first, KB, "The Pro plan is $79/month.")
+    assert cache.get([HumanMessage(content="How much is it?")], KB) is None
+    other = [HumanMessage(content="Tell me about Basic"), AIMessage(content="Basic is $29/month."),
+             HumanMessage(content="How much is it?")]
+    assert cache.get(other, KB) is None
+    assert cache.get(list(first), KB) == "The Pro plan is $79/month."
+
+
+def test_deep_conversations_are_skipped(cache):
+    messages = [HumanMessage(content=f"question {i}") for i in range(cache.max_context_messages + 2)]
+    cache.set(messages, KB, "answer")
+    assert cache.get(messages, KB) is None
+    assert cache.stats.skipped == 1
+    assert cache.stats.sets == 0
+    assert cache.get([], KB) is None
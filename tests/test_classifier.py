@@ -0,0 +1,65 @@
+import pytest
+
+from agent.classifier import DEFAULT_THRESHOLD, FastIntentClassifier, evaluate, tune_threshold
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    return FastIntentClassifier()
+
+
+@pytest.mark.parametrize("text, intent", [
+    ("hi", "greeting"),
+    ("hey there", "greeting"),
+    ("What does the Pro plan include?", "inquiry"),
+    ("how much is the basic plan", "inquiry"),
+    ("I want to subscribe", "high_intent"),
+    ("sign me up for pro", "high_intent"),
+])
+def test_clear_messages_bypass_the_llm(classifier, text, intent):
+    assert classifier.classify(text) == intent
+
+
+@pytest.mark.parametrize("text", [
+    "I don't want to subscribe",
+    "I'm not ready to buy yet",
+    "I’m not ready to buy",
+    "never going to upgrade",
+    "not interested in signing up",
+    "no thanks",
+])
+def test_negated_purchases_go_to_the_llm(classifier, text):
+    intent, confidence = classifier.predict(text)
+    assert intent != "high_intent"
+    assert confidence < 0.5
+    assert classifier.classify(text) is None
+
+
+@pytest.mark.parametrize("text", ["I am ready to learn more", "ready to see a demo", "I'm ready to know more"])
+def test_ready_without_a_purchase_verb_is_not_high_intent(classifier, text):
+    assert classifier.predict(text)[0] != "high_intent"
+    assert classifier.classify(text) != "high_intent"
+
+
+def test_ready_to_buy_is_high_intent(classifier):
+    assert classifier.classify("I'm ready to get started") == "high_intent"
+
+
+def test_threshold_decides_bypass():
+    strict = FastIntentClassifier(threshold=1.01)
+    assert strict.classify("hi") is None
+    lenient = FastIntentClassifier(threshold=DEFAULT_THRESHOLD)
+    assert lenient.classify("hi") == "greeting"
+    assert (strict.stats.bypassed, lenient.stats.bypassed) == (0, 1)
+    assert lenient.stats.by_intent == {"greeting": 1}
+
+
+def test_tuned_threshold_meets_accuracy(classifier):
+    examples = [
+        ("hello", "greeting"), ("what is the refund policy", "inquiry"),
+        ("i want to buy the pro plan", "high_intent"), ("i don't want to buy it", "inquiry"),
+    ]
+    threshold = tune_threshold(classifier, examples, min_accuracy=1.0)
+    result = evaluate(classifier, examples, [threshold])[0]
+    assert result["accuracy"] == 1.0
+    assert 0.5 <= threshold <= 1.0
@@ -0,0 +1,41 @@
+import pytest
+
+from agent.knowledge.faq import FAQMatcher
+
+ENTRIES = [
+    {"question": "What is AutoStream?", "answer": "A video editing SaaS."},
+    {"question": "What platforms do you support?", "answer": "YouTube, Instagram and TikTok."},
+    {"question": "Can I get a refund?", "answer": "Within 7 days."},
+]
+
+
+@pytest.fixture
+def matcher():
+    return FAQMatcher(ENTRIES)
+
+
+def test_verbatim_question_matches_exactly(matcher):
+    match = matcher.match("what is autostream")
+    assert (match.index, match.kind) == (0, "exact")
+
+
+def test_reworded_question_matches_fuzzily(matcher):
+    match = matcher.match("Platforms you support?")
+    assert (match.index, match.kind) == (1, "fuzzy")
+
+
+@pytest.mark.parametrize("text", ["autostream?", "refund?", "platforms", "hello there"])
+def test_short_or_unrelated_messages_do_not_match(matcher, text):
+    assert matcher.match(text) is None
+
+
+def test_min_tokens_is_configurable():
+    assert FAQMatcher(ENTRIES, min_tokens=1).match("autostream?").index == 0
+
+
+def test_stats_count_lookups(matcher):
+    matcher.match("what is autostream")
+    matcher.match("Platforms you support?")
+    matcher.match("autostream?")
+    stats = matcher.stats.as_dict()
+    assert (stats["lookups"], stats["exact"], stats["fuzzy"], stats["misses"]) == (3, 1, 1, 1)
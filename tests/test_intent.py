@@ -0,0 +1,40 @@
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agent.nodes.intent import EXTRACTION_WINDOW, build_combined_messages, intent_node
+from agent.state import new_conversation_state
+
+
+def _state(questions, **fields):
+    messages = []
+    for question in questions:
+        messages += [HumanMessage(content=question), AIMessage(content="reply")]
+    return {**new_conversation_state(), "messages": messages[:-1], **fields}
+
+
+def test_combined_prompt_is_bounded():
+    questions = [f"question {i}" for i in range(20)] + ["sign me up"]
+    prompt = build_combined_messages(_state(questions))[-1].content
+
+    earlier, latest = prompt.split("\n\n")
+    assert latest == "Latest message: sign me up"
+    assert earlier.splitlines()[1:] == questions[-EXTRACTION_WINDOW - 1:-1]
+
+
+def test_combined_prompt_starts_at_the_lead_cursor():
+    state = _state(["I'm Alex", "question", "sign me up"], lead_cursor=2)
+    prompt = build_combined_messages(state)[-1].content
+    assert "Alex" not in prompt
+    assert "question" in prompt
+
+
+def test_combined_prompt_skips_history_once_fields_are_known():
+    state = _state(["I'm Alex", "on YouTube", "alex@example.com"],
+                   lead_info={"name": "Alex", "platform": "YouTube"})
+    assert build_combined_messages(state)[-1].content == "Latest message: alex@example.com"
+
+
+def test_combined_call_extracts_from_earlier_messages(fake_llm):
+    state = _state(["Hi, I'm Alex", "what about it", "Maybe, tell me more"])
+    update = intent_node(state, fake_llm, combined=True)
+    assert update["extracted_lead"]["name"] == "Alex"
+    assert fake_llm.calls["combined"] == 1
@@ -0,0 +1,87 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from agent.tools import lead_capture
+from agent.tools.lead_sink import JSONLBackend, LeadSink, lead_sink_from_env
+
+ROOT = Path(__file__).resolve().parent.parent
+
+IMPORT_THEN_CAPTURE = """
+import sys
+opened = []
+sys.addaudithook(lambda event, args: opened.append(args[0]) if event == "open" and str(args[0]).endswith("leads.jsonl") else None)
+from agent.tools import lead_capture
+assert not opened and lead_capture.lead_sink is None, opened
+lead_capture.mock_lead_capture("Alex", "alex@example.com", "YouTube")
+lead_capture.close_lead_sink()
+assert opened
+"""
+
+
+def test_sink_is_created_on_first_capture(tmp_path):
+    leads = tmp_path / "leads.jsonl"
+    leads.write_text(json.dumps({"email": "old@example.com"}) + "\n")
+    env = {**os.environ, "AUTOSTREAM_LEAD_SINK": f"jsonl:{leads}", "PYTHONPATH": str(ROOT)}
+    subprocess.run([sys.executable, "-c", IMPORT_THEN_CAPTURE], cwd=tmp_path, env=env, check=True, capture_output=True)
+    assert [json.loads(line)["email"] for line in leads.read_text().splitlines()] == [
+        "old@example.com", "alex@example.com"
+    ]
+
+
+def test_default_path_is_anchored_to_the_given_directory(tmp_path, monkeypatch):
+    monkeypatch.delenv("AUTOSTREAM_LEAD_SINK", raising=False)
+    sink = lead_sink_from_env(tmp_path)
+    assert sink.backend.path == str(tmp_path / "leads.jsonl")
+    assert lead_capture.LEADS_DIR == ROOT
+
+
+def test_set_lead_sink_replaces_the_configured_sink(tmp_path):
+    previous = lead_capture.get_lead_sink()
+    sink = LeadSink(JSONLBackend(str(tmp_path / "leads.jsonl")))
+    lead_capture.set_lead_sink(sink)
+    try:
+        lead_capture.mock_lead_capture("Sam", "sam@example.com", "TikTok")
+        lead_capture.mock_lead_capture("Sam", "SAM@example.com", "TikTok")
+        lead_capture.close_lead_sink()
+        assert (sink.stats.captured, sink.stats.duplicates, sink.stats.written) == (1, 1, 1)
+    finally:
+        lead_capture.set_lead_sink(previous)
+
+
+class SlowBackend:
+    def __init__(self, emails):
+        self.emails = emails
+        self.written = []
+
+    def known_emails(self):
+        time.sleep(0.3)
+        return set(self.emails)
+
+    def write_batch(self, leads):
+        self.written += leads
+
+
+def test_capture_does_not_wait_for_the_stored_emails():
+    backend = SlowBackend({"old@example.com"})
+    sink = LeadSink(backend)
+    started = time.perf_counter()
+    assert sink.capture("Old", "OLD@example.com", "YouTube")
+    assert sink.capture("New", "new@example.com", "YouTube")
+    assert time.perf_counter() - started < 0.1
+    sink.close()
+    assert [lead["email"] for lead in backend.written] == ["new@example.com"]
+    assert (sink.stats.captured, sink.stats.duplicates, sink.stats.written) == (1, 1, 1)
+    assert not sink.capture("Old", "old@example.com", "YouTube")
+
+
+@pytest.mark.parametrize("setting", ["/var/leads.jsonl", "csv:leads.csv", "leads.db"])
+def test_unknown_sink_kind_is_rejected(setting, monkeypatch, tmp_path):
+    monkeypatch.setenv("AUTOSTREAM_LEAD_SINK", setting)
+    with pytest.raises(ValueError):
+        lead_sink_from_env(tmp_path)
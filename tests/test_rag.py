@@ -0,0 +1,35 @@
+import asyncio
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agent.nodes import rag
+from agent.nodes.rag import arag_node, rag_node
+from agent.state import new_conversation_state
+
+
+def _long_conversation(question):
+    messages = []
+    for i in range(8):
+        messages += [HumanMessage(content=f"question {i}"), AIMessage(content=f"answer {i}")]
+    return {**new_conversation_state(), "messages": messages + [HumanMessage(content=question)]}
+
+
+def test_faq_answer_skips_the_summary(fake_llm):
+    update = rag_node(_long_conversation("What platforms do you support?"), fake_llm)
+    assert "YouTube" in update["response"]
+    assert "summary" not in update
+    assert sum(fake_llm.calls.values()) == 0
+
+
+def test_cached_answer_skips_the_summary(fake_llm, monkeypatch):
+    monkeypatch.setattr(rag, "local_response", lambda state: "cached answer")
+    update = asyncio.run(arag_node(_long_conversation("Tell me about editing"), fake_llm))
+    assert update == {"response": "cached answer"}
+    assert sum(fake_llm.calls.values()) == 0
+
+
+def test_llm_answer_folds_the_summary_first(fake_llm):
+    update = rag_node(_long_conversation("Tell me about editing videos with the pro plan"), fake_llm)
+    assert update["response"] == fake_llm.reply
+    assert update["summary"]
+    assert (fake_llm.calls["summary"], fake_llm.calls["reply"]) == (1, 1)
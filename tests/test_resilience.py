@@ -0,0 +1,113 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from langchain_core.messages import AIMessageChunk
+
+from agent.resilience import CircuitBreaker, LLMUnavailableError, ResilientLLM
+
+
+class FlakyModel:
+    """Streams "ok done", failing the first `failures` calls after `partial` chunks."""
+
+    def __init__(self, failures=0, partial=0, hang=None):
+        self.failures = failures
+        self.partial = partial
+        self.hang = hang
+        self.calls = 0
+
+    def _chunks(self):
+        self.calls += 1
+        if self.hang is not None:
+            self.hang.wait()
+        if self.calls <= self.failures:
+            return [AIMessageChunk(content=f"t{i} ") for i in range(self.partial)], RuntimeError("boom")
+        return [AIMessageChunk(content="ok "), AIMessageChunk(content="done")], None
+
+    def stream(self, messages, config=None, **kwargs):
+        chunks, error = self._chunks()
+        yield from chunks
+        if error:
+            raise error
+
+    async def astream(self, messages, config=None, **kwargs):
+        chunks, error = self._chunks()
+        for chunk in chunks:
+            yield chunk
+        if error:
+            raise error
+
+
+def _resilient(model, **options):
+    options.setdefault("backoff", 0.0)
+    options.setdefault("hedge", False)
+    return ResilientLLM(model, **options)
+
+
+def test_errors_before_output_are_retried():
+    model = FlakyModel(failures=2)
+    llm = _resilient(model, max_retries=2)
+    assert llm.invoke("hi").content == "ok done"
+    assert (model.calls, llm.stats.retries, llm.stats.failures) == (3, 2, 0)
+
+
+def test_retries_are_bounded():
+    model = FlakyModel(failures=5)
+    llm = _resilient(model, max_retries=2)
+    with pytest.raises(LLMUnavailableError):
+        llm.invoke("hi")
+    assert (model.calls, llm.stats.retries, llm.stats.failures) == (3, 2, 1)
+
+
+def test_no_retry_after_streamed_output():
+    model = FlakyModel(failures=1, partial=2)
+    llm = _resilient(model, max_retries=2)
+    with pytest.raises(LLMUnavailableError):
+        llm.invoke("hi")
+    assert (model.calls, llm.stats.retries) == (1, 0)
+
+
+def test_async_no_retry_after_streamed_output():
+    model = FlakyModel(failures=1, partial=2)
+    llm = _resilient(model, max_retries=2)
+    with pytest.raises(LLMUnavailableError):
+        asyncio.run(llm.ainvoke("hi"))
+    assert model.calls == 1
+
+    retried = FlakyModel(failures=1)
+    assert asyncio.run(_resilient(retried).ainvoke("hi")).content == "ok done"
+    assert retried.calls == 2
+
+
+def test_open_circuit_rejects_calls():
+    llm = _resilient(FlakyModel(failures=10), max_retries=0, breaker=CircuitBreaker(failure_threshold=2))
+    for _ in range(2):
+        with pytest.raises(LLMUnavailableError):
+            llm.invoke("hi")
+    with pytest.raises(LLMUnavailableError, match="circuit open"):
+        llm.invoke("hi")
+    assert llm.stats.rejected == 1
+
+
+def test_abandoned_attempts_are_capped():
+    release = threading.Event()
+    model = FlakyModel(hang=release)
+    llm = _resilient(model, turn_budget=0.05, max_abandoned=1)
+
+    with pytest.raises(LLMUnavailableError):
+        llm.invoke("hi")
+    assert llm.stats.timeouts == 1
+    assert llm.stats.abandoned_running == 1
+
+    # The hung attempt still holds a worker: fail fast instead of queueing
+    with pytest.raises(LLMUnavailableError, match="abandoned"):
+        llm.invoke("hi")
+    assert model.calls == 1
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while llm.stats.abandoned_running and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert llm.stats.abandoned_running == 0
+    assert llm.invoke("hi").content == "ok done"
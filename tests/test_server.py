@@ -0,0 +1,138 @@
+import asyncio
+import time
+
+import httpx
+
+from agent.checkpoint import SQLiteCheckpointer
+from agent.graph import create_agent
+from agent.nodes import rag
+from agent.server import create_app
+from agent.state import new_conversation_state
+from langchain_core.messages import HumanMessage
+from benchmarks.fake_llm import FakeChatModel
+
+
+def test_thread_lease(tmp_path):
+    saver = SQLiteCheckpointer(str(tmp_path / "threads.db"))
+    assert saver.try_lock_thread("t", "a")
+    assert not saver.try_lock_thread("t", "b")
+    assert saver.try_lock_thread("t", "a")
+    assert saver.try_lock_thread("other", "b")
+    assert saver.renew_thread_lock("t", "a") and not saver.renew_thread_lock("t", "b")
+    saver.unlock_thread("t", "a")
+    assert not saver.renew_thread_lock("t", "a")
+    assert saver.try_lock_thread("t", "b")
+
+    expired = SQLiteCheckpointer(str(tmp_path / "threads.db"), lock_ttl=0.0)
+    assert expired.try_lock_thread("x", "a")
+    assert expired.try_lock_thread("x", "b")
+
+
+def test_workers_sharing_a_database_keep_every_turn(tmp_path):
+    path = str(tmp_path / "threads.db")
+    # Two apps with their own agent and checkpointer, like two worker processes
+    apps = [
+        create_app(create_agent(
+            "fake-key", llm=FakeChatModel(latency_dist="const:0.02"), resilient=False,
+            checkpointer=SQLiteCheckpointer(path)
+        ))
+        for _ in range(2)
+    ]
+
+    async def post(app, i):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/threads/t/messages", json={"message": f"Tell me about feature {i}"})
+        assert response.status_code == 200
+
+    async def run():
+        await asyncio.gather(*(post(apps[i % 2], i) for i in range(6)))
+
+    asyncio.run(run())
+    latest = SQLiteCheckpointer(path).get_tuple({"configurable": {"thread_id": "t"}})
+    messages = latest.checkpoint["channel_values"]["messages"]
+    questions = sorted(m.content for m in messages if isinstance(m, HumanMessage))
+    assert questions == [f"Tell me about feature {i}" for i in range(6)]
+    assert len(messages) == 12
+
+
+class SlowCache:
+    def get(self, messages, kb_version):
+        time.sleep(0.2)
+        return "cached answer"
+
+    def set(self, messages, kb_version, answer):
+        pass
+
+
+def test_rag_cache_lookup_does_not_block_the_event_loop(fake_llm, monkeypatch):
+    monkeypatch.setattr(rag, "answer_cache", SlowCache())
+    monkeypatch.setattr(rag, "FAQ_MODE", "off")
+    state = {**new_conversation_state(), "messages": [HumanMessage(content="Tell me about editing")]}
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.ensure_future(ticker())
+        update = await rag.arag_node(state, fake_llm)
+        task.cancel()
+        return update, ticks
+
+    update, ticks = asyncio.run(run())
+    assert update == {"response": "cached answer"}
+    assert ticks >= 10
+
+
+def test_lease_outlives_its_ttl_while_the_turn_waits_and_runs(tmp_path):
+    path = str(tmp_path / "threads.db")
+    # One slot per worker and a lease shorter than a queued turn: without
+    # renewal the other worker would take the expired lease mid-turn
+    apps = [
+        create_app(create_agent(
+            "fake-key", llm=FakeChatModel(latency_dist="const:0.05"), resilient=False,
+            checkpointer=SQLiteCheckpointer(path, lock_ttl=0.1)
+        ), max_in_flight=1)
+        for _ in range(2)
+    ]
+
+    async def post(app, thread_id, i):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post(f"/threads/{thread_id}/messages", json={"message": f"Tell me about feature {i}"})
+        assert response.status_code == 200
+
+    async def run():
+        await asyncio.gather(
+            *(post(apps[i % 2], "t", i) for i in range(6)),
+            *(post(apps[i % 2], f"other-{i}", i) for i in range(6))
+        )
+
+    asyncio.run(run())
+    latest = SQLiteCheckpointer(path).get_tuple({"configurable": {"thread_id": "t"}})
+    messages = latest.checkpoint["channel_values"]["messages"]
+    questions = sorted(m.content for m in messages if isinstance(m, HumanMessage))
+    assert questions == [f"Tell me about feature {i}" for i in range(6)]
+
+
+def test_invalid_utf8_body_is_a_bad_request(tmp_path):
+    app = create_app(create_agent(
+        "fake-key", llm=FakeChatModel(), resilient=False,
+        checkpointer=SQLiteCheckpointer(str(tmp_path / "threads.db"))
+    ))
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(
+                "/threads/t/messages", content=b'{"message": "\xff"}', headers={"Content-Type": "application/json"}
+            )
+
+    response = asyncio.run(run())
+    assert response.status_code == 400
+    assert response.json() == {"error": "request body must be JSON"}
@@ -0,0 +1,73 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from agent.graph import run_conversation
+from agent.sessions import MessageLog, SessionStore
+from agent.state import new_conversation_state
+
+
+def _log(n=4):
+    return MessageLog([
+        (HumanMessage if i % 2 == 0 else AIMessage)(content=f"message {i} é") for i in range(n)
+    ])
+
+
+def test_message_log_behaves_like_a_list():
+    log = _log()
+    assert len(log) == 4
+    assert [m.content for m in log[1:3]] == ["message 1 é", "message 2 é"]
+    assert isinstance(log[-1], AIMessage) and log[-1].content == "message 3 é"
+    assert [m.content for m in reversed(log)][0] == "message 3 é"
+    assert list(log.turns())[0] == ("user", "message 0 é")
+    with pytest.raises(IndexError):
+        log[4]
+
+
+def test_message_log_pops_only_the_last_message():
+    log = _log()
+    with pytest.raises(IndexError):
+        log.pop(0)
+    assert log.pop().content == "message 3 é"
+    assert len(log) == 3
+
+
+def test_message_log_rejects_other_message_types():
+    with pytest.raises(TypeError):
+        MessageLog().append(SystemMessage(content="system"))
+
+
+def test_freeze_round_trip():
+    log = _log()
+    log.release()
+    log.freeze()
+    assert log.frozen
+    assert [m.content for m in log] == [f"message {i} é" for i in range(4)]
+    assert not log.frozen
+
+
+def test_compact_sessions_match_plain_state(make_agent):
+    agent = make_agent()
+    store = SessionStore(cold_after=0.0)
+    state = new_conversation_state()
+    for message in ["hi", "What does the Pro plan include?", "I want to sign up"]:
+        state, reply = run_conversation(agent, state, message)
+        compact, compact_reply = run_conversation(agent, store.load("s"), message)
+        store.save("s", compact)
+        assert compact_reply == reply
+
+    session = store.get("s")
+    assert [m.content for m in session.messages] == [m.content for m in state["messages"]]
+    assert session.intent == state["intent"]
+
+
+def test_store_freezes_idle_sessions(make_agent):
+    store = SessionStore(cold_after=10.0)
+    state, _ = run_conversation(make_agent(), store.load("s"), "hi")
+    store.save("s", state)
+    assert store.sweep(now=store.get("s").last_active + 11) == 1
+    assert store.stats.as_dict()["frozen"] == 1
+
+    store.load("s")
+    assert store.stats.thaws == 1 and store.stats.frozen == 0
+    store.delete("s")
+    assert "s" not in store and len(store) == 0
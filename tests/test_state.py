@@ -0,0 +1,63 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agent.graph import run_conversation
+from agent.sessions import MessageLog, SessionStore
+from agent.state import append_messages, new_conversation_state
+
+QUESTION = "What does the Pro plan include?"
+
+
+def test_reducer_copies_plain_lists():
+    history = [HumanMessage(content="hi")]
+    merged = append_messages([], history)
+    assert merged == history and merged is not history
+    merged.append(AIMessage(content="hello"))
+    assert len(history) == 1
+
+
+def test_reducer_adopts_message_logs():
+    log = MessageLog([HumanMessage(content="hi")])
+    assert append_messages([], log) is log
+    assert append_messages(log, [AIMessage(content="hello")]) is log
+    assert len(log) == 2
+
+
+def test_turn_leaves_the_callers_state_unchanged(make_agent):
+    agent = make_agent()
+    state, _ = run_conversation(agent, new_conversation_state(), "hi")
+    before = list(state["messages"])
+
+    first, _ = run_conversation(agent, state, QUESTION)
+    second, _ = run_conversation(agent, state, "How much is the Basic plan?")
+
+    assert state["messages"] == before
+    assert len(first["messages"]) == len(second["messages"]) == len(before) + 2
+    assert first["messages"][-2].content == QUESTION
+
+
+def test_turn_extends_a_session_log_in_place(make_agent):
+    agent = make_agent()
+    store = SessionStore()
+    state = store.load("s")
+    log = state["messages"]
+
+    result, reply = run_conversation(agent, state, QUESTION)
+    store.save("s", result)
+
+    assert result["messages"] is log
+    assert [m.content for m in log] == [QUESTION, reply]
+    assert store.get("s").messages is log
+
+
+def test_failed_turn_rolls_back_the_session_log(make_agent, fake_llm, monkeypatch):
+    agent = make_agent()
+    state = SessionStore().load("s")
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("model down")
+
+    monkeypatch.setattr(type(fake_llm), "_generate", fail)
+    with pytest.raises(RuntimeError):
+        run_conversation(agent, state, QUESTION)
+    assert len(state["messages"]) == 0
@@ -0,0 +1,30 @@
+import asyncio
+
+from agent.graph import arun_conversation, stream_conversation
+from agent.metrics import metrics
+from agent.state import new_conversation_state
+
+QUESTION = "Tell me about what the pro plan includes for editing videos"
+
+
+def test_stream_yields_token_chunks_with_metrics_enabled(make_agent):
+    assert metrics.enabled
+    stream = stream_conversation(make_agent(), new_conversation_state(), QUESTION)
+    tokens = list(stream)
+    assert len(tokens) > 1
+    assert "".join(tokens) == stream.response
+
+
+def test_llm_calls_are_recorded_per_turn(make_agent):
+    stream = stream_conversation(make_agent(), new_conversation_state(), QUESTION)
+    list(stream)
+    assert [call["task"] for call in metrics.last_turn["llm_calls"]] == ["rag"]
+
+
+async def _run(agent):
+    return await arun_conversation(agent, new_conversation_state(), QUESTION)
+
+
+def test_async_turn_records_llm_calls(make_agent):
+    asyncio.run(_run(make_agent()))
+    assert metrics.last_turn["llm_calls"]